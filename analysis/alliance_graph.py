@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Alliance Graph
+Per-game signed, weighted relationship graph between the four colors, updated
+turn by turn from what players say and do, and exported as compact per-turn
+adjacency tensors for corpus-wide questions.
+
+w[i, j] is i's standing toward j, the sum of i's actions toward j so far
+(optionally decayed per turn):
+
+    alliance_talk      +1  sendChat with alliance language naming j
+                           (deep_analysis_v2.ALLIANCE_KEYWORDS)
+    trade_offer        +1  proposeTrade to j
+    donation           +2  respondToDonation accepted for requester j
+    gift               +2  givePrisoner to j
+    kill               -3  killChip of one of j's chips
+    donation_refused   -1  respondToDonation refused to requester j
+
+Tables (colors in COLORS order, games are "<session>:<game>"):
+    games, models (G, 4)   model per seat, 'human' for human seats
+    turn_offsets   (G+1,)   game g's rows in adjacency are offsets[g]:offsets[g+1]
+    adjacency      (R, 4, 4) graph after turn 0..turns of each game
+    ed_game, ed_turn, ed_src, ed_dst, ed_kind   every edge update (kind indexes EDGE_KINDS)
+
+dense() pads them to (games, turns, 4, 4), so "how many turns before a kill
+was the killer last friendly to the victim" is one gather over all kills:
+
+    python alliance_graph.py build ../data_v2 talking.json
+    python alliance_graph.py report --window 10
+    python alliance_graph.py report --event gift --decay 0.9
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from corpus import COLORS, find_session_files, iter_game_snapshots, load_session, session_id
+from deep_analysis_v2 import ALLIANCE_KEYWORDS
+from event_table import executed_actions
+from outcome_table import game_models
+
+DEFAULT_TABLES = Path(__file__).parent / 'cache' / 'alliance_graph.npz'
+EDGE_KINDS = ['alliance_talk', 'trade_offer', 'donation', 'gift', 'kill', 'donation_refused']
+DEFAULT_WEIGHTS = {
+    'alliance_talk': 1.0,
+    'trade_offer': 1.0,
+    'donation': 2.0,
+    'gift': 2.0,
+    'kill': -3.0,
+    'donation_refused': -1.0,
+}
+
+
+def _color(value):
+    return COLORS.index(value) if value in COLORS else -1
+
+
+def snapshot_edges(snap):
+    """(src, dst, kind) updates from one decision/off-turn snapshot's executed actions."""
+    src = _color(snap.get('player'))
+    if src < 0 or snap['type'] not in ('decision', 'off_turn'):
+        return []
+    edges = []
+    for tool, args in executed_actions(snap):
+        if not isinstance(args, dict):
+            continue
+        if tool == 'sendChat':
+            text = (args.get('message') or '').lower()
+            if any(kw in text for kw in ALLIANCE_KEYWORDS):
+                edges.extend((src, dst, 'alliance_talk') for dst, c in enumerate(COLORS) if dst != src and c in text)
+            continue
+        if tool in ('proposeTrade', 'givePrisoner'):
+            dst = args.get('toPlayerId')
+            dst = dst if isinstance(dst, int) and 0 <= dst < len(COLORS) else -1
+            kind = 'trade_offer' if tool == 'proposeTrade' else 'gift'
+        elif tool == 'respondToDonation':
+            dst = _color(snap.get('donationRequester'))
+            kind = 'donation' if args.get('accept') else 'donation_refused'
+        elif tool == 'killChip':
+            dst = _color(args.get('color'))
+            kind = 'kill'
+        else:
+            continue
+        if dst >= 0 and dst != src:
+            edges.append((src, dst, kind))
+    return edges
+
+
+class AllianceGraph:
+    """
+    One game's graph, advanced incrementally: add() updates the current turn,
+    advance(turn) closes every turn before `turn` (recording its adjacency
+    row, then decaying). Updates that arrive for a turn already closed count
+    toward the current one.
+    """
+
+    def __init__(self, weights=None, decay=1.0):
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.decay = decay
+        self.w = np.zeros((len(COLORS), len(COLORS)), dtype=np.float32)
+        self.turn = 0
+        self.rows = []
+
+    def add(self, src, dst, kind):
+        self.w[src, dst] += self.weights[kind]
+
+    def advance(self, turn):
+        while self.turn < turn:
+            self.rows.append(self.w.copy())
+            self.w *= self.decay
+            self.turn += 1
+
+    def finish(self, turns):
+        """Adjacency rows for turns 0..turns, shape (turns + 1, 4, 4)."""
+        self.advance(turns + 1)
+        return np.stack(self.rows[:turns + 1])
+
+
+# =============================================================================
+# TABLES
+# =============================================================================
+
+def build_tables(paths=None, weights=None, decay=1.0):
+    """{'games', 'models', 'turn_offsets', 'adjacency', 'ed_*'} for every game in the sessions."""
+    games, models, blocks, edges = [], [], [], []
+    for path in find_session_files(paths):
+        data = load_session(path)
+        if data is None:
+            continue
+        sid = session_id(data, path)
+        session = data.get('session') or {}
+        graphs, codes, starts, ends, last_turn = {}, {}, {}, {}, {}
+        for game, snap in iter_game_snapshots(data):
+            if snap['type'] == 'game_start':
+                starts[game] = snap
+                continue
+            if snap['type'] == 'game_end':
+                ends[game] = snap.get('turns', 0)
+                continue
+            if game not in graphs:
+                graphs[game] = AllianceGraph(weights, decay)
+                codes[game] = len(games) + len(codes)
+            graph = graphs[game]
+            turn = snap.get('turn', 0)
+            graph.advance(turn)
+            last_turn[game] = max(last_turn.get(game, 0), turn)
+            for src, dst, kind in snapshot_edges(snap):
+                graph.add(src, dst, kind)
+                edges.append((codes[game], graph.turn, src, dst, EDGE_KINDS.index(kind)))
+        for game, graph in graphs.items():
+            games.append(f'{sid}:{-1 if game is None else game}')
+            models.append(game_models(starts.get(game, {}), session))
+            blocks.append(graph.finish(max(ends.get(game, 0), last_turn[game])))
+
+    lengths = [len(b) for b in blocks]
+    return {
+        'games': np.array(games, dtype=str),
+        'models': np.array(models, dtype=str).reshape(-1, len(COLORS)),
+        'turn_offsets': np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+        'adjacency': np.concatenate(blocks) if blocks else np.zeros((0, 4, 4), np.float32),
+        'ed_game': np.array([e[0] for e in edges], dtype=np.int64),
+        'ed_turn': np.array([e[1] for e in edges], dtype=np.int64),
+        'ed_src': np.array([e[2] for e in edges], dtype=np.int8),
+        'ed_dst': np.array([e[3] for e in edges], dtype=np.int8),
+        'ed_kind': np.array([e[4] for e in edges], dtype=np.int8),
+        'decay': np.array(decay),
+    }
+
+
+def reweight(tables, weights=None, decay=1.0):
+    """Adjacency rows rebuilt from the stored edge updates with other weights or decay, no re-parse."""
+    w = dict(DEFAULT_WEIGHTS, **(weights or {}))
+    offsets = tables['turn_offsets']
+    delta = np.zeros_like(tables['adjacency'])
+    row = offsets[tables['ed_game']] + tables['ed_turn']
+    values = np.array([w[k] for k in EDGE_KINDS], dtype=np.float32)[tables['ed_kind']]
+    np.add.at(delta, (row, tables['ed_src'], tables['ed_dst']), values)
+    dense_delta = dense({'turn_offsets': offsets, 'adjacency': delta}, fill=0.0)
+    out = np.empty_like(dense_delta)
+    acc = np.zeros_like(dense_delta[:, 0])
+    for t in range(dense_delta.shape[1]):
+        acc = acc * decay + dense_delta[:, t] if t else dense_delta[:, 0].copy()
+        out[:, t] = acc
+    lengths = np.diff(offsets)
+    valid = np.arange(out.shape[1])[None, :] < lengths[:, None]
+    return out[valid]
+
+
+def save_tables(tables, path=DEFAULT_TABLES):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, **tables)
+
+
+def load_tables(path=DEFAULT_TABLES):
+    with np.load(path) as z:
+        return {k: z[k] for k in z.files}
+
+
+def dense(tables, fill=np.nan):
+    """(games, max turns + 1, 4, 4) adjacency; turns after a game's end are `fill`."""
+    offsets = tables['turn_offsets']
+    lengths = np.diff(offsets)
+    out = np.full((len(lengths), int(lengths.max(initial=0)), len(COLORS), len(COLORS)), fill, dtype=np.float32)
+    valid = np.arange(out.shape[1])[None, :] < lengths[:, None]
+    out[valid] = tables['adjacency']
+    return out
+
+
+# =============================================================================
+# QUERIES
+# =============================================================================
+
+def edge_before(tables, kind='kill', k=10, reverse=False, adjacency=None):
+    """
+    Edge weight src->dst (dst->src if reverse) at offsets -k..0 around every
+    update of `kind`. Returns (offsets, values (E, k+1)); NaN before turn 0.
+    """
+    mask = tables['ed_kind'] == EDGE_KINDS.index(kind)
+    g, t = tables['ed_game'][mask], tables['ed_turn'][mask]
+    src, dst = tables['ed_src'][mask], tables['ed_dst'][mask]
+    if reverse:
+        src, dst = dst, src
+    d = dense(tables if adjacency is None else dict(tables, adjacency=adjacency))
+    offsets = np.arange(-k, 1)
+    turns = t[:, None] + offsets[None, :]
+    values = d[g[:, None], np.clip(turns, 0, None), src[:, None], dst[:, None]]
+    values[turns < 0] = np.nan
+    return offsets, values
+
+
+def last_positive(offsets, values):
+    """Turns before the event since the edge was last positive (offsets < 0); -1 if never."""
+    before = values[:, offsets < 0] > 0
+    found = before.any(axis=1)
+    last = before.shape[1] - 1 - np.argmax(before[:, ::-1], axis=1)
+    return np.where(found, -offsets[offsets < 0][last], -1)
+
+
+def model_standing(tables):
+    """{(model, toward model): mean final weight} over every ordered pair of seats."""
+    final = tables['adjacency'][tables['turn_offsets'][1:] - 1]
+    models = tables['models']
+    i, j = np.meshgrid(np.arange(len(COLORS)), np.arange(len(COLORS)), indexing='ij')
+    off = i != j
+    src = models[:, i[off]].ravel()
+    dst = models[:, j[off]].ravel()
+    w = final[:, i[off], j[off]].ravel()
+    pairs, inverse = np.unique(np.stack([src, dst], axis=1), axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    mean = np.bincount(inverse, w) / np.bincount(inverse)
+    return {tuple(p): m for p, m in zip(pairs, mean)}
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def print_section(title):
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-turn signed alliance graphs.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_build = sub.add_parser('build', help='Build the graph tables')
+    p_build.add_argument('paths', nargs='*', help='Session files or directories')
+    p_report = sub.add_parser('report', help='Edges around events and per-model standing')
+    p_report.add_argument('--event', choices=EDGE_KINDS, default='kill', help='Edge updates to align on')
+    p_report.add_argument('--window', type=int, default=10, help='Turns before the event')
+    p_report.add_argument('--decay', type=float, help='Re-weigh with this per-turn decay (default: as built)')
+    for p in (p_build, p_report):
+        p.add_argument('--tables', default=DEFAULT_TABLES, help='Graph tables (.npz)')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        tables = build_tables(args.paths or None)
+        save_tables(tables, args.tables)
+        counts = np.bincount(tables['ed_kind'], minlength=len(EDGE_KINDS))
+        print(f"  {len(tables['games'])} games, {len(tables['adjacency'])} turn graphs -> {args.tables}")
+        for name, count in zip(EDGE_KINDS, counts):
+            print(f"    {name:<18} {count}")
+        return
+
+    tables = load_tables(args.tables)
+    adjacency = reweight(tables, decay=args.decay) if args.decay is not None else None
+    offsets, forward = edge_before(tables, args.event, args.window, adjacency=adjacency)
+    _, backward = edge_before(tables, args.event, args.window, reverse=True, adjacency=adjacency)
+    print_section(f"EDGES AROUND {args.event.upper()} ({len(forward)} events, {len(tables['games'])} games)")
+    if len(forward):
+        print(f"\n  {'Offset':>6} {'actor->target':>14} {'target->actor':>14} {'friendly':>9}")
+        for c, offset in enumerate(offsets):
+            col = forward[:, c]
+            seen = ~np.isnan(col)
+            friendly = f"{(col[seen] > 0).mean():>9.0%}" if seen.any() else f"{'-':>9}"
+            print(f"  {offset:>+6} {np.nanmean(col) if seen.any() else np.nan:>14.2f} "
+                  f"{np.nanmean(backward[:, c]) if seen.any() else np.nan:>14.2f} {friendly}")
+
+        lead = last_positive(offsets, forward)
+        flipped = lead > 0
+        print(f"\n  Actor was friendly to the target within {args.window} turns before: "
+              f"{flipped.sum()}/{len(lead)} ({flipped.mean():.0%})")
+        if flipped.any():
+            print(f"  Turns from last positive edge to the {args.event}: median {np.median(lead[flipped]):.0f}, "
+                  f"mean {lead[flipped].mean():.1f}")
+            bins = [(1, 1), (2, 3), (4, 7), (8, args.window)]
+            print('  ' + '   '.join(f"{lo}-{hi}: {((lead >= lo) & (lead <= hi)).sum()}" if lo != hi
+                                    else f"{lo}: {(lead == lo).sum()}" for lo, hi in bins if lo <= args.window))
+
+    standing = model_standing(tables if adjacency is None else dict(tables, adjacency=adjacency))
+    names = sorted({a for a, _ in standing} | {b for _, b in standing})
+    print_section("FINAL STANDING (mean edge weight, row toward column)")
+    print(f"\n  {'':<20}" + ''.join(f"{n[:12]:>13}" for n in names))
+    for a in names:
+        print(f"  {a[:20]:<20}" + ''.join(f"{standing[(a, b)]:>+13.2f}" if (a, b) in standing else f"{'-':>13}"
+                                        for b in names))
+
+
+if __name__ == '__main__':
+    main()
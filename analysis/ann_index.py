@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Approximate Nearest-Neighbour Message Search
+IVF (inverted file) index over the embeddings.py vector store, for pulling the
+messages most similar to a cited example without scanning every vector.
+
+Vectors are clustered with k-means into `nlist` cells; each cell's vectors are
+stored contiguously, and a query only scores the `nprobe` cells whose centroids
+are closest to it:
+
+    python ann_index.py build ../data_v2 talking.json
+    python ann_index.py query "put your chips in the alliance bank" -k 50
+    python ann_index.py similar --game 0 --turn 0 --player blue -k 50
+
+`similar` looks up the exemplar message (e.g. the kimi-k2 Game 0 Turn 0 quote
+in hackathon_summary.py) and returns its neighbours across all sessions.
+"""
+
+import argparse
+import json
+import os
+import pickle
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+from corpus import find_session_files, iter_messages, load_session, session_id
+from embeddings import (
+    DEFAULT_STORE_DIR, FRIENDLY_ANCHORS, HOSTILE_ANCHORS, VectorStore,
+    embed_texts, load_embedder, message_key,
+)
+
+DEFAULT_INDEX_DIR = Path(__file__).parent / 'cache' / 'ann_index'
+
+
+# =============================================================================
+# K-MEANS (spherical: vectors are L2-normalized, so nearest = max dot product)
+# =============================================================================
+
+def assign(vectors, centroids, chunk=65536):
+    """Index of the closest centroid for each row, computed in chunks."""
+    out = np.empty(len(vectors), dtype=np.int32)
+    for i in range(0, len(vectors), chunk):
+        out[i:i + chunk] = np.argmax(np.asarray(vectors[i:i + chunk]) @ centroids.T, axis=1)
+    return out
+
+
+def train_centroids(vectors, nlist, iters=20, sample=256, seed=0):
+    """Spherical k-means on a sample of at most `sample` points per centroid."""
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    idx = np.sort(rng.choice(n, size=min(n, nlist * sample), replace=False))
+    train = np.asarray(vectors[idx])
+    centroids = train[rng.choice(len(train), size=nlist, replace=False)].copy()
+    for _ in range(iters):
+        labels = np.argmax(train @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, train)
+        counts = np.bincount(labels, minlength=nlist)
+        empty = counts == 0
+        # Re-seed empty cells with random training points
+        sums[empty] = train[rng.choice(len(train), size=int(empty.sum()))]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids
+
+
+def default_nlist(n):
+    """~4*sqrt(n) cells, the usual IVF rule of thumb."""
+    return int(max(1, min(n, round(4 * np.sqrt(n)))))
+
+
+# =============================================================================
+# IVF INDEX
+# =============================================================================
+
+class IVFIndex:
+    """
+    Files in index_dir:
+    - centroids.npy   nlist x dim
+    - offsets.npy     cell i holds rows order[offsets[i]:offsets[i+1]]
+    - order.npy       vector-store row for each position in the reordered matrix
+    - vectors.f32     store vectors reordered by cell (memory-mapped on query)
+    - messages.pkl    store row -> [(session, game, turn, player, tool, model)] and text
+    - meta.json       embedder identity and the store size the lists cover
+    """
+
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR):
+        self.index_dir = Path(index_dir)
+        self.meta_path = self.index_dir / 'meta.json'
+        self.meta = None
+        self.centroids = None
+        self.offsets = None
+        self.order = None
+        self.vectors = None
+        self.messages = None
+        self.texts = None
+
+    def exists(self):
+        return self.meta_path.exists()
+
+    def build(self, store, messages, nlist=None, retrain=False, seed=0):
+        """
+        (Re)build the inverted lists over every vector in the store. Centroids
+        are reused from a previous build unless retrain is set or the embedder
+        changed, so incremental builds only pay for the assignment pass.
+        """
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        matrix = store.matrix()
+        old = self._read_meta()
+        reuse = (not retrain and old and old['embedder'] == store.meta['embedder']
+                 and (self.index_dir / 'centroids.npy').exists())
+        if reuse:
+            centroids = np.load(self.index_dir / 'centroids.npy')
+        else:
+            centroids = train_centroids(matrix, nlist or default_nlist(len(matrix)), seed=seed)
+
+        labels = assign(matrix, centroids)
+        order = np.argsort(labels, kind='stable').astype(np.int64)
+        offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=len(centroids)), out=offsets[1:])
+
+        reordered = np.memmap(self.index_dir / 'vectors.f32.tmp', dtype=np.float32, mode='w+',
+                              shape=(max(len(order), 1), matrix.shape[1]))
+        for i in range(0, len(order), 65536):
+            reordered[i:i + 65536] = matrix[order[i:i + 65536]]
+        reordered.flush()
+        del reordered
+        os.replace(self.index_dir / 'vectors.f32.tmp', self.index_dir / 'vectors.f32')
+
+        np.save(self.index_dir / 'centroids.npy', centroids)
+        np.save(self.index_dir / 'offsets.npy', offsets)
+        np.save(self.index_dir / 'order.npy', order)
+        with open(self.index_dir / 'messages.pkl', 'wb') as f:
+            pickle.dump(messages, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.meta = {
+            'embedder': store.meta['embedder'],
+            'store_dir': str(store.store_dir),
+            'count': len(order),
+            'dim': int(matrix.shape[1]),
+            'nlist': len(centroids),
+        }
+        with open(self.meta_path, 'w') as f:
+            json.dump(self.meta, f, indent=2)
+        return self
+
+    def _read_meta(self):
+        if not self.meta_path.exists():
+            return None
+        with open(self.meta_path) as f:
+            return json.load(f)
+
+    def load(self):
+        self.meta = self._read_meta()
+        if self.meta is None:
+            raise FileNotFoundError(f"No ANN index in {self.index_dir}; run 'build' first")
+        self.centroids = np.load(self.index_dir / 'centroids.npy')
+        self.offsets = np.load(self.index_dir / 'offsets.npy')
+        self.order = np.load(self.index_dir / 'order.npy')
+        self.vectors = np.memmap(self.index_dir / 'vectors.f32', dtype=np.float32, mode='r',
+                                 shape=(max(self.meta['count'], 1), self.meta['dim']))
+        with open(self.index_dir / 'messages.pkl', 'rb') as f:
+            saved = pickle.load(f)
+        self.messages = saved['occurrences']
+        self.texts = saved['texts']
+        return self
+
+    def search_vector(self, query, k=50, nprobe=8):
+        """Top-k (store_row, score) pairs for one normalized query vector."""
+        nprobe = min(nprobe, len(self.centroids))
+        cells = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        spans = [(self.offsets[c], self.offsets[c + 1]) for c in cells]
+        positions = np.concatenate([np.arange(a, b) for a, b in spans]) if spans else np.zeros(0, np.int64)
+        if not len(positions):
+            return []
+        # Cells are contiguous runs, so read each slice rather than fancy-indexing the memmap
+        scores = np.concatenate([np.asarray(self.vectors[a:b]) @ query for a, b in spans])
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self.order[positions[i]]), float(scores[i])) for i in top]
+
+    def hits(self, query, k=50, nprobe=8, tool=None, exclude=None):
+        """
+        Expand vector hits into message records. Identical texts share one
+        vector, so each hit may cover several messages; the search over-fetches
+        until k records survive the filters.
+        """
+        fetch = k
+        while True:
+            results = []
+            raw = self.search_vector(query, fetch, nprobe)
+            for row, score in raw:
+                for occ in self.messages.get(row, ()):
+                    sess, game, turn, player, msg_tool, model = occ
+                    if tool and msg_tool != tool:
+                        continue
+                    if exclude and occ == exclude:
+                        continue
+                    results.append({
+                        'session': sess, 'game': game, 'turn': turn, 'player': player,
+                        'model': model, 'tool': msg_tool,
+                        'score': score, 'text': self.texts[row],
+                    })
+            if len(results) >= k or len(raw) < fetch:
+                return results[:k]
+            fetch *= 4
+
+
+def collect_messages(store, paths=None):
+    """Map store rows to their corpus occurrences and texts."""
+    occurrences = defaultdict(list)
+    texts = {}
+    for path in find_session_files(paths):
+        data = load_session(path)
+        if data is None:
+            continue
+        for m in iter_messages(data, session_id(data, path)):
+            row = store.rows.get(message_key(m['text']))
+            if row is None:
+                continue
+            occurrences[row].append((m['session'], m['game'], m['turn'], m['player'], m['tool'], m['model']))
+            texts[row] = m['text']
+    return {'occurrences': dict(occurrences), 'texts': texts}
+
+
+def find_exemplar(index, session=None, game=None, turn=None, player=None, tool=None):
+    """First indexed message matching the given coordinates."""
+    for row, occs in index.messages.items():
+        for occ in occs:
+            fields = zip(occ, (session, game, turn, player, tool))
+            if all(want is None or have == want for have, want in fields):
+                return row, occ
+    return None, None
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def print_hits(hits):
+    for h in hits:
+        text = h['text'].replace('\n', ' ')
+        print(f"  {h['score']:.3f}  {h['model']:<15} {h['tool']:<8} "
+              f"{h['session']} G{h['game']} T{h['turn']}")
+        print(f"         \"{text[:160]}{'...' if len(text) > 160 else ''}\"")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Approximate nearest-neighbour search over message embeddings.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_build = sub.add_parser('build', help='Embed new messages and (re)build the IVF lists')
+    p_build.add_argument('paths', nargs='*', help='Session files or directories')
+    p_build.add_argument('--nlist', type=int, default=None, help='Number of cells (default ~4*sqrt(n))')
+    p_build.add_argument('--retrain', action='store_true', help='Re-run k-means instead of reusing centroids')
+    p_build.add_argument('--backend', choices=['auto', 'st', 'tfidf'], default='auto')
+    p_build.add_argument('--workers', type=int, default=None)
+
+    p_query = sub.add_parser('query', help='Messages most similar to a free-text query')
+    p_query.add_argument('text')
+
+    p_similar = sub.add_parser('similar', help='Messages most similar to one corpus message')
+    p_similar.add_argument('--session')
+    p_similar.add_argument('--game', type=int)
+    p_similar.add_argument('--turn', type=int)
+    p_similar.add_argument('--player')
+
+    for p in (p_build, p_query, p_similar):
+        p.add_argument('--store', default=DEFAULT_STORE_DIR, help='Vector store directory')
+        p.add_argument('--index', default=DEFAULT_INDEX_DIR, help='ANN index directory')
+    for p in (p_query, p_similar):
+        p.add_argument('-k', type=int, default=50)
+        p.add_argument('--nprobe', type=int, default=8, help='Cells to scan per query')
+        p.add_argument('--tool', choices=['think', 'sendChat'])
+    args = parser.parse_args()
+
+    store = VectorStore(args.store)
+    index = IVFIndex(args.index)
+
+    if args.command == 'build':
+        embedder = load_embedder(store, args.backend, workers=args.workers)
+        store.open(embedder)
+        paths = args.paths or None
+        texts = [m['text'] for path in find_session_files(paths)
+                 for data in [load_session(path)] if data is not None
+                 for m in iter_messages(data)]
+        added = embed_texts(texts + FRIENDLY_ANCHORS + HOSTILE_ANCHORS, store, embedder)
+        index.build(store, collect_messages(store, paths), nlist=args.nlist, retrain=args.retrain)
+        print(f"  {len(store)} vectors ({added} new), {index.meta['nlist']} cells in {index.index_dir}")
+        return
+
+    index.load()
+    if args.command == 'query':
+        if store.meta is None or store.meta['embedder'] != index.meta['embedder']:
+            raise SystemExit(f"Vector store {store.store_dir} does not match the index embedder")
+        embedder = load_embedder(store)
+        query = embedder.encode([args.text])[0]
+        print(f"\n  Nearest to: \"{args.text}\"\n")
+        print_hits(index.hits(query, args.k, args.nprobe, args.tool))
+    else:
+        row, occ = find_exemplar(index, args.session, args.game, args.turn, args.player, args.tool)
+        if row is None:
+            raise SystemExit('No indexed message matches those coordinates')
+        query = np.asarray(store.matrix()[row])
+        print(f"\n  Exemplar: {occ[5]} {occ[0]} G{occ[1]} T{occ[2]} ({occ[4]})")
+        print(f"    \"{index.texts[row][:200]}\"\n")
+        print_hits(index.hits(query, args.k, args.nprobe, args.tool, exclude=occ))
+
+
+if __name__ == '__main__':
+    main()
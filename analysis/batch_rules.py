@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Vectorized Random Playouts
+Plays many random games at once with NumPy, for Monte Carlo evaluation
+(mcts.py). The rules are the ones in rules.py; every game in the batch advances
+one decision per step, with each phase handled as a masked array operation.
+
+The random policy collapses a turn into one step: pick a playable chip color
+uniformly, then a pile uniformly (or a new pile). Captures kill a uniformly
+chosen chip, a free choice of next player is uniform over the valid seats, and
+a donor accepts with probability 1/2.
+
+Batch layout (B games):
+    supply   (B, 4)          chips in supply
+    pris     (B, 4, 4)       prisoner counts [player, color]
+    alive    (B, 4)
+    piles    (B, P, L)       chip colors bottom -> top, -1 = empty slot
+    plen     (B, P)          pile heights; live piles are packed at 0..npiles-1
+    npiles   (B,)
+    current, phase, donor, winner (B,)
+    asked    (B, 4)          donation refusals so far
+"""
+
+import numpy as np
+
+import rules as R
+
+PLAY, DONATION, OVER = 0, 1, 2
+
+
+class Batch:
+    """B copies of one position, advanced independently."""
+
+    def __init__(self, pos, n):
+        chips = R.chips_in_play(pos)
+        max_piles = max(chips, 1) + 1
+        self.n = n
+        self.supply = np.tile(np.array(pos[R.SUPPLY], dtype=np.int16), (n, 1))
+        pris = np.zeros((4, 4), dtype=np.int16)
+        for p, colors in enumerate(pos[R.PRISONERS]):
+            for c in colors:
+                pris[p, c] += 1
+        self.pris = np.tile(pris, (n, 1, 1))
+        self.alive = np.tile(np.array([bool(pos[R.ALIVE] >> i & 1) for i in range(4)]), (n, 1))
+        piles = np.full((max_piles, chips + 1), -1, dtype=np.int8)
+        plen = np.zeros(max_piles, dtype=np.int16)
+        for i, pile in enumerate(pos[R.PILES]):
+            piles[i, :len(pile)] = pile
+            plen[i] = len(pile)
+        self.piles = np.tile(piles, (n, 1, 1))
+        self.plen = np.tile(plen, (n, 1))
+        self.npiles = np.full(n, len(pos[R.PILES]), dtype=np.int16)
+        self.current = np.full(n, pos[R.CURRENT], dtype=np.int8)
+        self.donor = np.full(n, pos[R.DONOR], dtype=np.int8)
+        self.asked = np.tile(np.array([bool(pos[R.ASKED] >> i & 1) for i in range(4)]), (n, 1))
+        self.winner = np.full(n, pos[R.WINNER], dtype=np.int8)
+        self.phase = np.full(n, OVER if R.is_terminal(pos) else
+                             DONATION if pos[R.PHASE] == R.DONATION else PLAY, dtype=np.int8)
+        self.rows = np.arange(n)
+        if pos[R.PHASE] not in (R.SELECT_CHIP, R.DONATION, R.GAME_OVER):
+            raise ValueError('Batch playouts start at selectChip or donation; advance the tree first')
+
+    # -------------------------------------------------------------------------
+    # helpers
+    # -------------------------------------------------------------------------
+
+    def _has_chips(self, idx, players):
+        return (self.supply[idx, players] + self.pris[idx, players].sum(axis=1)) > 0
+
+    def _remove_piles(self, idx, slots):
+        """Remove pile `slots[k]` from game `idx[k]`, moving the last pile into the hole."""
+        last = self.npiles[idx] - 1
+        self.piles[idx, slots] = self.piles[idx, last]
+        self.plen[idx, slots] = self.plen[idx, last]
+        self.piles[idx, last] = -1
+        self.plen[idx, last] = 0
+        self.npiles[idx] = last
+
+    def _random_choice(self, rng, mask):
+        """One uniformly random True column per row of a boolean mask (rows must have one)."""
+        return np.argmax(rng.random(mask.shape) * mask, axis=1)
+
+    # -------------------------------------------------------------------------
+    # flow
+    # -------------------------------------------------------------------------
+
+    def _set_next(self, idx, target):
+        """Game.setNextPlayer for each game in idx."""
+        for _ in range(3):
+            dead = ~self.alive[idx, target]
+            target = np.where(dead, (target + 1) % 4, target)
+        self.current[idx] = target
+        self.phase[idx] = PLAY
+        self._settle(idx)
+
+    def _settle(self, idx):
+        """Players to move with no chips start a donation round."""
+        idx = idx[(self.phase[idx] == PLAY) & ~self._has_chips(idx, self.current[idx])]
+        if len(idx):
+            self.asked[idx] = False
+            self.phase[idx] = DONATION
+            self._ask_next(idx)
+
+    def _ask_next(self, idx):
+        """Game.askNextDonation: next alive, unasked seat holding prisoners, else eliminate."""
+        req = self.current[idx].astype(np.int64)
+        donor = np.full(len(idx), -1, dtype=np.int64)
+        for i in (3, 2, 1):  # reverse so the nearest seat wins
+            seat = (req + i) % 4
+            ok = self.alive[idx, seat] & ~self.asked[idx, seat] & (self.pris[idx, seat].sum(axis=1) > 0)
+            donor = np.where(ok, seat, donor)
+        self.donor[idx] = donor
+        none = donor < 0
+        if none.any():
+            self._eliminate(idx[none], req[none])
+
+    def _eliminate(self, idx, players):
+        self.alive[idx, players] = False
+        self.donor[idx] = -1
+        self.asked[idx] = False
+        left = self.alive[idx].sum(axis=1)
+        over = left == 1
+        if over.any():
+            done = idx[over]
+            self.winner[done] = np.argmax(self.alive[done], axis=1)
+            self.phase[done] = OVER
+        rest = idx[~over]
+        if len(rest):
+            # Game.eliminatePlayer: first alive seat moves next
+            self.current[rest] = np.argmax(self.alive[rest], axis=1)
+            self.phase[rest] = PLAY
+            self._settle(rest)
+
+    # -------------------------------------------------------------------------
+    # steps
+    # -------------------------------------------------------------------------
+
+    def _play(self, idx, rng):
+        p = self.current[idx].astype(np.int64)
+        hand = self.pris[idx, p].copy()
+        hand[np.arange(len(idx)), p] += self.supply[idx, p]
+        color = self._random_choice(rng, hand > 0)
+        own = color == p
+        self.supply[idx[own], p[own]] -= 1
+        self.pris[idx[~own], p[~own], color[~own]] -= 1
+
+        # Uniform over existing piles plus a new one (slot == npiles)
+        slot = (rng.random(len(idx)) * (self.npiles[idx] + 1)).astype(np.int64)
+        height = self.plen[idx, slot].astype(np.int64)
+        top = self.piles[idx, slot, np.maximum(height - 1, 0)]
+        capture = (height > 0) & (top == color)
+        self.piles[idx, slot, height] = color
+        self.plen[idx, slot] = height + 1
+        new = slot == self.npiles[idx]
+        self.npiles[idx[new]] += 1
+
+        if capture.any():
+            self._capture(idx[capture], slot[capture], color[capture], rng)
+        rest = ~capture
+        if rest.any():
+            self._determine_next(idx[rest], slot[rest], rng)
+
+    def _capture(self, idx, slot, color, rng):
+        capturer_alive = self.alive[idx, color]
+        dead = idx[~capturer_alive]
+        if len(dead):
+            # Captured by an eliminated color: the pile goes to the dead box
+            self._remove_piles(dead, slot[~capturer_alive])
+            self.phase[dead] = PLAY
+            self._settle(dead)
+        live = capturer_alive
+        if not live.any():
+            return
+        idx, slot, color = idx[live], slot[live], color[live]
+        chips = self.piles[idx, slot].astype(np.int64)
+        height = self.plen[idx, slot].astype(np.int64)
+        in_pile = np.arange(chips.shape[1])[None, :] < height[:, None]
+        kill = self._random_choice(rng, in_pile)
+        keep = in_pile.copy()
+        keep[np.arange(len(idx)), kill] = False
+        rows, cols = np.nonzero(keep)
+        won = chips[rows, cols]
+        g = idx[rows]
+        cap = color[rows]
+        to_supply = won == cap
+        np.add.at(self.supply, (g[to_supply], cap[to_supply]), 1)
+        np.add.at(self.pris, (g[~to_supply], cap[~to_supply], won[~to_supply]), 1)
+        self._remove_piles(idx, slot)
+        self.current[idx] = color
+        self.phase[idx] = PLAY
+        self._settle(idx)
+
+    def _determine_next(self, idx, slot, rng):
+        chips = self.piles[idx, slot].astype(np.int64)
+        height = self.plen[idx, slot].astype(np.int64)
+        present = np.zeros((len(idx), 4), dtype=bool)
+        rows, cols = np.nonzero(np.arange(chips.shape[1])[None, :] < height[:, None])
+        present[rows, chips[rows, cols]] = True
+        missing = ~present
+        n_missing = missing.sum(axis=1)
+        valid = missing & self.alive[idx]
+        n_valid = valid.sum(axis=1)
+
+        target = np.empty(len(idx), dtype=np.int64)
+        all_present = n_missing == 0
+        target[all_present] = chips[all_present, 0]
+        one_missing = n_missing == 1
+        target[one_missing] = np.argmax(missing[one_missing], axis=1)
+        choose = ~all_present & ~one_missing
+        chosen = np.where(n_valid > 0, self._random_choice(rng, valid), 0)
+        # No valid seat: deepest chip whose owner is alive
+        in_pile = np.arange(chips.shape[1])[None, :] < height[:, None]
+        owner_alive = self.alive[idx[:, None], np.maximum(chips, 0)] & in_pile
+        deepest_alive = np.argmax(owner_alive, axis=1)
+        fallback = chips[np.arange(len(idx)), deepest_alive]
+        target[choose] = np.where(n_valid[choose] > 0, chosen[choose], fallback[choose])
+        self._set_next(idx, target)
+
+    def _donate(self, idx, rng):
+        donor = self.donor[idx].astype(np.int64)
+        req = self.current[idx].astype(np.int64)
+        accept = rng.random(len(idx)) < 0.5
+        self.asked[idx, donor] = True
+        if accept.any():
+            a, d, r = idx[accept], donor[accept], req[accept]
+            color = self._random_choice(rng, self.pris[a, d] > 0)
+            self.pris[a, d, color] -= 1
+            own = color == r
+            self.supply[a[own], r[own]] += 1
+            self.pris[a[~own], r[~own], color[~own]] += 1
+            self.donor[a] = -1
+            self.phase[a] = PLAY
+        refuse = idx[~accept]
+        if len(refuse):
+            self._ask_next(refuse)
+
+    def run(self, rng, max_steps=10_000):
+        """Play every game to the end. Returns the winner per game (-1 if cut off)."""
+        for _ in range(max_steps):
+            playing = np.flatnonzero(self.phase == PLAY)
+            donating = np.flatnonzero(self.phase == DONATION)
+            if not len(playing) and not len(donating):
+                break
+            if len(playing):
+                self._play(playing, rng)
+            if len(donating):
+                self._donate(donating[self.phase[donating] == DONATION], rng)
+        return self.winner
+
+
+def playout_values(pos, n, rng):
+    """Mean payoff vector over n random playouts from pos."""
+    winners = Batch(pos, n).run(rng)
+    counts = np.bincount(winners[winners >= 0], minlength=4)
+    return counts / max(n, 1)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Color-Permutation Canonicalization
+Maps positions and moves to a canonical, seat-relative labelling so that the
+same situation seen from different seats pools into one entry.
+
+A relabelling is a permutation `perm` with perm[old color] = new color, applied
+to every field of a rules.py position (supplies, prisoners, alive seats, pile
+chips, current player, selected chip, donor...). The canonical form puts the
+player to move at color 0 (red) and orders the other three colors by whichever
+of the 6 remaining permutations gives the smallest position tuple. The
+permutation is returned with the canonical position so results can be mapped
+back with inverse().
+
+The chip and capture rules are symmetric under relabelling, but seat order is
+not: donation asks seats clockwise, setNextPlayer skips dead seats clockwise,
+and an elimination hands the turn to the lowest alive seat. Pooled entries are
+therefore an approximation - good for frequency tables, per-situation
+statistics and Monte Carlo caches, not for the exact solver (which keeps its
+own uncanonicalized table).
+
+    python canonical.py stats ../data_v2 talking.json    # raw vs pooled position counts
+    python canonical.py book ../data_v2 talking.json --top 10
+"""
+
+import argparse
+from collections import Counter, defaultdict
+from itertools import permutations
+
+import rules as R
+from corpus import find_session_files, load_session
+from zobrist import describe_position, hash_hex, hash_position
+
+IDENTITY = (0, 1, 2, 3)
+PERMUTATIONS = list(permutations(range(4)))
+
+
+def inverse(perm):
+    inv = [0] * 4
+    for old, new in enumerate(perm):
+        inv[new] = old
+    return tuple(inv)
+
+
+def compose(first, then):
+    """Permutation applying `first`, then `then`."""
+    return tuple(then[first[c]] for c in range(4))
+
+
+def _relabel_bits(bits, perm):
+    out = 0
+    for c in range(4):
+        if bits >> c & 1:
+            out |= 1 << perm[c]
+    return out
+
+
+def relabel(pos, perm):
+    """The position with every color/seat c renamed to perm[c]."""
+    if perm == IDENTITY:
+        return pos
+    supply = [0] * 4
+    prisoners = [()] * 4
+    for p in range(4):
+        supply[perm[p]] = pos[R.SUPPLY][p]
+        prisoners[perm[p]] = tuple(sorted(perm[c] for c in pos[R.PRISONERS][p]))
+    piles = tuple(sorted(tuple(perm[c] for c in pile) for pile in pos[R.PILES]))
+    pending = pos[R.PENDING]
+    return (
+        tuple(supply),
+        tuple(prisoners),
+        _relabel_bits(pos[R.ALIVE], perm),
+        piles,
+        perm[pos[R.CURRENT]],
+        pos[R.PHASE],
+        perm[pos[R.SELECTED]] if pos[R.SELECTED] >= 0 else -1,
+        None if pending is None else tuple(perm[c] for c in pending),
+        perm[pos[R.DONOR]] if pos[R.DONOR] >= 0 else -1,
+        _relabel_bits(pos[R.ASKED], perm),
+        perm[pos[R.WINNER]] if pos[R.WINNER] >= 0 else -1,
+    )
+
+
+def relabel_move(move, perm):
+    tool, arg = move
+    if arg is None:
+        return move
+    if tool == 'selectPile':
+        return (tool, tuple(perm[c] for c in arg))
+    return (tool, perm[arg])
+
+
+def relabel_value(value, perm):
+    """Payoff vector indexed by player, renamed like the position."""
+    out = [0.0] * 4
+    for p in range(4):
+        out[perm[p]] = value[p]
+    return tuple(out)
+
+
+def _order_key(pos):
+    # PENDING is None outside selectNextPlayer/capture; tuples and None don't compare
+    return pos[:R.PENDING] + (pos[R.PENDING] or (),) + pos[R.PENDING + 1:]
+
+
+def _candidates(pos):
+    """Permutations sending the player to move to 0 (all 24 once the game is over)."""
+    if R.is_terminal(pos):
+        return PERMUTATIONS
+    me = R.mover(pos)
+    return [perm for perm in PERMUTATIONS if perm[me] == 0]
+
+
+def canonicalize(pos):
+    """(canonical position, perm) with canonical == relabel(pos, perm)."""
+    best, best_key, best_perm = None, None, None
+    for perm in _candidates(pos):
+        cand = relabel(pos, perm)
+        key = _order_key(cand)
+        if best_key is None or key < best_key:
+            best, best_key, best_perm = cand, key, perm
+    return best, best_perm
+
+
+def canonical_decision(pos, move):
+    """(canonical position, canonical move, perm) for one recorded decision."""
+    canon, perm = canonicalize(pos)
+    return canon, relabel_move(move, perm), perm
+
+
+def canonical_hash(pos):
+    """(Zobrist hash of the canonical position, perm)."""
+    canon, perm = canonicalize(pos)
+    return hash_position(canon), perm
+
+
+# =============================================================================
+# POOLING REPORT
+# =============================================================================
+
+def collect(paths=None):
+    """Per-decision (raw hash, canonical hash, canonical position, canonical move, model)."""
+    rows = []
+    for path in find_session_files(paths):
+        data = load_session(path)
+        if data is None:
+            continue
+        for rec in R.replay_decisions(data):
+            canon, move, _ = canonical_decision(rec['position'], rec['move'])
+            rows.append((hash_position(rec['position']), hash_position(canon), canon, move,
+                         rec['model'] or rec['player']))
+    return rows
+
+
+def print_section(title):
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pool positions across color permutations.')
+    parser.add_argument('command', choices=['stats', 'book'])
+    parser.add_argument('paths', nargs='*', help='Session files or directories')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    rows = collect(args.paths or None)
+    if not rows:
+        print("No replayable decisions found.")
+        return
+    raw = Counter(r[0] for r in rows)
+    pooled = Counter(r[1] for r in rows)
+
+    if args.command == 'stats':
+        print_section('COLOR-PERMUTATION POOLING')
+        print(f"  Decisions:                   {len(rows)}")
+        print(f"  Distinct positions (raw):    {len(raw)}")
+        print(f"  Distinct positions (pooled): {len(pooled)} ({len(pooled) / len(raw):.1%} of raw)")
+        for label, counts in (('raw', raw), ('pooled', pooled)):
+            repeated = sum(n for n in counts.values() if n > 1)
+            print(f"  Decisions at a repeated position ({label}): {repeated} ({repeated / len(rows):.1%})")
+        return
+
+    # Book: pooled positions, moves shown in canonical colors (red = player to move)
+    positions = {}
+    moves = defaultdict(lambda: defaultdict(Counter))
+    for _, h, canon, move, model in rows:
+        positions.setdefault(h, canon)
+        moves[h][model][R.describe_move(move)] += 1
+    print_section(f"POOLED BOOK (top {args.top}; red = player to move)")
+    for h, n in pooled.most_common(args.top):
+        if n < 2:
+            break
+        print(f"\n  {hash_hex(h)}  x{n}  {describe_position(positions[h])}")
+        for model, played in sorted(moves[h].items()):
+            print(f"    {model:<18} " + ', '.join(f"{a} x{k}" for a, k in played.most_common(3)))
+
+
+if __name__ == '__main__':
+    main()
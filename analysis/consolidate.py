@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Corpus Consolidation
+Packs many small session files (the Phase 2 browser sessions are one game per
+file, all recorded as game 0) into a few large partitions with globally unique
+game IDs and an index, so corpus-wide passes become sequential reads.
+
+- overlapping saves of the same game are merged first (dedup.py)
+- each game gets a global ID "<run>-g<game>", written into every snapshot's
+  `game` field, so games from different files never collide
+- partitions are NDJSON, one game per line:
+      {"gid", "run", "source", "session": {...}, "snapshots": [...]}
+  rolled over at --part-mb megabytes
+- index.json maps gid -> [partition, byte offset, length] plus a per-game
+  summary (source, chips, winner, seat types and models) for lookups that need
+  no snapshots at all
+
+    python consolidate.py build ../data_v2 phase2_exports/ --out cache/consolidated
+    python consolidate.py vs-human                     # Phase 2 win rates by model
+"""
+
+import argparse
+import json
+import os
+from collections import defaultdict
+from pathlib import Path
+
+from corpus import COLORS, HUMAN, game_models, human_seats
+from dedup import split_games, unique_sessions
+
+DEFAULT_DIR = Path(__file__).parent / 'cache' / 'consolidated'
+INDEX_FILE = 'index.json'
+
+
+def game_id(run, game):
+    return f'{run}-g{game}'
+
+
+def seat_info(session, snapshots):
+    """Per-color {'type', 'model'}, resolved like the other tools (corpus.human_seats / game_models)."""
+    start = next((s for s in snapshots if s.get('type') == 'game_start'), {})
+    human = human_seats(start, session)
+    models = game_models(start, session)
+    return {c: {'type': HUMAN if h else 'ai', 'model': m} for c, h, m in zip(COLORS, human, models)}
+
+
+def game_summary(session, snapshots):
+    end = next((s for s in reversed(snapshots) if s.get('type') == 'game_end'), None)
+    return {
+        'source': session.get('source', 'cli'),
+        'chips': session.get('chips'),
+        'winner': end.get('winner') if end else None,
+        'turns': end.get('turns') if end else None,
+        'complete': end is not None,
+        'seats': seat_info(session, snapshots),
+    }
+
+
+class PartitionWriter:
+    """Appends one JSON line per game, starting a new partition past `part_bytes`."""
+
+    def __init__(self, out_dir, part_bytes):
+        self.out_dir = Path(out_dir)
+        self.part_bytes = part_bytes
+        self.part = -1
+        self.f = None
+        self.index = {}
+
+    def _roll(self):
+        if self.f:
+            self.f.close()
+        self.part += 1
+        self.f = open(self.out_dir / f'part-{self.part:05d}.ndjson', 'wb')
+
+    def write(self, gid, record, summary):
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode()
+        if self.f is None or (self.f.tell() and self.f.tell() + len(line) > self.part_bytes):
+            self._roll()
+        offset = self.f.tell()
+        self.f.write(line)
+        self.index[gid] = [self.part, offset, len(line), summary]
+
+    def close(self):
+        if self.f:
+            self.f.close()
+
+
+def build(paths=None, out_dir=DEFAULT_DIR, part_mb=64):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for old in out_dir.glob('part-*.ndjson'):
+        old.unlink()
+    writer = PartitionWriter(out_dir, part_mb * 1024 * 1024)
+    for data in unique_sessions(paths):
+        session = data['session']
+        run = session['dedupRun']
+        for game, snapshots in split_games(data).items():
+            gid = game_id(run, game)
+            record = {
+                'gid': gid,
+                'run': run,
+                'source': session.get('source', 'cli'),
+                'session': session,
+                'snapshots': [{**s, 'game': gid} for s in snapshots],
+            }
+            writer.write(gid, record, game_summary(session, snapshots))
+    writer.close()
+    index = {'partitions': writer.part + 1, 'games': writer.index}
+    tmp = out_dir / (INDEX_FILE + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(index, f)
+    os.replace(tmp, out_dir / INDEX_FILE)
+    return index
+
+
+def load_index(out_dir=DEFAULT_DIR):
+    with open(Path(out_dir) / INDEX_FILE) as f:
+        return json.load(f)
+
+
+def iter_games(out_dir=DEFAULT_DIR):
+    """Every consolidated game record, reading the partitions front to back."""
+    for part in sorted(Path(out_dir).glob('part-*.ndjson')):
+        with open(part, 'rb') as f:
+            for line in f:
+                yield json.loads(line)
+
+
+def load_game(gid, out_dir=DEFAULT_DIR, index=None):
+    """One game by global ID (a single seek + read)."""
+    index = index or load_index(out_dir)
+    part, offset, length, _ = index['games'][gid]
+    with open(Path(out_dir) / f'part-{part:05d}.ndjson', 'rb') as f:
+        f.seek(offset)
+        return json.loads(f.read(length))
+
+
+def as_session(records):
+    """Concatenate game records into a session dict the other analyses accept."""
+    return {'session': {}, 'snapshots': [s for r in records for s in r['snapshots']]}
+
+
+def vs_human_win_rates(out_dir=DEFAULT_DIR):
+    """
+    Win rate of each AI model in games with at least one human seat, and of the
+    humans themselves. Only the index is read: seats and winners are in the
+    per-game summaries.
+    """
+    played = defaultdict(int)
+    wins = defaultdict(int)
+    for summary in (entry[3] for entry in load_index(out_dir)['games'].values()):
+        seats = summary['seats']
+        if not summary['complete'] or not any(s['type'] == HUMAN for s in seats.values()):
+            continue
+        for color, seat in seats.items():
+            who = seat['model']
+            played[who] += 1
+            wins[who] += summary['winner'] == color
+    return {who: (wins[who], n) for who, n in played.items()}
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def print_section(title):
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Consolidate session files into indexed partitions.')
+    parser.add_argument('command', choices=['build', 'vs-human'])
+    parser.add_argument('paths', nargs='*', help='Session files or directories (build)')
+    parser.add_argument('--out', default=DEFAULT_DIR, help='Partition directory')
+    parser.add_argument('--part-mb', type=int, default=64, help='Partition size in MB')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        index = build(args.paths or None, args.out, args.part_mb)
+        by_source = defaultdict(int)
+        for entry in index['games'].values():
+            by_source[entry[3]['source']] += 1
+        print_section('CONSOLIDATED CORPUS')
+        print(f"  {len(index['games'])} games in {index['partitions']} partitions -> {args.out}")
+        for source, n in sorted(by_source.items()):
+            print(f"    {source:<10} {n}")
+        return
+
+    rates = vs_human_win_rates(args.out)
+    print_section('PHASE 2: WIN RATE VS HUMANS')
+    if not rates:
+        print("  No completed games with a human seat.")
+        return
+    print(f"\n  {'Player':<24} {'Games':>7} {'Wins':>6} {'Win rate':>9}")
+    print(f"  {'-'*50}")
+    for who, (w, n) in sorted(rates.items(), key=lambda kv: -kv[1][1]):
+        print(f"  {who:<24} {n:>7} {w:>6} {w / n:>8.1%}")
+
+
+if __name__ == '__main__':
+    main()
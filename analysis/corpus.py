@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Corpus Access
+Shared helpers for walking every recorded session file (CLI and browser exports).
+
+A session file is the JSON written by SimulatorTUI.saveResults or by the browser
+GameDataCollector: {"session": {...}, "snapshots": [...]}, or the append-only
+NDJSON log written by `cli/index.js --stream` (a session header line, one line
+per snapshot, a session_end footer). Both load into the same dict. The helpers here find
+those files, load them, and flatten their think/sendChat tool calls into message
+records so the corpus-wide tools (index, embeddings, n-grams) share one reader.
+"""
+
+import json
+from pathlib import Path
+
+from lying_vs_bullshitting import MODELS
+
+COLORS = ['red', 'blue', 'green', 'yellow']
+HUMAN = 'human'
+
+# Text-bearing tools and the argument that holds their text
+TEXT_TOOLS = {
+    'sendChat': 'message',
+    'think': 'thought',
+}
+
+DEFAULT_PATHS = [
+    Path(__file__).parent / 'talking.json',
+    Path(__file__).parent / 'silent.json',
+    Path(__file__).parent.parent / 'data_v2',
+]
+
+
+def find_session_files(paths=None):
+    """Expand files and directories into a sorted list of session files."""
+    files = []
+    for p in (paths or DEFAULT_PATHS):
+        p = Path(p)
+        if p.is_dir():
+            files.extend(sorted(p.rglob('*.json')) + sorted(p.rglob('*.ndjson')))
+        elif p.is_file():
+            files.append(p)
+    seen = set()
+    unique = []
+    for f in files:
+        key = f.resolve()
+        if key not in seen:
+            seen.add(key)
+            unique.append(f)
+    return unique
+
+
+def parse_ndjson_lines(lines):
+    """
+    Assemble NDJSON log lines into a session dict. Snapshots from parallel games
+    interleave in the log; they are regrouped by game (stable within a game) to
+    match the JSON layout. A truncated last line from a live writer is ignored.
+    """
+    session = {}
+    snapshots = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        kind = record.get('type')
+        if kind in ('session', 'session_end'):
+            session.update(record.get('session') or {})
+        else:
+            snapshots.append(record)
+    order = {}
+    for snap in snapshots:
+        order.setdefault(snap.get('game'), len(order))
+    snapshots.sort(key=lambda snap: order[snap.get('game')])
+    return {'session': session, 'snapshots': snapshots}
+
+
+def load_session(path):
+    """Load one session file (JSON or NDJSON). Returns None for JSON that is not a session."""
+    if str(path).endswith('.ndjson'):
+        with open(path) as f:
+            return parse_ndjson_lines(f)
+    with open(path) as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or 'snapshots' not in data:
+        return None
+    return data
+
+
+def session_id(data, path=None):
+    """Stable identifier for a session: its recorded id, else the file stem."""
+    sid = (data.get('session') or {}).get('id')
+    if sid:
+        return sid
+    return Path(path).stem if path else 'unknown'
+
+
+def iter_game_snapshots(data):
+    """Yield (game, snapshot) pairs, tracking the current game like the analyses do."""
+    current_game = None
+    for snap in data['snapshots']:
+        if snap['type'] == 'game_start':
+            current_game = snap.get('game', current_game)
+        game = snap.get('game', current_game)
+        yield game, snap
+
+
+def game_summaries(data):
+    """Per-game winner and final turn count from game_end snapshots."""
+    games = {}
+    for game, snap in iter_game_snapshots(data):
+        if snap['type'] == 'game_end':
+            games[game] = {
+                'winner': snap.get('winner'),
+                'turns': snap.get('turns', 0),
+            }
+    return games
+
+
+def human_seats(start_snap, session=None):
+    """Per color: was the seat human (browser game_start players[].type, else session playerTypes)?"""
+    types = dict((session or {}).get('playerTypes') or {})
+    types.update((p.get('player'), p.get('type')) for p in start_snap.get('players') or [])
+    return [types.get(c) == 'human' for c in COLORS]
+
+
+def game_models(start_snap, session):
+    """
+    Model per color: game_start (CLI 'models' / browser 'players'), else
+    session, else default. Human seats are HUMAN.
+    """
+    models = dict(MODELS)
+    models.update((session.get('playerModels') or {}))
+    for entry in start_snap.get('models') or start_snap.get('players') or []:
+        color = entry.get('player')
+        if color in models and entry.get('model'):
+            models[color] = entry['model']
+    human = human_seats(start_snap, session)
+    return [HUMAN if h else models[c] for c, h in zip(COLORS, human)]
+
+
+def iter_messages(data, sid=None):
+    """
+    Yield every think/sendChat text in a session as a flat record:
+    {'session', 'game', 'turn', 'player', 'model', 'tool', 'text'}, where model
+    is the seat's model in that game (game_models).
+    """
+    session = data.get('session') or {}
+    models = {}
+    for game, snap in iter_game_snapshots(data):
+        if snap['type'] == 'game_start':
+            models[game] = dict(zip(COLORS, game_models(snap, session)))
+            continue
+        if snap['type'] not in ('decision', 'off_turn') or not snap.get('llmResponse'):
+            continue
+        player = snap.get('player')
+        if not player:
+            continue
+        turn = snap.get('turn', 0)
+        if game not in models:
+            models[game] = dict(zip(COLORS, game_models({}, session)))
+        model = models[game].get(player, player)
+        for tc in snap['llmResponse'].get('toolCalls') or []:
+            arg = TEXT_TOOLS.get(tc.get('name'))
+            if not arg:
+                continue
+            args = tc.get('arguments') or {}
+            text = args.get(arg, '') if isinstance(args, dict) else ''
+            if text:
+                yield {
+                    'session': sid,
+                    'game': game,
+                    'turn': turn,
+                    'player': player,
+                    'model': model,
+                    'tool': tc['name'],
+                    'text': text,
+                }
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Session Deduplication
+Merges the partial and complete copies of a game that mid-session saves leave
+behind: SimulatorTUI.saveResults writes the active games' snapshots along with
+the finished ones, and the browser GameDataCollector saves at 25/50/75% of the
+chips played and again at the end.
+
+A game is identified by its run and game number. The run key is the session's
+startTime, which stays fixed across every save of one run (the CLI's session id
+does not). Each snapshot is keyed by a hash of (run, game, type, turn, player,
+timestamp), and each copy of a game by the chain of running hashes over its
+snapshots, so "copy A is a prefix of copy B" is one comparison of A's final
+chain hash against B's chain at the same length.
+
+Files are scanned one at a time; only the chain of the longest copy per game
+is held in memory. Copies that are prefixes of it are dropped; a copy that
+diverges from it (a different game under the same key) is kept separately and
+reported as a conflict. In the merged output a conflicting copy gets the next
+free game number of its run, and its snapshots carry dedupCopyOf: {game,
+copy} with the original number and copy index.
+
+    python dedup.py scan ../data_v2 talking.json          # report duplicates
+    python dedup.py write ../data_v2 --out cache/deduped   # one merged file per run
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from collections import defaultdict
+from pathlib import Path
+
+from corpus import find_session_files, iter_game_snapshots, load_session
+
+DEFAULT_OUT = Path(__file__).parent / 'cache' / 'deduped'
+
+
+def run_key(data, path=None):
+    """Key shared by every save of one run: startTime, else the session id, else the file."""
+    session = data.get('session') or {}
+    if session.get('startTime') is not None:
+        return f"t{session['startTime']}"
+    return session.get('id') or Path(path).stem
+
+
+def snapshot_key(run, game, snap):
+    raw = json.dumps([run, game, snap.get('type'), snap.get('turn'), snap.get('player'),
+                      snap.get('timestamp')], separators=(',', ':'))
+    return hashlib.blake2b(raw.encode(), digest_size=8).digest()
+
+
+def chain(run, game, snapshots):
+    """Running hashes: chain[i] covers snapshots[:i + 1]."""
+    out = []
+    h = b''
+    for snap in snapshots:
+        h = hashlib.blake2b(h + snapshot_key(run, game, snap), digest_size=8).digest()
+        out.append(h)
+    return out
+
+
+def split_games(data):
+    """{game: [snapshots]} in recorded order."""
+    games = defaultdict(list)
+    for game, snap in iter_game_snapshots(data):
+        games[game].append(snap)
+    return games
+
+
+class Deduplicator:
+    """
+    Streaming merge of game copies. After scan(), `best[(run, game)]` lists
+    the copies to keep as (path, chain) - normally one - and `dropped` counts
+    prefix copies discarded.
+    """
+
+    def __init__(self):
+        self.best = defaultdict(list)
+        self.sessions = {}
+        self.files = 0
+        self.copies = 0
+        self.dropped = 0
+        self.conflicts = 0
+
+    def add(self, path, data):
+        run = run_key(data, path)
+        session = data.get('session') or {}
+        # Keep the metadata of the latest save of the run
+        if session.get('endTime', 0) >= (self.sessions.get(run) or {}).get('endTime', 0):
+            self.sessions[run] = session
+        for game, snapshots in split_games(data).items():
+            self.copies += 1
+            self._merge((run, game), path, chain(run, game, snapshots))
+
+    def _merge(self, key, path, new):
+        kept = self.best[key]
+        for i, (old_path, old) in enumerate(kept):
+            short, long_ = (new, old) if len(new) <= len(old) else (old, new)
+            if not short or long_[len(short) - 1] == short[-1]:
+                self.dropped += 1
+                if long_ is new:
+                    kept[i] = (path, new)
+                return
+        if kept:
+            self.conflicts += 1
+        kept.append((path, new))
+
+    def scan(self, paths=None):
+        for path in find_session_files(paths):
+            data = load_session(path)
+            if data is None:
+                continue
+            self.files += 1
+            self.add(path, data)
+        return self
+
+    def merged_sessions(self):
+        """
+        Yield (run, session dict) with each game's kept copy, reading each
+        source file once per run rather than holding the corpus in memory.
+        """
+        by_run = defaultdict(lambda: defaultdict(list))   # run -> path -> [(game, copy index, length)]
+        for (run, game), kept in self.best.items():
+            for i, (path, ch) in enumerate(kept):
+                by_run[run][path].append((game, i, len(ch)))
+        for run, files in by_run.items():
+            games, conflicts = [], []
+            for path, wanted in files.items():
+                data = load_session(path)
+                copies = split_games(data)
+                for game, i, length in wanted:
+                    (conflicts if i else games).append((game, i, copies[game][:length]))
+            # A conflicting copy takes the next free game number of its run and
+            # records where it came from, so game ids stay ints for the tables
+            numbers = [g for g, _, _ in games + conflicts if isinstance(g, int)]
+            free = max(numbers, default=-1) + 1
+            for game, i, snapshots in sorted(conflicts, key=lambda c: (str(c[0]), c[1])):
+                origin = {'game': game, 'copy': i}
+                games.append((free, 0, [{**snap, 'game': free, 'dedupCopyOf': origin} for snap in snapshots]))
+                free += 1
+            games.sort(key=lambda g: (g[0] is not None, g[0] if isinstance(g[0], int) else -1))
+            yield run, {
+                'session': dict(self.sessions.get(run) or {}, dedupRun=run),
+                'snapshots': [s for _, _, snaps in games for s in snaps],
+            }
+
+
+def unique_sessions(paths=None):
+    """Deduplicated sessions for analyses: one dict per run."""
+    for _, data in Deduplicator().scan(paths).merged_sessions():
+        yield data
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def print_section(title):
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Deduplicate overlapping session saves.')
+    parser.add_argument('command', choices=['scan', 'write'])
+    parser.add_argument('paths', nargs='*', help='Session files or directories')
+    parser.add_argument('--out', default=DEFAULT_OUT, help='Output directory (write)')
+    args = parser.parse_args()
+
+    dedup = Deduplicator().scan(args.paths or None)
+    kept = sum(len(v) for v in dedup.best.values())
+    print_section('SESSION DEDUPLICATION')
+    print(f"  Files scanned:        {dedup.files}")
+    print(f"  Runs:                 {len(dedup.sessions)}")
+    print(f"  Game copies:          {dedup.copies}")
+    print(f"  Prefix copies merged: {dedup.dropped}")
+    print(f"  Conflicting copies:   {dedup.conflicts}")
+    print(f"  Games kept:           {kept}")
+    if args.command == 'scan':
+        return
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for run, data in dedup.merged_sessions():
+        target = out / f'session-{run}.json'
+        tmp = target.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, target)
+        written += 1
+    print(f"\n  Wrote {written} session files to {out}")
+
+
+if __name__ == '__main__':
+    main()
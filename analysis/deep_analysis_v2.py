@@ -11,6 +11,8 @@ import re
 from collections import defaultdict
 from pathlib import Path
 
+from records import Message
+
 MODELS = {
     'red': 'gemini-3-flash',
     'blue': 'kimi-k2',
@@ -54,22 +56,14 @@ def extract_messages_with_context(data):
             for tc in snap['llmResponse'].get('toolCalls') or []:
                 if tc['name'] == 'sendChat':
                     msg = tc.get('arguments', {}).get('message', '')
-                    messages.append({
-                        'game': current_game,
-                        'player': player,
-                        'turn': turn,
-                        'message': msg,
-                        'max_turn': game_turns.get(current_game, turn)
-                    })
-    
-    # Update max_turn for all messages
+                    messages.append(Message(current_game, player, turn, turn, msg))
+    
+    # Update max_turn and phase for all messages
     for msg in messages:
-        msg['max_turn'] = game_turns.get(msg['game'], msg['turn'])
-        if msg['max_turn'] > 0:
-            msg['game_phase'] = 'early' if msg['turn'] <= msg['max_turn'] * 0.33 else \
-                               'mid' if msg['turn'] <= msg['max_turn'] * 0.66 else 'late'
-        else:
-            msg['game_phase'] = 'unknown'
+        msg.max_turn = game_turns.get(msg.game, msg.turn)
+        if msg.max_turn > 0:
+            msg.phase = 'early' if msg.turn <= msg.max_turn * 0.33 else \
+                        'mid' if msg.turn <= msg.max_turn * 0.66 else 'late'
     
     return messages
 
@@ -118,7 +112,7 @@ def analyze_betrayal_messages(messages):
     print(f"\n  TOP BETRAYAL MESSAGES:\n")
     
     # Sort by game phase - late game betrayals are most interesting
-    late_betrayals = [m for m in betrayal_msgs if m.get('game_phase') == 'late']
+    late_betrayals = [m for m in betrayal_msgs if m['phase'] == 'late']
     
     shown = set()
     count = 0
@@ -126,7 +120,7 @@ def analyze_betrayal_messages(messages):
         if msg['message'] not in shown and count < 5:
             shown.add(msg['message'])
             player = MODELS[msg['player']]
-            phase = msg['game_phase']
+            phase = msg['phase']
             text = msg['message'][:100]
             print(f"  [{phase.upper()}] {player}:")
             print(f"    \"{text}...\"")
@@ -147,7 +141,7 @@ def analyze_message_timing(messages, winners):
     
     for msg in messages:
         player = msg['player']
-        phase = msg.get('game_phase', 'unknown')
+        phase = msg['phase']
         if player and phase in ['early', 'mid', 'late']:
             phase_counts[player][phase] += 1
             
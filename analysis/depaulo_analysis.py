@@ -1,4 +1,4 @@
-2. Add visualizations for the new sections (alliance network graph, correlation heatmap)#!/usr/bin/env python3
+#!/usr/bin/env python3
 """
 So Long Sucker - DePaulo Pre-Betrayal Linguistic Analysis
 
@@ -24,6 +24,11 @@ from pathlib import Path
 from typing import List, Dict, Tuple
 import statistics
 
+import numpy as np
+
+from event_study import window_index
+from records import MarkedMessage, annotated
+
 MODELS = {
     'red': 'gemini-3-flash',
     'blue': 'kimi-k2',
@@ -44,6 +49,10 @@ POSITIVE_EMOTION = ['happy', 'glad', 'great', 'wonderful', 'excellent', 'love',
 ALLIANCE_WORDS = ['alliance', 'ally', 'partner', 'team', 'together', 'cooperate', 'work with', 'join', 'deal', 'trust', 'help', 'support', 'coordinate', 'agree', 'promise', 'friend']
 
 
+# A betrayer's message seen from one betrayal (wraps the message, no copy)
+PreBetrayalMessage = annotated('PreBetrayalMessage', 'turns_before_betrayal', 'betrayal_victim')
+
+
 def load_data():
     """Load talking mode data."""
     base = Path(__file__).parent
@@ -114,13 +123,7 @@ def extract_all_events(data):
                     if msg:
                         analysis = analyze_message(msg)
                         if analysis:
-                            messages.append({
-                                'game': current_game,
-                                'player': player,
-                                'turn': turn,
-                                'message': msg,
-                                **analysis
-                            })
+                            messages.append(MarkedMessage(current_game, player, turn, msg, analysis))
                             
                             # Check for alliance mentions
                             msg_lower = msg.lower()
@@ -176,50 +179,41 @@ def find_betrayals(messages, kills, alliances) -> List[Dict]:
     return betrayals
 
 
+def _betrayer_windows(messages, betrayals, lo, hi):
+    """
+    (message index, betrayal index, offset) for every betrayer message with
+    msg turn - kill turn in [lo, hi], via event_study.window_index.
+    """
+    keys = {}
+    msg_key = np.array([keys.setdefault((m['game'], m['player']), len(keys)) for m in messages], dtype=np.int64)
+    msg_turn = np.array([m['turn'] for m in messages], dtype=np.int64)
+    ev_key = np.array([keys.get((b['game'], b['betrayer']), -1) for b in betrayals], dtype=np.int64)
+    ev_turn = np.array([b['kill_turn'] for b in betrayals], dtype=np.int64)
+    return window_index(msg_key, msg_turn, ev_key, ev_turn, lo, hi)
+
+
 def get_pre_betrayal_messages(messages, betrayals, window=5) -> List[Dict]:
     """
     Get messages from the betrayer in the N turns BEFORE the betrayal.
     """
-    pre_betrayal = []
-    
-    for b in betrayals:
-        game = b['game']
-        betrayer = b['betrayer']
-        kill_turn = b['kill_turn']
-        
-        # Get messages from betrayer in the window before kill
-        for msg in messages:
-            if (msg['game'] == game and 
-                msg['player'] == betrayer and 
-                kill_turn - window <= msg['turn'] < kill_turn):
-                pre_betrayal.append({
-                    **msg,
-                    'turns_before_betrayal': kill_turn - msg['turn'],
-                    'betrayal_victim': b['victim']
-                })
-    
-    return pre_betrayal
+    if not messages or not betrayals:
+        return []
+    msg_idx, ev_idx, offset = _betrayer_windows(messages, betrayals, -window, -1)
+    return [PreBetrayalMessage(messages[i], -int(off), betrayals[e]['victim'])
+            for i, e, off in zip(msg_idx, ev_idx, offset)]
 
 
-def get_baseline_messages(messages, betrayals) -> List[Dict]:
+def get_baseline_messages(messages, betrayals, window=5) -> List[Dict]:
     """
-    Get baseline messages (not in pre-betrayal windows).
+    Get baseline messages: the betrayer's messages from the kill turn and the
+    N-1 turns before it are excluded, everything else is baseline.
     """
-    # Build set of (game, player, turn) that are pre-betrayal
-    pre_betrayal_keys = set()
-    window = 5
-    
-    for b in betrayals:
-        for turn_offset in range(window):
-            pre_betrayal_keys.add((b['game'], b['betrayer'], b['kill_turn'] - turn_offset))
-    
-    baseline = []
-    for msg in messages:
-        key = (msg['game'], msg['player'], msg['turn'])
-        if key not in pre_betrayal_keys:
-            baseline.append(msg)
-    
-    return baseline
+    if not betrayals:
+        return list(messages)
+    msg_idx, _, _ = _betrayer_windows(messages, betrayals, -(window - 1), 0)
+    excluded = np.zeros(len(messages), dtype=bool)
+    excluded[msg_idx] = True
+    return [m for m, skip in zip(messages, excluded) if not skip]
 
 
 def calculate_stats(messages: List[Dict], metric: str) -> Dict:
@@ -263,7 +257,7 @@ def print_section(title):
     print('='*80)
 
 
-def main():
+def main(window=5):
     print("\n" + "="*80)
     print("  DEPAULO PRE-BETRAYAL LINGUISTIC ANALYSIS")
     print("  Testing if LLM deception matches human deception patterns")
@@ -285,10 +279,10 @@ def main():
         return
     
     # Get pre-betrayal and baseline messages
-    pre_betrayal = get_pre_betrayal_messages(messages, betrayals, window=5)
-    baseline = get_baseline_messages(messages, betrayals)
+    pre_betrayal = get_pre_betrayal_messages(messages, betrayals, window=window)
+    baseline = get_baseline_messages(messages, betrayals, window=window)
     
-    print(f"  Pre-betrayal messages (5-turn window): {len(pre_betrayal)}")
+    print(f"  Pre-betrayal messages ({window}-turn window): {len(pre_betrayal)}")
     print(f"  Baseline messages: {len(baseline)}")
     
     # =========================================================================
@@ -380,7 +374,7 @@ def main():
     print(f"\n  Self-Reference Rate by Turns Before Betrayal:")
     print(f"  {'-'*50}")
     
-    for turns_before in range(5, 0, -1):
+    for turns_before in range(window, 0, -1):
         msgs_at_turn = [m for m in pre_betrayal if m['turns_before_betrayal'] == turns_before]
         if msgs_at_turn:
             avg_self = statistics.mean([m['self_rate'] for m in msgs_at_turn])
@@ -452,4 +446,7 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description='DePaulo pre-betrayal linguistic analysis.')
+    parser.add_argument('--window', type=int, default=5, help='Turns before each betrayal to analyze')
+    main(parser.parse_args().window)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Event Study
+Aligns per-message linguistic features around game events, DePaulo-style, for
+every event type at once:
+
+    kill              actor killed a chip of color `target`
+    betrayal          a kill of a color the actor earlier proposed an alliance to
+                      (depaulo_analysis.find_betrayals)
+    elimination       actor was eliminated
+    donation_refused  actor refused a donation to `target`
+    promise_broken    actor called breakPromise
+    trade_broken      actor called breakTrade
+
+The inputs are the two columnar tables event_table.py builds once per corpus:
+events (game, turn, actor, target, type) and messages (game, turn, player,
+feature matrix of the DePaulo markers, from every sendChat). Messages are
+sorted by (key, turn) and each event's window turns -k..+k is found with two
+searchsorted calls, so the aligned windows, per-offset means and CIs for all
+events come out of a handful of array operations.
+
+    python event_table.py ../data_v2 talking.json
+    python event_study.py --window 5
+    python event_study.py --events betrayal,kill --role target --features self_rate,word_count
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_TABLES = Path(__file__).parent / 'cache' / 'event_study.npz'
+EVENT_TYPES = ['kill', 'betrayal', 'elimination', 'donation_refused', 'promise_broken', 'trade_broken']
+FEATURES = ['word_count', 'self_rate', 'other_rate', 'certainty_rate', 'tentative_rate',
+            'certainty_tentative_ratio', 'exclusive', 'negative_emotion', 'positive_emotion']
+ROLES = ('actor', 'target', 'game')
+# Turns per (game, player) key in the sorted composite; games are far shorter
+TURN_STRIDE = 1 << 20
+
+
+# =============================================================================
+# TABLES (built by event_table.py)
+# =============================================================================
+
+def save_tables(tables, path=DEFAULT_TABLES):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, **tables)
+
+
+def load_tables(path=DEFAULT_TABLES):
+    with np.load(path) as z:
+        return {k: z[k] for k in z.files}
+
+
+# =============================================================================
+# ENGINE
+# =============================================================================
+
+def window_index(msg_key, msg_turn, ev_key, ev_turn, lo, hi):
+    """
+    All (message, event) pairs with equal keys and msg_turn - ev_turn in [lo, hi].
+
+    Returns (msg_idx, ev_idx, offset) arrays, grouped by event. Keys must be
+    non-negative; events with a negative key match nothing.
+    """
+    composite = msg_key * TURN_STRIDE + msg_turn
+    order = np.argsort(composite, kind='stable')
+    sorted_comp = composite[order]
+    valid = ev_key >= 0
+    start = np.where(valid, ev_key * TURN_STRIDE + np.maximum(ev_turn + lo, 0), -1)
+    stop = np.where(valid, ev_key * TURN_STRIDE + ev_turn + hi, -1)
+    left = np.searchsorted(sorted_comp, start, 'left')
+    right = np.searchsorted(sorted_comp, stop, 'right')
+    counts = np.maximum(right - left, 0)
+
+    ev_idx = np.repeat(np.arange(len(ev_key)), counts)
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    msg_idx = order[np.repeat(left, counts) + within]
+    return msg_idx, ev_idx, msg_turn[msg_idx] - ev_turn[ev_idx]
+
+
+def keys_for(tables, role):
+    """(message keys, event keys) for whose messages are aligned to each event."""
+    if role == 'game':
+        return tables['msg_game'], tables['ev_game']
+    who = tables['ev_actor'] if role == 'actor' else tables['ev_target']
+    ev_key = np.where(who >= 0, tables['ev_game'] * 4 + who, -1)
+    return tables['msg_game'] * 4 + tables['msg_player'], ev_key
+
+
+def _mean_ci(values, groups, size):
+    """Per-group mean and 95% normal CI half-width of each feature column."""
+    n = np.bincount(groups, minlength=size).astype(float)
+    total = np.stack([np.bincount(groups, values[:, j], size) for j in range(values.shape[1])], axis=1)
+    squares = np.stack([np.bincount(groups, values[:, j] ** 2, size) for j in range(values.shape[1])], axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / n[:, None]
+        var = (squares - n[:, None] * mean ** 2) / (n[:, None] - 1)
+        ci = 1.96 * np.sqrt(np.maximum(var, 0) / n[:, None])
+    return n, mean, ci
+
+
+def event_study(tables, event_type, k=5, role='actor'):
+    """
+    Aligned windows around every event of one type.
+
+    Returns {'offsets', 'n', 'mean', 'ci'} per offset -k..k (rows) x feature
+    (columns), 'events' and 'events_with_messages' counts, the baseline (messages
+    of the same keys outside every window) mean/ci/n, and Cohen's d of the lead-up
+    (offsets -k..-1) against the baseline per feature.
+    """
+    msg_key, ev_key = keys_for(tables, role)
+    mask = tables['ev_type'] == EVENT_TYPES.index(event_type)
+    features = tables['msg_features']
+    msg_idx, ev_idx, offset = window_index(msg_key, tables['msg_turn'], ev_key[mask], tables['ev_turn'][mask], -k, k)
+
+    n, mean, ci = _mean_ci(features[msg_idx], offset + k, 2 * k + 1)
+
+    in_window = np.zeros(len(msg_key), dtype=bool)
+    in_window[msg_idx] = True
+    baseline = features[~in_window & np.isin(msg_key, ev_key[mask])]
+    lead_up = features[msg_idx[offset < 0]]
+    d = np.full(features.shape[1], np.nan)
+    if len(lead_up) > 1 and len(baseline) > 1:
+        pooled = np.sqrt(((len(lead_up) - 1) * lead_up.var(axis=0, ddof=1) +
+                          (len(baseline) - 1) * baseline.var(axis=0, ddof=1)) / (len(lead_up) + len(baseline) - 2))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            d = (lead_up.mean(axis=0) - baseline.mean(axis=0)) / pooled
+    return {
+        'offsets': np.arange(-k, k + 1),
+        'n': n,
+        'mean': mean,
+        'ci': ci,
+        'events': int(mask.sum()),
+        'events_with_messages': len(np.unique(ev_idx)),
+        'baseline_n': len(baseline),
+        'baseline_mean': baseline.mean(axis=0) if len(baseline) else np.full(features.shape[1], np.nan),
+        'baseline_ci': 1.96 * baseline.std(axis=0, ddof=1) / np.sqrt(len(baseline)) if len(baseline) > 1
+                       else np.full(features.shape[1], np.nan),
+        'cohens_d': d,
+    }
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def print_section(title):
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Align message features around game events.')
+    parser.add_argument('--window', type=int, default=5, help='Turns before and after each event')
+    parser.add_argument('--role', choices=ROLES, default='actor',
+                        help="Whose messages: the event's actor, its target, or everyone in the game")
+    parser.add_argument('--events', default=','.join(EVENT_TYPES), help='Comma-separated event types')
+    parser.add_argument('--features', default='word_count,self_rate,tentative_rate,negative_emotion',
+                        help=f"Comma-separated features ({', '.join(FEATURES)})")
+    parser.add_argument('--tables', default=DEFAULT_TABLES, help='Tables written by event_table.py')
+    args = parser.parse_args()
+
+    tables = load_tables(args.tables)
+    columns = [FEATURES.index(f) for f in args.features.split(',')]
+    for event_type in args.events.split(','):
+        result = event_study(tables, event_type, args.window, args.role)
+        print_section(f"{event_type.upper()} ({result['events']} events, "
+                      f"{result['events_with_messages']} with {args.role} messages)")
+        if not result['n'].any():
+            print("  No messages in any window.")
+            continue
+        print(f"\n  {'Offset':>6} {'n':>6} " + ' '.join(f"{FEATURES[j]:>22}" for j in columns))
+        for row, offset in enumerate(result['offsets']):
+            cells = ' '.join(f"{result['mean'][row, j]:>12.2f} ± {result['ci'][row, j]:<7.2f}"
+                             if result['n'][row] else f"{'-':>22}" for j in columns)
+            print(f"  {offset:>+6} {int(result['n'][row]):>6} {cells}")
+        cells = ' '.join(f"{result['baseline_mean'][j]:>12.2f} ± {result['baseline_ci'][j]:<7.2f}" for j in columns)
+        print(f"  {'base':>6} {result['baseline_n']:>6} {cells}")
+        print(f"  {'d':>6} {'':>6} " + ' '.join(f"{result['cohens_d'][j]:>+22.2f}" for j in columns))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Event Table
+Builds the two columnar inputs of event_study.py in one pass over the corpus:
+
+    events    ev_game, ev_turn, ev_actor, ev_target (-1 = none), ev_type
+              (index into event_study.EVENT_TYPES)
+    messages  msg_game, msg_turn, msg_player, msg_features (N, F) with the
+              DePaulo markers of every sendChat, columns event_study.FEATURES
+
+Colors are COLORS indices; games are codes into `games` ("<session>:<game>").
+Kills, refused donations and broken promises/trades come from executed
+actions, betrayals from depaulo_analysis.find_betrayals, and eliminations
+from outcome_table.game_records.
+
+    python event_table.py ../data_v2 talking.json
+"""
+
+import argparse
+
+import numpy as np
+
+from corpus import COLORS, find_session_files, iter_messages, load_session, session_id
+from depaulo_analysis import analyze_message, extract_all_events, find_betrayals
+from event_study import DEFAULT_TABLES, EVENT_TYPES, FEATURES, save_tables
+from outcome_table import game_records
+
+
+def _color(value):
+    return COLORS.index(value) if value in COLORS else -1
+
+
+def executed_actions(snap):
+    """(tool, args) for every successfully executed action, else every tool call."""
+    if snap.get('execution'):
+        return [(e.get('tool'), e.get('args') or {}) for e in snap['execution'] if e.get('success')]
+    calls = (snap.get('llmResponse') or {}).get('toolCalls') or []
+    return [(tc.get('name'), tc.get('arguments') or {}) for tc in calls]
+
+
+def session_events(data, game_code):
+    """Event rows (game, turn, actor, target, type) for one session."""
+    rows = []
+    current = None
+    for snap in data['snapshots']:
+        if snap['type'] == 'game_start':
+            current = snap.get('game', current)
+        if snap['type'] not in ('decision', 'off_turn'):
+            continue
+        game = game_code(snap.get('game', current))
+        actor = _color(snap.get('player'))
+        turn = snap.get('turn', 0)
+        for tool, args in executed_actions(snap):
+            if not isinstance(args, dict):
+                continue
+            if tool == 'killChip':
+                rows.append((game, turn, actor, _color(args.get('color')), 'kill'))
+            elif tool == 'respondToDonation' and not args.get('accept'):
+                rows.append((game, turn, actor, _color(snap.get('donationRequester')), 'donation_refused'))
+            elif tool == 'breakPromise':
+                rows.append((game, turn, actor, -1, 'promise_broken'))
+            elif tool == 'breakTrade':
+                rows.append((game, turn, actor, -1, 'trade_broken'))
+
+    messages, kills, alliances, _ = extract_all_events(data)
+    for b in find_betrayals(messages, kills, alliances):
+        rows.append((game_code(b['game']), b['kill_turn'], _color(b['betrayer']), _color(b['victim']), 'betrayal'))
+    return rows
+
+
+def build_tables(paths=None):
+    """{'games', 'ev_*', 'msg_*'} arrays for every session (games are (session, game) labels)."""
+    games = {}
+    events, messages = [], []
+    for path in find_session_files(paths):
+        data = load_session(path)
+        if data is None:
+            continue
+        sid = session_id(data, path)
+        code = lambda game: games.setdefault(f'{sid}:{game}', len(games))
+
+        events.extend(session_events(data, code))
+        for rec in game_records(data, sid):
+            for i in np.flatnonzero(rec['eliminated'] & (rec['rank'] != 1)):
+                events.append((code(rec['game'] if rec['game'] != -1 else None), int(rec['elim_turn'][i]),
+                               int(i), -1, 'elimination'))
+        for msg in iter_messages(data, sid):
+            if msg['tool'] != 'sendChat':
+                continue
+            markers = analyze_message(msg['text'])
+            if markers:
+                messages.append((code(msg['game']), msg['turn'], _color(msg['player']),
+                                 [markers[f] for f in FEATURES]))
+
+    return {
+        'games': np.array(list(games), dtype=str),
+        'ev_game': np.array([e[0] for e in events], dtype=np.int64),
+        'ev_turn': np.array([e[1] for e in events], dtype=np.int64),
+        'ev_actor': np.array([e[2] for e in events], dtype=np.int8),
+        'ev_target': np.array([e[3] for e in events], dtype=np.int8),
+        'ev_type': np.array([EVENT_TYPES.index(e[4]) for e in events], dtype=np.int8),
+        'msg_game': np.array([m[0] for m in messages], dtype=np.int64),
+        'msg_turn': np.array([m[1] for m in messages], dtype=np.int64),
+        'msg_player': np.array([m[2] for m in messages], dtype=np.int8),
+        'msg_features': np.array([m[3] for m in messages], dtype=np.float64).reshape(-1, len(FEATURES)),
+    }
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the event and message tables for event_study.py.')
+    parser.add_argument('paths', nargs='*', help='Session files or directories')
+    parser.add_argument('--tables', default=DEFAULT_TABLES)
+    args = parser.parse_args()
+
+    tables = build_tables(args.paths or None)
+    save_tables(tables, args.tables)
+    counts = np.bincount(tables['ev_type'], minlength=len(EVENT_TYPES))
+    print(f"  {len(tables['games'])} games, {len(tables['msg_game'])} messages -> {args.tables}")
+    for name, count in zip(EVENT_TYPES, counts):
+        print(f"    {name:<18} {count}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Board State from Snapshots
+Recovers the board state at any recorded decision.
+
+game_start/game_end snapshots carry a full `state` (HeadlessGame.getStateSnapshot).
+Decision snapshots do not - to save space the state is only embedded in the
+prompt text built by AIAgent.buildUserPrompt:
+
+    YOUR STATUS (yellow):
+    - Supply: 0 chips
+    - Prisoners: none
+    OTHERS:
+    - red: 1 supply, 0 prisoners
+    - green: ELIMINATED
+    PILES:
+    - Pile 0: [green → yellow → red → blue]
+    DEAD BOX: green
+    PHASE: selectNextPlayer
+    TURN: yellow (YOU)
+
+parse_prompt_state() turns that text back into the getStateSnapshot shape. The
+prompt only gives *counts* of opponents' prisoners, so opponents holding any
+get `prisoners: None` and a `prisonerCount`; complete_prisoners() can fill in the
+colors by chip conservation when that is unambiguous.
+"""
+
+import re
+
+COLORS = ['red', 'blue', 'green', 'yellow']
+
+STATUS_RE = re.compile(r'YOUR STATUS \((\w+)\):\s*\n- Supply: (\d+) chips\s*\n- Prisoners: ([^\n]*)')
+OTHER_RE = re.compile(r'^- (red|blue|green|yellow): (?:(\d+) supply, (\d+) prisoners|(ELIMINATED))\s*$', re.M)
+PILE_RE = re.compile(r'^- Pile (\d+): \[([^\]]*)\]\s*$', re.M)
+DEAD_RE = re.compile(r'^DEAD BOX: ([^\n]*)$', re.M)
+PHASE_RE = re.compile(r'^PHASE: (\w+)', re.M)
+TURN_RE = re.compile(r'^TURN: (\w+)', re.M)
+KILL_RE = re.compile(r'Choose which chip to KILL: ([^\n]*)')
+
+
+def _color_list(text):
+    text = text.strip()
+    if not text or text in ('none', 'empty'):
+        return []
+    return [c.strip() for c in text.split(',') if c.strip()]
+
+
+def parse_prompt_state(prompt):
+    """
+    Parse the GAME STATE block of a decision prompt into
+    {'players', 'piles', 'deadBox', 'phase', 'currentPlayer', 'pendingCapture', 'viewer'}.
+    Returns None if the prompt has no recognizable state block.
+    """
+    if not prompt:
+        return None
+    status = STATUS_RE.search(prompt)
+    if not status:
+        return None
+    # Only parse the state block, not chat history that might quote it
+    block = prompt.split('\nCHAT HISTORY:', 1)[0]
+
+    viewer = status.group(1)
+    players = {viewer: {
+        'color': viewer,
+        'supply': int(status.group(2)),
+        'prisoners': _color_list(status.group(3)),
+        'alive': True,
+    }}
+    for m in OTHER_RE.finditer(block.split('PILES:', 1)[0]):
+        color = m.group(1)
+        if color == viewer:
+            continue
+        if m.group(4):
+            players[color] = {'color': color, 'supply': 0, 'prisoners': [], 'alive': False}
+        else:
+            count = int(m.group(3))
+            players[color] = {'color': color, 'supply': int(m.group(2)),
+                              'prisoners': [] if count == 0 else None,
+                              'prisonerCount': count, 'alive': True}
+    for p in players.values():
+        p.setdefault('prisonerCount', len(p['prisoners']) if p['prisoners'] is not None else 0)
+        p['totalChips'] = p['supply'] + p['prisonerCount']
+
+    piles = [{'id': int(m.group(1)), 'chips': [c.strip() for c in m.group(2).split('→') if c.strip()]}
+             for m in PILE_RE.finditer(block)]
+    dead = DEAD_RE.search(block)
+    phase = PHASE_RE.search(block)
+    turn = TURN_RE.search(block)
+    kill = KILL_RE.search(block)
+    return {
+        'players': [players.get(c, {'color': c, 'supply': 0, 'prisoners': [], 'prisonerCount': 0,
+                                    'totalChips': 0, 'alive': False}) for c in COLORS],
+        'piles': piles,
+        'deadBox': _color_list(dead.group(1)) if dead else [],
+        'phase': phase.group(1) if phase else None,
+        'currentPlayer': turn.group(1) if turn else None,
+        'pendingCapture': {'chips': _color_list(kill.group(1))} if kill else None,
+        'viewer': viewer,
+    }
+
+
+def state_from_snapshot(snap):
+    """Full state if the snapshot recorded one, else the state parsed from its prompt."""
+    if snap.get('state'):
+        return snap['state']
+    request = snap.get('llmRequest') or {}
+    return parse_prompt_state(request.get('userPrompt'))
+
+
+def complete_prisoners(state, chips_per_player):
+    """
+    Fill in unknown prisoner colors using chip conservation: every color has
+    `chips_per_player` chips split between its owner's supply, piles, the dead
+    box and prisoner slots. When exactly one player's prisoners are unknown
+    the missing chips must be theirs. Returns True if the state is complete.
+    """
+    unknown = [p for p in state['players'] if p['prisoners'] is None]
+    if not unknown:
+        return True
+    if len(unknown) > 1:
+        return False
+    located = {c: 0 for c in COLORS}
+    for p in state['players']:
+        located[p['color']] += p['supply']
+        for c in p['prisoners'] or []:
+            located[c] += 1
+    for pile in state['piles']:
+        for c in pile['chips']:
+            located[c] += 1
+    for c in state['deadBox']:
+        located[c] += 1
+    missing = [c for c in COLORS for _ in range(max(chips_per_player - located[c], 0))]
+    if len(missing) != unknown[0]['prisonerCount']:
+        return False
+    unknown[0]['prisoners'] = missing
+    return True
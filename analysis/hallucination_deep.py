@@ -178,16 +178,34 @@ def analyze_false_capture_claims(data):
     return claims
 
 
-def analyze_opponent_confusion(data):
-    """Check if opponents respond to hallucinated claims as if real."""
+PILE_REF = re.compile(r'[Pp]ile\s*(\d+)')
+
+
+def parse_pile_claims(msg, num_piles):
+    """Parse a chat message once: (hallucinated pile numbers, set of referenced pile strings)."""
+    return check_pile_reference(msg, num_piles), set(PILE_REF.findall(msg))
+
+
+def analyze_opponent_confusion(data, window=5):
+    """
+    Check if opponents respond to hallucinated claims as if real.
+
+    Each message is parsed once and its hallucinated piles indexed by pile
+    number; a new message looks up only the piles it mentions among the last
+    `window` messages of the game (window=None: the whole game, for longer
+    confusion chains).
+    """
     confusion_patterns = []
     current_game = None
-    recent_messages = []
+    count = 0
+    # str(pile) -> [(message index, position in its claims, pile, player, msg)] for the current game
+    fake_piles = defaultdict(list)
     
     for snap in data['snapshots']:
         if snap['type'] == 'game_start':
             current_game = snap['game']
-            recent_messages = []
+            count = 0
+            fake_piles = defaultdict(list)
         
         if snap['type'] == 'decision' and snap.get('llmResponse'):
             player = snap.get('player')
@@ -197,30 +215,32 @@ def analyze_opponent_confusion(data):
             for tc in snap['llmResponse'].get('toolCalls') or []:
                 if tc['name'] == 'sendChat':
                     msg = tc.get('arguments', {}).get('message', '')
+                    halls, refs = parse_pile_claims(msg, num_piles)
                     
-                    # Check if this message references a hallucinated pile from previous message
-                    for prev in recent_messages[-5:]:
-                        if prev['player'] != player:
-                            # Check if current player references same fake pile
-                            prev_halls = check_pile_reference(prev['msg'], prev['num_piles'])
-                            curr_refs = re.findall(r'[Pp]ile\s*(\d+)', msg)
-                            
-                            for pile in prev_halls:
-                                if str(pile) in curr_refs:
-                                    confusion_patterns.append({
-                                        'game': current_game,
-                                        'hallucinator': prev['player'],
-                                        'confused_player': player,
-                                        'fake_pile': pile,
-                                        'original_msg': prev['msg'][:80],
-                                        'response_msg': msg[:80]
-                                    })
+                    # Earlier fake piles from other players that this message repeats
+                    oldest = 0 if window is None else count - window
+                    matches = []
+                    for pile in refs:
+                        for claim in reversed(fake_piles.get(pile, ())):
+                            if claim[0] < oldest:
+                                break
+                            if claim[3] != player:
+                                matches.append(claim)
                     
-                    recent_messages.append({
-                        'player': player,
-                        'msg': msg,
-                        'num_piles': num_piles
-                    })
+                    for idx, _, pile, prev_player, prev_msg in sorted(matches):
+                        confusion_patterns.append({
+                            'game': current_game,
+                            'hallucinator': prev_player,
+                            'confused_player': player,
+                            'fake_pile': pile,
+                            'original_msg': prev_msg[:80],
+                            'response_msg': msg[:80],
+                            'distance': count - idx
+                        })
+                    
+                    for pos, pile in enumerate(halls):
+                        fake_piles[str(pile)].append((count, pos, pile, player, msg))
+                    count += 1
     
     return confusion_patterns
 
@@ -315,7 +335,11 @@ def main():
     
     confusion = analyze_opponent_confusion(data)
     
+    chains = analyze_opponent_confusion(data, window=None)
+    
     print(f"\n  Cases where opponent referenced a hallucinated pile: {len(confusion)}")
+    print(f"  Including repeats more than 5 messages later: {len(chains)}"
+          f" (longest gap {max((c['distance'] for c in chains), default=0)} messages)")
     
     if confusion:
         # Count who gets confused by whom
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - MCTS Move Evaluator
+Scores every recorded LLM game move by regret: how much win probability the
+model gave up relative to the best move a Monte Carlo Tree Search finds from
+the same position.
+
+- positions come from replaying each game (rules.replay_decisions), so prisoner
+  colors are exact rather than guessed from the prompt
+- the tree uses the exact rules; leaves are valued with the mean of a batch of
+  vectorized random playouts (batch_rules.py), one visit per iteration
+- decisions are searched in parallel across a process pool
+- results are cached on disk by position hash, so positions that recur across
+  games (openings especially) are searched once; --symmetric also pools
+  positions that differ only by a relabelling of colors (canonical.py)
+
+    python mcts.py score ../data_v2 talking.json --iterations 100 --workers 8
+
+Regret is in win-probability units for the mover (0 = chose the best move).
+The per-model mean gives SLS-Bench an "execution" component that does not
+depend on who eventually won.
+"""
+
+import argparse
+import math
+import os
+import pickle
+import random
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+import rules as R
+from batch_rules import playout_values
+from canonical import canonical_decision
+from corpus import find_session_files, load_session
+from zobrist import hash_hex, hash_position
+
+DEFAULT_CACHE = Path(__file__).parent / 'cache' / 'mcts_results.pkl'
+SEARCH_VERSION = 2  # part of the cache key; bump when search statistics change meaning
+PLAYOUT_PHASES = (R.SELECT_CHIP, R.DONATION, R.GAME_OVER)
+
+
+class Node:
+    __slots__ = ('pos', 'mover', 'children', 'untried', 'visits', 'total')
+
+    def __init__(self, pos):
+        self.pos = pos
+        self.mover = None if R.is_terminal(pos) else R.mover(pos)
+        self.children = {}
+        self.untried = R.legal_moves(pos)
+        self.visits = 0
+        self.total = np.zeros(4)
+
+
+class MCTS:
+    """UCT over exact rules with batched random playouts at the leaves."""
+
+    def __init__(self, iterations=100, batch=128, exploration=1.4, seed=0):
+        self.iterations = iterations
+        self.batch = batch
+        self.exploration = exploration
+        self.rng = np.random.default_rng(seed)
+        self.random = random.Random(seed)
+
+    def _to_playout_phase(self, pos):
+        """Playouts start at selectChip/donation; finish a half-turn with random moves."""
+        while pos[R.PHASE] not in PLAYOUT_PHASES:
+            pos = R.apply_move(pos, self.random.choice(R.legal_moves(pos)))
+        return pos
+
+    def _leaf_value(self, pos):
+        if R.is_terminal(pos):
+            value = np.zeros(4)
+            value[pos[R.WINNER]] = 1.0
+            return value
+        return playout_values(self._to_playout_phase(pos), self.batch, self.rng)
+
+    def _select(self, node):
+        log_n = math.log(node.visits)
+        me = node.mover
+        best, best_score = None, -1.0
+        for child in node.children.values():
+            score = (child.total[me] / child.visits
+                     + self.exploration * math.sqrt(log_n / child.visits))
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    def search(self, pos, extra_moves=()):
+        """
+        Run the search and return {move: (mean payoff vector, visits)} for the
+        root. `extra_moves` are added to the root even if not in legal_moves
+        (the game accepts any seat for chooseNextPlayer).
+        """
+        root = Node(pos)
+        for move in extra_moves:
+            if move not in root.untried:
+                root.untried.append(move)
+        for _ in range(self.iterations):
+            node, path = root, [root]
+            while not node.untried and node.children:
+                node = self._select(node)
+                path.append(node)
+            if node.untried:
+                move = node.untried.pop()
+                child = Node(R.apply_move(node.pos, move))
+                node.children[move] = child
+                node = child
+                path.append(node)
+            value = self._leaf_value(node.pos)
+            for n in path:
+                n.visits += 1
+                n.total += value
+        return {move: (child.total / child.visits, child.visits)
+                for move, child in root.children.items()}
+
+
+def position_key(pos, iterations, batch):
+    """Result-cache key: the position's Zobrist hash plus the search budget."""
+    return f'{hash_hex(hash_position(pos))}:{iterations}:{batch}:v{SEARCH_VERSION}'
+
+
+def _evaluate(task):
+    key, pos, extra, iterations, batch, seed = task
+    stats = MCTS(iterations, batch, seed=seed).search(pos, extra)
+    return key, {move: (value.tolist(), visits) for move, (value, visits) in stats.items()}
+
+
+def regret(stats, pos, move):
+    """Best root value minus the chosen move's value, for the mover (None if the move has no stats)."""
+    me = R.mover(pos)
+    values = {m: v[me] for m, (v, _) in stats.items()}
+    best = max(values.values())
+    chosen = values.get(move)
+    if chosen is None:
+        return None
+    return {'best': best, 'chosen': chosen, 'regret': best - chosen, 'optimal': chosen >= best}
+
+
+class ResultCache:
+    """Position-hash -> root statistics, persisted between runs."""
+
+    def __init__(self, path=DEFAULT_CACHE):
+        self.path = Path(path)
+        self.results = {}
+        if self.path.exists():
+            with open(self.path, 'rb') as f:
+                self.results = pickle.load(f)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump(self.results, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
+
+
+def score_archive(paths=None, iterations=100, batch=128, workers=None, cache=None, limit=None, seed=0,
+                  symmetric=False):
+    """
+    Regret for every replayable decision with more than one legal move. With
+    `symmetric`, each decision is searched in its canonical color frame, so
+    relabelled copies of a position share one cached search (regret is the
+    mover's own value, so it is the same in either frame). A cached search
+    without stats for a recorded off-menu move is run again with that move.
+    Returns (rows, new searches, decisions left out because the search never
+    expanded the recorded move).
+    """
+    cache = cache or ResultCache()
+    decisions = []
+    for path in find_session_files(paths):
+        data = load_session(path)
+        if data is None:
+            continue
+        for rec in R.replay_decisions(data):
+            if symmetric:
+                rec['position'], rec['move'], _ = canonical_decision(rec['position'], rec['move'])
+            if len(R.legal_moves(rec['position'])) > 1:
+                decisions.append(rec)
+            if limit and len(decisions) >= limit:
+                break
+        if limit and len(decisions) >= limit:
+            break
+
+    # Every off-menu move recorded at a position is added to its one search
+    needed = {}
+    for i, rec in enumerate(decisions):
+        key = position_key(rec['position'], iterations, batch)
+        rec['key'] = key
+        task = needed.setdefault(key, [rec['position'], (), seed + i])
+        if rec['move'] not in R.legal_moves(rec['position']) and rec['move'] not in task[1]:
+            task[1] += (rec['move'],)
+    tasks = {key: (key, pos, extra, iterations, batch, task_seed)
+             for key, (pos, extra, task_seed) in needed.items()
+             if key not in cache.results or any(m not in cache.results[key] for m in extra)}
+
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for key, stats in pool.map(_evaluate, tasks.values(), chunksize=8):
+                cache.results[key] = stats
+        cache.save()
+
+    rows, skipped = [], 0
+    for rec in decisions:
+        r = regret(cache.results[rec['key']], rec['position'], rec['move'])
+        if r is None:
+            skipped += 1
+            continue
+        r.update({k: rec[k] for k in ('game', 'turn', 'player', 'model', 'phase')})
+        r['move'] = R.describe_move(rec['move'])  # canonical colors under --symmetric
+        rows.append(r)
+    return rows, len(tasks), skipped
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def print_section(title):
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score recorded decisions by MCTS regret.')
+    parser.add_argument('command', choices=['score'])
+    parser.add_argument('paths', nargs='*', help='Session files or directories')
+    parser.add_argument('--iterations', type=int, default=100, help='Tree iterations per decision')
+    parser.add_argument('--batch', type=int, default=128, help='Random playouts per leaf (cheap: one NumPy pass per step)')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--limit', type=int, default=None, help='Only the first N decisions')
+    parser.add_argument('--cache', default=DEFAULT_CACHE, help='Result cache file')
+    parser.add_argument('--symmetric', action='store_true',
+                        help='Share searches across color-relabelled positions (approximate: seat order matters)')
+    args = parser.parse_args()
+
+    rows, searched, skipped = score_archive(args.paths or None, args.iterations, args.batch, args.workers,
+                                   ResultCache(args.cache), args.limit, symmetric=args.symmetric)
+    print_section(f"MCTS REGRET ({len(rows)} decisions, {searched} new searches)")
+    if skipped:
+        print(f"  {skipped} decisions left out: the recorded move was never expanded at the root "
+              f"(raise --iterations above the number of legal moves)")
+    by_model = defaultdict(list)
+    by_phase = defaultdict(list)
+    for r in rows:
+        by_model[r['model'] or r['player']].append(r)
+        by_phase[(r['model'] or r['player'], r['phase'])].append(r['regret'])
+
+    print(f"\n  {'Model':<20} {'Decisions':>10} {'Best move':>10} {'Mean regret':>12} {'Execution':>10}")
+    print(f"  {'-'*66}")
+    for model, rs in sorted(by_model.items()):
+        mean = float(np.mean([r['regret'] for r in rs]))
+        best = sum(r['optimal'] for r in rs) / len(rs)
+        print(f"  {model:<20} {len(rs):>10} {best:>9.1%} {mean:>12.3f} {1 - mean:>10.3f}")
+
+    print(f"\n  Mean regret by phase:")
+    phases = sorted({p for _, p in by_phase})
+    print(f"  {'Model':<20} " + ' '.join(f"{p:>16}" for p in phases))
+    for model in sorted(by_model):
+        cells = [f"{np.mean(by_phase[(model, p)]):>16.3f}" if by_phase.get((model, p)) else f"{'-':>16}"
+                 for p in phases]
+        print(f"  {model:<20} " + ' '.join(cells))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Corpus Message Index
+Inverted index over every think and sendChat text in the recorded sessions.
+
+Each session file gets its own shard (token -> {doc: positions}), so shards can
+be built in parallel and only new or changed sessions are re-indexed on update.
+Queries support terms, "quoted phrases", AND / OR / NOT (or a leading -) and
+parentheses, e.g.:
+
+    python message_index.py build ../data_v2 talking.json
+    python message_index.py query '"alliance bank" OR gaslight*' --tool sendChat
+    python message_index.py query 'betray AND NOT (trust OR "work together")' --tool think
+
+Matching is on word tokens, so "you know" matches the phrase but not "you knows".
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from multiprocessing import Pool
+from pathlib import Path
+
+from corpus import find_session_files, game_summaries, iter_messages, load_session, session_id
+
+DEFAULT_INDEX_DIR = Path(__file__).parent / 'cache' / 'message_index'
+INDEX_VERSION = 1
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+QUERY_RE = re.compile(r'-?"[^"]*"|\(|\)|[^\s()"]+')
+
+
+def tokenize(text):
+    """Lowercase word tokens (letters and digits, so "Pile 3" stays searchable)."""
+    return TOKEN_RE.findall(text.lower())
+
+
+# =============================================================================
+# SHARD BUILD
+# =============================================================================
+
+def shard_name(path):
+    return hashlib.sha1(str(Path(path).resolve()).encode()).hexdigest()[:16] + '.pkl'
+
+
+def build_shard(path, shard_path):
+    """Index one session file into a shard. Returns its manifest entry."""
+    data = load_session(path)
+    if data is None:
+        return None
+    sid = session_id(data, path)
+
+    docs = []
+    postings = defaultdict(dict)
+    for msg in iter_messages(data, sid):
+        doc_id = len(docs)
+        docs.append((msg['game'], msg['turn'], msg['player'], msg['tool'], msg['text']))
+        positions = defaultdict(list)
+        for pos, tok in enumerate(tokenize(msg['text'])):
+            positions[tok].append(pos)
+        for tok, pos_list in positions.items():
+            postings[tok][doc_id] = tuple(pos_list)
+
+    shard = {
+        'version': INDEX_VERSION,
+        'session': sid,
+        'docs': docs,
+        'games': game_summaries(data),
+        'postings': dict(postings),
+    }
+    tmp = Path(str(shard_path) + '.tmp')
+    with open(tmp, 'wb') as f:
+        pickle.dump(shard, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, shard_path)
+
+    stat = Path(path).stat()
+    return {
+        'mtime': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'shard': Path(shard_path).name,
+        'session': sid,
+        'docs': len(docs),
+    }
+
+
+def _build_task(task):
+    path, shard_path = task
+    return str(Path(path).resolve()), build_shard(path, shard_path)
+
+
+# =============================================================================
+# QUERY PARSING
+# =============================================================================
+
+def parse_query(query):
+    """
+    Parse a boolean query into a small AST:
+      ('term', tok) | ('prefix', stem) | ('phrase', [toks]) |
+      ('and', [nodes]) | ('or', [nodes]) | ('not', node)
+    """
+    tokens = QUERY_RE.findall(query)
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else None
+
+    def take():
+        nonlocal pos
+        pos += 1
+        return tokens[pos - 1]
+
+    def leaf(raw):
+        if raw.startswith('"'):
+            words = tokenize(raw.strip('"'))
+            if not words:
+                raise ValueError(f'Empty phrase in query: {query!r}')
+            return ('term', words[0]) if len(words) == 1 else ('phrase', words)
+        if raw.endswith('*') and len(raw) > 1:
+            return ('prefix', raw[:-1].lower())
+        words = tokenize(raw)
+        if not words:
+            raise ValueError(f'Unsearchable term {raw!r} in query: {query!r}')
+        return ('term', words[0]) if len(words) == 1 else ('phrase', words)
+
+    def parse_or():
+        nodes = [parse_and()]
+        while peek() == 'OR':
+            take()
+            nodes.append(parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def parse_and():
+        nodes = [parse_not()]
+        while peek() is not None and peek() not in ('OR', ')'):
+            if peek() == 'AND':
+                take()
+            nodes.append(parse_not())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def parse_not():
+        tok = peek()
+        if tok == 'NOT':
+            take()
+            return ('not', parse_not())
+        if tok is not None and tok.startswith('-') and len(tok) > 1:
+            take()
+            return ('not', leaf(tok[1:]))
+        return parse_atom()
+
+    def parse_atom():
+        tok = peek()
+        if tok is None:
+            raise ValueError(f'Unexpected end of query: {query!r}')
+        if tok == '(':
+            take()
+            node = parse_or()
+            if peek() != ')':
+                raise ValueError(f'Unbalanced parentheses in query: {query!r}')
+            take()
+            return node
+        if tok in ('AND', 'OR', ')'):
+            raise ValueError(f'Unexpected {tok!r} in query: {query!r}')
+        return leaf(take())
+
+    node = parse_or()
+    if peek() is not None:
+        raise ValueError(f'Unexpected {peek()!r} in query: {query!r}')
+    return node
+
+
+def phrase_query(phrases):
+    """Build an OR query matching any of the given keyword phrases."""
+    return ' OR '.join(f'"{p}"' for p in phrases)
+
+
+# =============================================================================
+# INDEX
+# =============================================================================
+
+class MessageIndex:
+    """Sharded inverted index over corpus messages, one shard per session file."""
+
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR):
+        self.index_dir = Path(index_dir)
+        self.manifest_path = self.index_dir / 'manifest.json'
+        self.manifest = self._read_manifest()
+        self.shards = None
+
+    def _read_manifest(self):
+        if self.manifest_path.exists():
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get('version') == INDEX_VERSION:
+                return manifest
+        return {'version': INDEX_VERSION, 'files': {}}
+
+    def _write_manifest(self):
+        tmp = self.manifest_path.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def update(self, paths=None, workers=None):
+        """
+        Index new or changed session files; drop shards whose file is gone.
+        Returns (indexed, removed) counts.
+        """
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        files = self.manifest['files']
+
+        tasks = []
+        for path in find_session_files(paths):
+            key = str(path.resolve())
+            stat = path.stat()
+            entry = files.get(key)
+            if entry and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                continue
+            tasks.append((path, self.index_dir / shard_name(path)))
+
+        removed = 0
+        for key in list(files):
+            if not Path(key).exists():
+                (self.index_dir / files.pop(key)['shard']).unlink(missing_ok=True)
+                removed += 1
+
+        if len(tasks) > 1 and workers != 1:
+            with Pool(workers) as pool:
+                results = list(pool.imap_unordered(_build_task, tasks))
+        else:
+            results = [_build_task(t) for t in tasks]
+
+        indexed = 0
+        for key, entry in results:
+            if entry is None:
+                files.pop(key, None)
+                continue
+            files[key] = entry
+            indexed += 1
+
+        self._write_manifest()
+        self.shards = None
+        return indexed, removed
+
+    def load(self):
+        """Load every shard into memory (done lazily on first search)."""
+        shards = []
+        for key, entry in sorted(self.manifest['files'].items()):
+            with open(self.index_dir / entry['shard'], 'rb') as f:
+                shard = pickle.load(f)
+            shard['vocab'] = None
+            shards.append(shard)
+        self.shards = shards
+        return self
+
+    # -------------------------------------------------------------------------
+    # Evaluation
+    # -------------------------------------------------------------------------
+
+    def _eval(self, node, shard):
+        kind = node[0]
+        postings = shard['postings']
+        if kind == 'term':
+            return set(postings.get(node[1], ()))
+        if kind == 'prefix':
+            if shard['vocab'] is None:
+                shard['vocab'] = sorted(postings)
+            vocab = shard['vocab']
+            docs = set()
+            i = bisect_left(vocab, node[1])
+            while i < len(vocab) and vocab[i].startswith(node[1]):
+                docs.update(postings[vocab[i]])
+                i += 1
+            return docs
+        if kind == 'phrase':
+            lists = [postings.get(tok) for tok in node[1]]
+            if not all(lists):
+                return set()
+            candidates = set(lists[0]).intersection(*lists[1:])
+            matches = set()
+            for doc in candidates:
+                starts = set(lists[0][doc])
+                for offset, plist in enumerate(lists[1:], 1):
+                    starts &= {p - offset for p in plist[doc]}
+                    if not starts:
+                        break
+                if starts:
+                    matches.add(doc)
+            return matches
+        if kind == 'and':
+            result = None
+            for child in sorted(node[1], key=lambda n: n[0] == 'not'):
+                if child[0] == 'not' and result is not None:
+                    result -= self._eval(child[1], shard)
+                else:
+                    docs = self._eval(child, shard)
+                    result = docs if result is None else result & docs
+                if not result:
+                    break
+            return result or set()
+        if kind == 'or':
+            result = set()
+            for child in node[1]:
+                result |= self._eval(child, shard)
+            return result
+        if kind == 'not':
+            return set(range(len(shard['docs']))) - self._eval(node[1], shard)
+        raise ValueError(f'Unknown query node {kind!r}')
+
+    def search(self, query, tool=None, player=None, limit=None):
+        """
+        Return matching messages as dicts with session, game, turn, player,
+        tool, text, winner and max_turn. Results are in corpus order.
+        """
+        if self.shards is None:
+            self.load()
+        node = parse_query(query) if isinstance(query, str) else query
+        results = []
+        for shard in self.shards:
+            docs = shard['docs']
+            for doc_id in sorted(self._eval(node, shard)):
+                game, turn, who, tc, text = docs[doc_id]
+                if (tool and tc != tool) or (player and who != player):
+                    continue
+                summary = shard['games'].get(game, {})
+                results.append({
+                    'session': shard['session'],
+                    'game': game,
+                    'turn': turn,
+                    'player': who,
+                    'tool': tc,
+                    'text': text,
+                    'winner': summary.get('winner'),
+                    'max_turn': summary.get('turns', 1),
+                })
+                if limit and len(results) >= limit:
+                    return results
+        return results
+
+    def stats(self):
+        if self.shards is None:
+            self.load()
+        return {
+            'shards': len(self.shards),
+            'docs': sum(len(s['docs']) for s in self.shards),
+            'tokens': len(set().union(*(s['postings'] for s in self.shards))) if self.shards else 0,
+        }
+
+
+# =============================================================================
+# INDEX-BACKED ANALYSES
+# =============================================================================
+
+def _phase(turn, max_turn):
+    return 'early' if turn < max_turn * 0.33 else 'mid' if turn < max_turn * 0.66 else 'late'
+
+
+def _as_message(hit):
+    """Shape an index hit like adversarial_analysis.extract_all_messages output."""
+    max_turn = hit['max_turn'] or 1
+    return {
+        'session': hit['session'],
+        'game': hit['game'],
+        'player': hit['player'],
+        'turn': hit['turn'],
+        'max_turn': max_turn,
+        'message': hit['text'],
+        'phase': _phase(hit['turn'], max_turn),
+    }
+
+
+def find_gaslighting(index):
+    """Index-query version of adversarial_analysis.find_gaslighting."""
+    from adversarial_analysis import GASLIGHTING_WORDS
+    hits = index.search(phrase_query(GASLIGHTING_WORDS), tool='sendChat')
+    return [_as_message(h) for h in hits]
+
+
+def find_gloating_endings(index):
+    """Index-query version of adversarial_analysis.find_gloating_endings."""
+    from adversarial_analysis import GLOATING_WORDS
+    gloats = []
+    for hit in index.search(phrase_query(GLOATING_WORDS), tool='sendChat'):
+        msg = _as_message(hit)
+        if msg['phase'] == 'late':
+            gloats.append({**msg, 'is_winner': hit['winner'] == msg['player']})
+    return gloats
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and query the corpus message index.')
+    parser.add_argument('--index', default=DEFAULT_INDEX_DIR, help='Index directory')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help='Index new or changed session files')
+    build.add_argument('paths', nargs='*', help='Session files or directories')
+    build.add_argument('--workers', type=int, default=None, help='Parallel shard builders')
+
+    query = sub.add_parser('query', help='Search the index')
+    query.add_argument('query')
+    query.add_argument('--tool', choices=['sendChat', 'think'])
+    query.add_argument('--player')
+    query.add_argument('--limit', type=int, default=20)
+
+    sub.add_parser('stats', help='Show index size')
+
+    args = parser.parse_args()
+    index = MessageIndex(args.index)
+
+    if args.command == 'build':
+        indexed, removed = index.update(args.paths or None, workers=args.workers)
+        print(f"  Indexed {indexed} session(s), removed {removed}; "
+              f"{len(index.manifest['files'])} shard(s) in {index.index_dir}")
+    elif args.command == 'query':
+        try:
+            node = parse_query(args.query)
+        except ValueError as e:
+            raise SystemExit(f"Invalid query: {e}")
+        hits = index.search(node, tool=args.tool, player=args.player)
+        print(f"\n  {len(hits)} match(es) for {args.query!r}\n")
+        for h in hits[:args.limit]:
+            print(f"  [{h['session']} | Game {h['game']} Turn {h['turn']} | {h['player']} {h['tool']}]")
+            print(f"    \"{h['text'][:160]}\"")
+    elif args.command == 'stats':
+        s = index.stats()
+        print(f"  Shards: {s['shards']}  Messages: {s['docs']}  Distinct tokens: {s['tokens']}")
+
+
+if __name__ == '__main__':
+    main()
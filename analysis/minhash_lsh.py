@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Near-Duplicate Messages (MinHash LSH)
+Measures textual repetition - the "model collapse" of fig7 - across every
+sendChat and think text, per model and per game, without comparing messages
+pairwise.
+
+Each message becomes a set of word 3-gram shingles and a MinHash signature of
+`num_perm` values, computed for all messages at once with NumPy. Locality-
+sensitive hashing splits signatures into bands; messages that share any band
+are candidates, kept when their estimated Jaccard similarity clears the
+threshold, and joined into near-duplicate clusters. Building, banding and
+clustering are all O(messages).
+
+From the clusters:
+    repeat          the same player already sent a near-duplicate earlier in
+                    the same game (self-repetition; also tracked over the game)
+    cross-game      the model uses the same template in more than one game
+    cross-model     several models produce the same template
+
+Messages from human seats of browser games are labelled with the model
+'human', so they never count toward an AI model.
+
+    python minhash_lsh.py build ../data_v2 talking.json
+    python minhash_lsh.py report --tool sendChat --threshold 0.7
+    python minhash_lsh.py query "let's form an alliance against red"
+"""
+
+import argparse
+import re
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from corpus import COLORS, TEXT_TOOLS, find_session_files, game_summaries, iter_messages, load_session, session_id
+
+DEFAULT_INDEX = Path(__file__).parent / 'cache' / 'minhash.npz'
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+MERSENNE_P = (1 << 31) - 1
+TOOLS = list(TEXT_TOOLS)
+PROGRESS_BINS = 5
+# Shingles hashed per signature chunk: bounds the (num_perm, chunk) work array
+CHUNK_SHINGLES = 1 << 18
+
+
+# =============================================================================
+# SIGNATURES
+# =============================================================================
+
+class Shingler:
+    """Word k-gram shingle hashes: each distinct token is hashed once, shingles in bulk."""
+
+    def __init__(self, k=3):
+        self.k = k
+        self.token_hash = {}
+
+    def token_ids(self, text):
+        ids = []
+        for token in TOKEN_RE.findall(text.lower()):
+            h = self.token_hash.get(token)
+            if h is None:
+                h = self.token_hash[token] = zlib.crc32(token.encode()) + 1
+            ids.append(h)
+        # Messages shorter than k words become one shingle, padded with 0
+        return ids + [0] * (self.k - len(ids)) if len(ids) < self.k else ids
+
+    def shingles(self, tokens, offsets):
+        """(shingle hashes, per-message start offsets into them) for flat token ids."""
+        tokens = np.asarray(tokens, dtype=np.uint64)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        lengths = np.diff(offsets) - self.k + 1
+        starts = np.repeat(offsets[:-1], lengths) + (np.arange(lengths.sum())
+                                                      - np.repeat(np.cumsum(lengths) - lengths, lengths))
+        h = np.zeros(len(starts), dtype=np.uint64)
+        for j in range(self.k):
+            h = (h * np.uint64(1000003)) ^ tokens[starts + j]
+        h ^= h >> np.uint64(29)
+        h = (h * np.uint64(0xBF58476D1CE4E5B9)) ^ (h >> np.uint64(32))
+        return h % np.uint64(MERSENNE_P), np.concatenate([[0], np.cumsum(lengths)])
+
+
+def minhash(shingles, offsets, num_perm=128, seed=0):
+    """(messages, num_perm) uint32 signatures: min over each message's shingles of num_perm hash permutations."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, MERSENNE_P, size=(num_perm, 1), dtype=np.uint64)
+    b = rng.integers(0, MERSENNE_P, size=(num_perm, 1), dtype=np.uint64)
+    n = len(offsets) - 1
+    sig = np.empty((n, num_perm), dtype=np.uint32)
+    first = 0
+    while first < n:
+        # Whole messages per chunk, so reduceat never spans a chunk boundary
+        last = max(int(np.searchsorted(offsets, offsets[first] + CHUNK_SHINGLES, 'right')) - 1, first + 1)
+        last = min(last, n)
+        lo, hi = offsets[first], offsets[last]
+        permuted = (a * shingles[None, lo:hi] + b) % np.uint64(MERSENNE_P)
+        sig[first:last] = np.minimum.reduceat(permuted, offsets[first:last] - lo, axis=1).T
+        first = last
+    return sig
+
+
+def bands_for(num_perm, threshold):
+    """(bands, rows) with bands * rows = num_perm whose S-curve midpoint (1/b)^(1/r) is closest to threshold."""
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(options, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+def band_keys(sig, bands, rows, seed=1):
+    """(messages, bands) uint64 hash of each band's rows."""
+    coef = np.random.default_rng(seed).integers(1, 1 << 62, size=rows, dtype=np.uint64) | np.uint64(1)
+    banded = sig[:, :bands * rows].astype(np.uint64).reshape(len(sig), bands, rows)
+    with np.errstate(over='ignore'):
+        return (banded * coef).sum(axis=2)
+
+
+# =============================================================================
+# INDEX
+# =============================================================================
+
+def build_index(paths=None, num_perm=128, k=3):
+    """Signatures and metadata for every sendChat/think text in the sessions."""
+    shingler = Shingler(k)
+    tokens, offsets = [], [0]
+    meta = {key: [] for key in ('session', 'game', 'turn', 'max_turn', 'player', 'tool', 'model')}
+    texts = []
+    for path in find_session_files(paths):
+        data = load_session(path)
+        if data is None:
+            continue
+        sid = session_id(data, path)
+        games = game_summaries(data)
+        for msg in iter_messages(data, sid):
+            if msg['player'] not in COLORS:
+                continue
+            ids = shingler.token_ids(msg['text'])
+            tokens.extend(ids)
+            offsets.append(offsets[-1] + len(ids))
+            meta['session'].append(sid)
+            meta['game'].append(-1 if msg['game'] is None else msg['game'])
+            meta['turn'].append(msg['turn'])
+            meta['max_turn'].append((games.get(msg['game']) or {}).get('turns') or 0)
+            meta['player'].append(COLORS.index(msg['player']))
+            meta['tool'].append(TOOLS.index(msg['tool']))
+            meta['model'].append(msg['model'])
+            texts.append(msg['text'])
+
+    shingles, shingle_offsets = shingler.shingles(tokens, offsets)
+    sig = minhash(shingles, shingle_offsets, num_perm)
+    encoded = [t.encode() for t in texts]
+    text_offsets = np.concatenate([[0], np.cumsum([len(t) for t in encoded])]).astype(np.int64)
+    return {
+        'sig': sig,
+        'session': np.array(meta['session'], dtype=str),
+        'game': np.array(meta['game'], dtype=np.int32),
+        'turn': np.array(meta['turn'], dtype=np.int32),
+        'max_turn': np.array(meta['max_turn'], dtype=np.int32),
+        'player': np.array(meta['player'], dtype=np.int8),
+        'tool': np.array(meta['tool'], dtype=np.int8),
+        'model': np.array(meta['model'], dtype=str),
+        'text_bytes': np.frombuffer(b''.join(encoded), dtype=np.uint8),
+        'text_offsets': text_offsets,
+        'shingle_k': np.array(k),
+    }
+
+
+def save_index(index, path=DEFAULT_INDEX):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, **index)
+
+
+def load_index(path=DEFAULT_INDEX):
+    with np.load(path) as z:
+        return {k: z[k] for k in z.files}
+
+
+def text_of(index, i):
+    lo, hi = index['text_offsets'][i], index['text_offsets'][i + 1]
+    return index['text_bytes'][lo:hi].tobytes().decode()
+
+
+# =============================================================================
+# CLUSTERS
+# =============================================================================
+
+def candidate_edges(sig, threshold=0.7):
+    """
+    Near-duplicate edges (i, j). Within each LSH bucket every member is compared
+    with the bucket's first member only, so the edge count stays linear in the
+    number of messages even for thousands of identical texts.
+    """
+    bands, rows = bands_for(sig.shape[1], threshold)
+    keys = band_keys(sig, bands, rows)
+    src, dst = [], []
+    for band in range(bands):
+        order = np.argsort(keys[:, band], kind='stable')
+        sorted_keys = keys[order, band]
+        new_bucket = np.concatenate([[True], sorted_keys[1:] != sorted_keys[:-1]])
+        leader = order[np.maximum.accumulate(np.where(new_bucket, np.arange(len(order)), 0))]
+        member = ~new_bucket
+        src.append(leader[member])
+        dst.append(order[member])
+    src, dst = np.concatenate(src), np.concatenate(dst)
+    pairs = np.unique(np.stack([src, dst], axis=1), axis=0) if len(src) else np.zeros((0, 2), np.int64)
+    similar = (sig[pairs[:, 0]] == sig[pairs[:, 1]]).mean(axis=1) >= threshold
+    return pairs[similar]
+
+
+def components(n, edges):
+    """Connected-component label (smallest member) per node, by min-label propagation."""
+    labels = np.arange(n)
+    if len(edges) == 0:
+        return labels
+    u, v = edges[:, 0], edges[:, 1]
+    while True:
+        low = np.minimum(labels[u], labels[v])
+        before = labels.copy()
+        np.minimum.at(labels, u, low)
+        np.minimum.at(labels, v, low)
+        labels = labels[labels]
+        if np.array_equal(labels, before):
+            return labels
+
+
+def repetition(index, cluster):
+    """
+    Per-message flags: repeat (an earlier near-duplicate by the same player in
+    the same game), cross_game (the cluster spans several games of this model),
+    cross_model (the cluster is used by several models).
+    """
+    n = len(cluster)
+    _, game_key = np.unique(np.char.add(np.char.add(index['session'], ':'), index['game'].astype(str)),
+                            return_inverse=True)
+    _, model_code = np.unique(index['model'], return_inverse=True)
+    seat = game_key * len(COLORS) + index['player']
+    order = np.lexsort((np.arange(n), index['turn'], seat, cluster))
+    same = (cluster[order][1:] == cluster[order][:-1]) & (seat[order][1:] == seat[order][:-1])
+    repeat = np.zeros(n, dtype=bool)
+    repeat[order[1:][same]] = True
+
+    cross_game = _spans(cluster * (model_code.max(initial=0) + 1) + model_code, game_key)
+    cross_model = _spans(cluster, model_code)
+    return repeat, cross_game, cross_model
+
+
+def _spans(key, group):
+    """Per message: does its key occur with more than one distinct group value?"""
+    order = np.lexsort((group, key))
+    k, g = key[order], group[order]
+    distinct = np.concatenate([[True], (k[1:] != k[:-1]) | (g[1:] != g[:-1])])
+    keys, inverse = np.unique(k, return_inverse=True)
+    count = np.bincount(inverse, distinct)
+    return count[np.searchsorted(keys, key)] > 1
+
+
+def find_clusters(index, threshold=0.7, tool=None):
+    """(message rows, cluster label per row, repeat, cross_game, cross_model) for one tool or all."""
+    rows = np.flatnonzero(index['tool'] == TOOLS.index(tool)) if tool else np.arange(len(index['sig']))
+    sub = {k: v[rows] for k, v in index.items() if k in ('sig', 'session', 'game', 'turn', 'player', 'model')}
+    edges = candidate_edges(sub['sig'], threshold)
+    cluster = components(len(rows), edges)
+    return (rows, cluster) + repetition(sub, cluster)
+
+
+def query(index, text, threshold=0.5, top=20):
+    """Indexed messages whose estimated Jaccard similarity with `text` is at least threshold."""
+    shingler = Shingler(int(index['shingle_k']))
+    ids = shingler.token_ids(text)
+    sig_q = minhash(*shingler.shingles(ids, [0, len(ids)]), index['sig'].shape[1])
+    bands, rows = bands_for(index['sig'].shape[1], threshold)
+    hits = np.flatnonzero((band_keys(index['sig'], bands, rows) == band_keys(sig_q, bands, rows)).any(axis=1))
+    sim = (index['sig'][hits] == sig_q).mean(axis=1)
+    keep = sim >= threshold
+    hits, sim = hits[keep], sim[keep]
+    best = np.argsort(-sim, kind='stable')[:top]
+    return [(int(hits[i]), float(sim[i])) for i in best]
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def print_section(title):
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def _short(text, width=70):
+    text = ' '.join(text.split())
+    return text if len(text) <= width else text[:width - 3] + '...'
+
+
+def report(index, tool, threshold=0.7, top=10):
+    start = time.perf_counter()
+    rows, cluster, repeat, cross_game, cross_model = find_clusters(index, threshold, tool)
+    elapsed = time.perf_counter() - start
+    if not len(rows):
+        return
+    sizes = np.bincount(cluster, minlength=len(rows))
+    duplicated = sizes[cluster] > 1
+    bands, band_rows = bands_for(index['sig'].shape[1], threshold)
+    print_section(f"{tool.upper()}: {len(rows)} messages, {int((sizes > 1).sum())} near-duplicate clusters "
+                  f"({duplicated.mean():.1%} of messages)")
+    print(f"  Jaccard >= {threshold} ({bands} bands x {band_rows} rows), clustered in {elapsed:.2f}s")
+
+    models = index['model'][rows]
+    game_key = np.char.add(np.char.add(index['session'][rows], ':'), index['game'][rows].astype(str))
+    print(f"\n  Largest clusters")
+    print(f"  {'Size':>6} {'Models':>6} {'Games':>6}  Example")
+    for c in np.argsort(-sizes, kind='stable')[:top]:
+        if sizes[c] < 2:
+            break
+        members = cluster == c
+        print(f"  {sizes[c]:>6} {len(np.unique(models[members])):>6} {len(np.unique(game_key[members])):>6}  "
+              f"{_short(text_of(index, rows[np.argmax(members)]))}")
+
+    print(f"\n  {'Model':<24} {'Msgs':>7} {'Repeat':>8} {'Cross-game':>11} {'Cross-model':>12}")
+    print(f"  {'-'*66}")
+    for model in np.unique(models):
+        m = models == model
+        print(f"  {model:<24} {int(m.sum()):>7} {repeat[m].mean():>8.1%} {cross_game[m].mean():>11.1%} "
+              f"{cross_model[m].mean():>12.1%}")
+
+    max_turn = index['max_turn'][rows]
+    finished = max_turn > 0
+    progress = np.minimum((index['turn'][rows] / np.maximum(max_turn, 1) * PROGRESS_BINS).astype(int),
+                          PROGRESS_BINS - 1)
+    print(f"\n  Repeat rate over the game (finished games, by fifth of the game's turns)")
+    print(f"  {'Model':<24} " + ' '.join(f"{f'{100 * b // PROGRESS_BINS}-{100 * (b + 1) // PROGRESS_BINS}%':>9}"
+                                         for b in range(PROGRESS_BINS)))
+    for model in np.unique(models):
+        m = (models == model) & finished
+        if not m.any():
+            continue
+        n = np.bincount(progress[m], minlength=PROGRESS_BINS)
+        r = np.bincount(progress[m], repeat[m], PROGRESS_BINS)
+        print(f"  {model:<24} " + ' '.join(f"{r[b] / n[b]:>9.1%}" if n[b] else f"{'-':>9}"
+                                          for b in range(PROGRESS_BINS)))
+
+    keys, inverse = np.unique(game_key, return_inverse=True)
+    n = np.bincount(inverse)
+    rate = np.bincount(inverse, repeat) / n
+    busy = np.flatnonzero(n >= 10)
+    if len(busy):
+        print(f"\n  Most repetitive games (10+ messages)")
+        for g in busy[np.argsort(-rate[busy], kind='stable')][:top]:
+            print(f"  {keys[g]:<40} {n[g]:>6} msgs {rate[g]:>8.1%} repeats")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Near-duplicate messages via MinHash LSH.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_build = sub.add_parser('build', help='Build the signature index')
+    p_build.add_argument('paths', nargs='*', help='Session files or directories')
+    p_build.add_argument('--num-perm', type=int, default=128, help='MinHash permutations')
+    p_build.add_argument('--shingle', type=int, default=3, help='Words per shingle')
+    p_report = sub.add_parser('report', help='Near-duplicate clusters and repetition rates')
+    p_report.add_argument('--tool', choices=TOOLS, help='Only sendChat or think (default: both, separately)')
+    p_report.add_argument('--threshold', type=float, default=0.7, help='Estimated Jaccard similarity')
+    p_report.add_argument('--top', type=int, default=10)
+    p_query = sub.add_parser('query', help='Indexed messages similar to a text')
+    p_query.add_argument('text')
+    p_query.add_argument('--threshold', type=float, default=0.5)
+    p_query.add_argument('--top', type=int, default=20)
+    for p in (p_build, p_report, p_query):
+        p.add_argument('--index', default=DEFAULT_INDEX, help='Signature index (.npz)')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        start = time.perf_counter()
+        index = build_index(args.paths or None, args.num_perm, args.shingle)
+        save_index(index, args.index)
+        print(f"Indexed {len(index['sig'])} messages ({args.num_perm} permutations) "
+              f"in {time.perf_counter() - start:.1f}s -> {args.index}")
+        return
+
+    index = load_index(args.index)
+    if args.command == 'report':
+        for tool in ([args.tool] if args.tool else TOOLS):
+            report(index, tool, args.threshold, args.top)
+        return
+
+    for i, sim in query(index, args.text, args.threshold, args.top):
+        where = f"{index['session'][i]} g{index['game'][i]} t{index['turn'][i]} {COLORS[index['player'][i]]}"
+        print(f"  {sim:.2f}  {index['model'][i]:<20} {where:<36} {_short(text_of(index, i), 60)}")
+
+
+if __name__ == '__main__':
+    main()
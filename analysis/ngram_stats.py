@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Distinctive N-grams per Model
+One streaming pass over every session that produces, for each model, the
+n-grams it uses distinctively more than the others - overall, per game phase
+(early/mid/late) and by outcome (won/lost).
+
+Memory stays bounded however large the archive is:
+- a count-min sketch per group estimates the count of any n-gram
+- a mergeable Misra-Gries summary per group keeps the heavy-hitter candidates
+
+Distinctiveness is the log-odds ratio with an informative Dirichlet prior
+(Monroe, Colaresi & Quinn 2008), group vs. the rest of the corpus, reported as
+a z-score:
+
+    python ngram_stats.py ../data_v2 talking.json
+    python ngram_stats.py ../data_v2 --tool think --max-n 2 --top 15
+"""
+
+import argparse
+import json
+import re
+import zlib
+from collections import Counter
+
+import numpy as np
+
+from corpus import find_session_files, game_summaries, iter_messages, load_session, session_id
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+MERSENNE_P = (1 << 31) - 1
+
+
+def ngrams(text, max_n=3):
+    """All 1..max_n word n-grams of a message."""
+    toks = TOKEN_RE.findall(text.lower())
+    return [' '.join(toks[i:i + n]) for n in range(1, max_n + 1) for i in range(len(toks) - n + 1)]
+
+
+def phase_of(turn, max_turn):
+    return 'early' if turn < max_turn * 0.33 else 'mid' if turn < max_turn * 0.66 else 'late'
+
+
+# =============================================================================
+# SKETCHES
+# =============================================================================
+
+class CountMinSketch:
+    """depth x width counters; estimates never undercount."""
+
+    def __init__(self, width=2 ** 17, depth=4, seed=0):
+        rng = np.random.default_rng(seed)
+        self.width = width
+        self.depth = depth
+        self.a = rng.integers(1, MERSENNE_P, size=(depth, 1), dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_P, size=(depth, 1), dtype=np.uint64)
+        self.table = np.zeros((depth, width), dtype=np.uint32)
+        self.total = 0
+
+    def _buckets(self, hashes):
+        h = np.asarray(hashes, dtype=np.uint64)[None, :]
+        return ((self.a * h + self.b) % MERSENNE_P) % self.width
+
+    def add(self, hashes, counts):
+        counts = np.asarray(counts, dtype=np.uint32)
+        buckets = self._buckets(hashes)
+        for row in range(self.depth):
+            np.add.at(self.table[row], buckets[row], counts)
+        self.total += int(counts.sum())
+
+    def estimate(self, hashes):
+        buckets = self._buckets(hashes)
+        return self.table[np.arange(self.depth)[:, None], buckets].min(axis=0).astype(np.int64)
+
+
+class HeavyHitters:
+    """
+    Mergeable Misra-Gries summary holding at most `capacity` n-grams.
+    Any n-gram with frequency above total/capacity is guaranteed to be kept.
+    """
+
+    def __init__(self, capacity=5000):
+        self.capacity = capacity
+        self.counts = Counter()
+
+    def merge(self, batch):
+        self.counts.update(batch)
+        if len(self.counts) > self.capacity:
+            cut = sorted(self.counts.values(), reverse=True)[self.capacity]
+            self.counts = Counter({g: c - cut for g, c in self.counts.items() if c > cut})
+
+    def candidates(self):
+        return list(self.counts)
+
+
+class GroupStats:
+    """Sketch + heavy hitters for one (model, slice) group."""
+
+    def __init__(self, width, depth, capacity):
+        self.cms = CountMinSketch(width, depth)
+        self.hh = HeavyHitters(capacity)
+        self.messages = 0
+
+    def add(self, batch):
+        grams = list(batch)
+        hashes = [zlib.crc32(g.encode()) for g in grams]
+        self.cms.add(hashes, [batch[g] for g in grams])
+        self.hh.merge(batch)
+
+
+# =============================================================================
+# STREAMING PASS
+# =============================================================================
+
+def group_keys(model, phase, outcome):
+    return [(model, 'all'), (model, phase), (model, outcome), ('*', 'all'), ('*', phase), ('*', outcome)]
+
+
+def collect(paths=None, tool='sendChat', max_n=3, width=2 ** 17, depth=4, capacity=5000):
+    """
+    One pass over the corpus. Messages are buffered per session (the unit that
+    also supplies each game's winner and length), then folded into the sketches.
+    """
+    groups = {}
+    for path in find_session_files(paths):
+        data = load_session(path)
+        if data is None:
+            continue
+        games = game_summaries(data)
+        batches = {}
+        for msg in iter_messages(data, session_id(data, path)):
+            if tool and msg['tool'] != tool:
+                continue
+            game = games.get(msg['game'])
+            if game is None:
+                continue  # unfinished game: no phase or outcome
+            model = msg['model']
+            phase = phase_of(msg['turn'], game['turns'] or 1)
+            outcome = 'won' if game['winner'] == msg['player'] else 'lost'
+            grams = Counter(ngrams(msg['text'], max_n))
+            for key in group_keys(model, phase, outcome):
+                batch = batches.setdefault(key, [Counter(), 0])
+                batch[0].update(grams)
+                batch[1] += 1
+        for key, (batch, n_msgs) in batches.items():
+            group = groups.setdefault(key, GroupStats(width, depth, capacity))
+            group.add(batch)
+            group.messages += n_msgs
+    return groups
+
+
+# =============================================================================
+# LOG-ODDS
+# =============================================================================
+
+def log_odds(groups, key, alpha=100.0, min_count=3, top=20):
+    """
+    Log-odds (informative Dirichlet prior) of each candidate n-gram in `key`
+    vs. the same slice across all models. Returns rows sorted by z-score.
+    """
+    model, slice_ = key
+    group = groups[key]
+    background = groups[('*', slice_)]
+    grams = group.hh.candidates()
+    if not grams:
+        return []
+    hashes = [zlib.crc32(g.encode()) for g in grams]
+
+    y_i = group.cms.estimate(hashes).astype(np.float64)
+    y_all = background.cms.estimate(hashes).astype(np.float64)
+    y_j = np.clip(y_all - y_i, 0, None)
+    n_i = group.cms.total
+    n_j = max(background.cms.total - n_i, 1)
+    prior = alpha * y_all / max(background.cms.total, 1)
+    a0 = alpha
+
+    delta = (np.log((y_i + prior) / (n_i + a0 - y_i - prior))
+             - np.log((y_j + prior) / (n_j + a0 - y_j - prior)))
+    z = delta / np.sqrt(1.0 / (y_i + prior) + 1.0 / (y_j + prior))
+
+    keep = y_i >= min_count
+    order = np.argsort(-z)
+    return [{'ngram': grams[i], 'count': int(y_i[i]), 'others': int(y_j[i]),
+             'log_odds': float(delta[i]), 'z': float(z[i])}
+            for i in order if keep[i]][:top]
+
+
+def distinctive_tables(groups, **kwargs):
+    """{model: {slice: rows}} for every model and slice seen."""
+    tables = {}
+    for model, slice_ in groups:
+        if model == '*':
+            continue
+        tables.setdefault(model, {})[slice_] = log_odds(groups, (model, slice_), **kwargs)
+    return tables
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def print_section(title):
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Distinctive n-grams per model, phase and outcome.')
+    parser.add_argument('paths', nargs='*', help='Session files or directories')
+    parser.add_argument('--tool', choices=['sendChat', 'think'], default='sendChat')
+    parser.add_argument('--max-n', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--min-count', type=int, default=3)
+    parser.add_argument('--alpha', type=float, default=100.0, help='Dirichlet prior strength')
+    parser.add_argument('--width', type=int, default=2 ** 17, help='Count-min sketch width')
+    parser.add_argument('--depth', type=int, default=4, help='Count-min sketch depth')
+    parser.add_argument('--capacity', type=int, default=5000, help='Heavy-hitter candidates per group')
+    parser.add_argument('--json', help='Also write the tables to this file')
+    args = parser.parse_args()
+
+    groups = collect(args.paths or None, args.tool, args.max_n, args.width, args.depth, args.capacity)
+    if not groups:
+        print("  No finished games with messages found.")
+        return
+    tables = distinctive_tables(groups, alpha=args.alpha, min_count=args.min_count, top=args.top)
+
+    slices = ['all', 'early', 'mid', 'late', 'won', 'lost']
+    for model in sorted(tables):
+        print_section(f"{model.upper()} - distinctive {args.tool} n-grams")
+        for slice_ in slices:
+            rows = tables[model].get(slice_)
+            if not rows:
+                continue
+            n_msgs = groups[(model, slice_)].messages
+            print(f"\n  [{slice_}] ({n_msgs} messages)")
+            for r in rows:
+                print(f"    {r['ngram']:<32} z={r['z']:>6.2f}  n={r['count']:<5} others={r['others']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(tables, f, indent=2)
+        print(f"\n  Tables written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Columnar Outcome Table
+Builds one compact NumPy table of every finished game so survival analyses do
+not have to re-walk snapshots:
+
+    python outcome_table.py build ../data_v2 talking.json silent.json
+    python outcome_table.py km                 # Kaplan-Meier per model x chips
+    python outcome_table.py km --by model
+
+Columns (one row per game, colors in COLORS order):
+    session, game, turns, chips, silent, winner
+    models          (G, 4)  model name per color ('human' for human seats)
+    elim_turn       (G, 4)  turn the color was first seen eliminated, else final turn
+    eliminated      (G, 4)  event flag (False = survived / censored)
+    rank            (G, 4)  finishing place, 1 = winner (from eliminationOrder)
+    human           (G, 4)  seat played by a human (browser game_start players[].type)
+    chip_offsets    (G+1,)  game g's rows in chips_over_time are offsets[g]:offsets[g+1]
+    chips_over_time (R, 4)  totalChips (supply + prisoners) per color at turns 0..turns
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from corpus import (
+    COLORS, find_session_files, game_models, human_seats, iter_game_snapshots, load_session, session_id,
+)
+from game_state import state_from_snapshot
+
+DEFAULT_TABLE = Path(__file__).parent / 'cache' / 'outcomes.npz'
+
+
+# =============================================================================
+# BUILD
+# =============================================================================
+
+def finishing_places(end):
+    """Place per color (1 = winner) from a game_end snapshot's winner and eliminationOrder."""
+    order = end.get('eliminationOrder') or []
+    winner = end.get('winner')
+    rank = np.zeros(4, dtype=np.int8)
+    for place, color in enumerate(reversed(order), start=2):
+        rank[COLORS.index(color)] = place
+    if winner in COLORS:
+        rank[COLORS.index(winner)] = 1
+    # Players neither eliminated nor winning (e.g. stalled games) share the next place
+    rank[rank == 0] = len(order) + 2 if winner in COLORS else 1
+    return rank
+
+
+def game_records(data, sid):
+    """One outcome record per finished game in a session."""
+    session = data.get('session') or {}
+    games = {}
+    for game, snap in iter_game_snapshots(data):
+        g = games.setdefault(game, {'start': {}, 'end': None, 'chips': {}, 'elim': {}})
+        if snap['type'] == 'game_start':
+            g['start'] = snap
+        elif snap['type'] == 'game_end':
+            g['end'] = snap
+        state = state_from_snapshot(snap)
+        if not state:
+            continue
+        turn = snap.get('turn', 0) if snap['type'] != 'game_end' else snap.get('turns', 0)
+        # Last observation within a turn wins
+        g['chips'][turn] = [p.get('totalChips', 0) for p in state['players']]
+        for i, p in enumerate(state['players']):
+            if not p['alive'] and i not in g['elim']:
+                g['elim'][i] = turn
+
+    records = []
+    for game, g in sorted(games.items(), key=lambda kv: (kv[0] is None, kv[0])):
+        end = g['end']
+        if end is None:
+            continue
+        turns = end.get('turns', 0)
+        start_state = g['start'].get('state') or {}
+        start_players = start_state.get('players') or []
+        chips = start_players[0]['totalChips'] if start_players else session.get('chips', 0)
+
+        series = np.zeros((turns + 1, 4), dtype=np.int16)
+        seen = np.zeros(turns + 1, dtype=bool)
+        for t, row in g['chips'].items():
+            if 0 <= t <= turns:
+                series[t] = row
+                seen[t] = True
+        if not seen[0]:
+            series[0] = chips
+            seen[0] = True
+        # Forward-fill turns with no observation
+        idx = np.maximum.accumulate(np.where(seen, np.arange(turns + 1), 0))
+        series = series[idx]
+
+        order = end.get('eliminationOrder') or []
+        winner = end.get('winner')
+        rank = finishing_places(end)
+
+        elim_turn = np.full(4, turns, dtype=np.int32)
+        eliminated = np.zeros(4, dtype=bool)
+        for i, color in enumerate(COLORS):
+            if color in order or i in g['elim']:
+                eliminated[i] = True
+                elim_turn[i] = min(g['elim'].get(i, turns), turns)
+
+        records.append({
+            'session': sid,
+            'game': -1 if game is None else game,
+            'turns': turns,
+            'chips': chips,
+            'silent': bool(g['start'].get('silent', session.get('silent', False))),
+            'winner': COLORS.index(winner) if winner in COLORS else -1,
+            'models': game_models(g['start'], session),
+            'elim_turn': elim_turn,
+            'eliminated': eliminated,
+            'rank': rank,
+            'human': human_seats(g['start'], session),
+            'series': series,
+        })
+    return records
+
+
+def build_table(paths=None):
+    """Walk every session and return the columnar table as a dict of arrays."""
+    records = []
+    for path in find_session_files(paths):
+        data = load_session(path)
+        if data is not None:
+            records.extend(game_records(data, session_id(data, path)))
+    lengths = np.array([len(r['series']) for r in records], dtype=np.int64)
+    offsets = np.zeros(len(records) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return {
+        'session': np.array([r['session'] for r in records], dtype=str),
+        'game': np.array([r['game'] for r in records], dtype=np.int32),
+        'turns': np.array([r['turns'] for r in records], dtype=np.int32),
+        'chips': np.array([r['chips'] for r in records], dtype=np.int16),
+        'silent': np.array([r['silent'] for r in records], dtype=bool),
+        'winner': np.array([r['winner'] for r in records], dtype=np.int8),
+        'models': np.array([r['models'] for r in records], dtype=str).reshape(-1, 4),
+        'elim_turn': np.array([r['elim_turn'] for r in records], dtype=np.int32).reshape(-1, 4),
+        'eliminated': np.array([r['eliminated'] for r in records], dtype=bool).reshape(-1, 4),
+        'rank': np.array([r['rank'] for r in records], dtype=np.int8).reshape(-1, 4),
+        'human': np.array([r['human'] for r in records], dtype=bool).reshape(-1, 4),
+        'chip_offsets': offsets,
+        'chips_over_time': (np.concatenate([r['series'] for r in records])
+                            if records else np.zeros((0, 4), dtype=np.int16)),
+    }
+
+
+def save_table(table, path=DEFAULT_TABLE):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, **table)
+
+
+def load_table(path=DEFAULT_TABLE):
+    with np.load(path) as f:
+        return {k: f[k] for k in f.files}
+
+
+def chips_series(table, g):
+    """(turns+1, 4) chips-over-time for game row g."""
+    return table['chips_over_time'][table['chip_offsets'][g]:table['chip_offsets'][g + 1]]
+
+
+# =============================================================================
+# KAPLAN-MEIER
+# =============================================================================
+
+def kaplan_meier(durations, events, groups):
+    """
+    Kaplan-Meier estimates for many groups at once.
+    durations/events/groups are flat arrays (one entry per player-game).
+    Returns {group: {'time', 'survival', 'at_risk', 'se'}} with Greenwood SEs.
+    """
+    durations = np.asarray(durations)
+    events = np.asarray(events, dtype=bool)
+    group_ids, gidx = np.unique(np.asarray(groups), return_inverse=True)
+
+    # Unique (group, time) cells: deaths and exits per cell
+    key = gidx.astype(np.int64) * (int(durations.max(initial=0)) + 1) + durations
+    cells, cell_idx = np.unique(key, return_inverse=True)
+    deaths = np.bincount(cell_idx, weights=events, minlength=len(cells))
+    exits = np.bincount(cell_idx, minlength=len(cells)).astype(np.float64)
+    cell_group = cells // (int(durations.max(initial=0)) + 1)
+    cell_time = cells % (int(durations.max(initial=0)) + 1)
+
+    # At risk = group size minus everyone who exited at an earlier time in the group
+    group_size = np.bincount(gidx, minlength=len(group_ids)).astype(np.float64)
+    cum_exits = np.cumsum(exits)
+    group_start = np.searchsorted(cell_group, np.arange(len(group_ids)))
+    exits_before = cum_exits - exits - np.where(group_start[cell_group] > 0,
+                                                cum_exits[group_start[cell_group] - 1], 0)
+    at_risk = group_size[cell_group] - exits_before
+
+    hazard = deaths / at_risk
+    log_s = np.log1p(-np.minimum(hazard, 1 - 1e-12))
+    greenwood = np.where(at_risk > deaths, deaths / (at_risk * np.maximum(at_risk - deaths, 1)), 0)
+
+    results = {}
+    bounds = np.append(group_start, len(cells))
+    for i, g in enumerate(group_ids):
+        a, b = bounds[i], bounds[i + 1]
+        survival = np.exp(np.cumsum(log_s[a:b]))
+        survival[np.cumsum(hazard[a:b] >= 1) > 0] = 0.0
+        results[g.item() if hasattr(g, 'item') else g] = {
+            'time': cell_time[a:b],
+            'survival': survival,
+            'at_risk': at_risk[a:b].astype(np.int64),
+            'se': survival * np.sqrt(np.cumsum(greenwood[a:b])),
+        }
+    return results
+
+
+def survival_by(table, by=('model', 'chips'), normalize=False):
+    """Flatten the table to player-games and run Kaplan-Meier per group."""
+    durations = table['elim_turn'].astype(np.float64)
+    if normalize:
+        # Fraction of the game survived, in percent
+        durations = np.round(100 * durations / np.maximum(table['turns'][:, None], 1))
+    labels = []
+    if 'model' in by:
+        labels.append(table['models'])
+    if 'chips' in by:
+        labels.append(np.broadcast_to(table['chips'][:, None].astype(str), table['models'].shape))
+    if 'silent' in by:
+        labels.append(np.broadcast_to(np.where(table['silent'], 'silent', 'talking')[:, None],
+                                      table['models'].shape))
+    groups = labels[0]
+    for extra in labels[1:]:
+        groups = np.char.add(np.char.add(groups, ' / '), extra)
+    return kaplan_meier(durations.ravel().astype(np.int64), table['eliminated'].ravel(), groups.ravel())
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def print_section(title):
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Columnar game outcomes and survival curves.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_build = sub.add_parser('build', help='Build the outcome table from session files')
+    p_build.add_argument('paths', nargs='*', help='Session files or directories')
+    p_km = sub.add_parser('km', help='Kaplan-Meier survival per group')
+    p_km.add_argument('--by', default='model,chips', help='Comma list of model, chips, silent')
+    p_km.add_argument('--normalize', action='store_true', help='Use percent of game length instead of turns')
+    for p in (p_build, p_km):
+        p.add_argument('--table', default=DEFAULT_TABLE, help='Table file (.npz)')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        table = build_table(args.paths or None)
+        save_table(table, args.table)
+        print(f"  {len(table['game'])} games, {len(table['chips_over_time'])} chip rows -> {args.table}")
+        return
+
+    table = load_table(args.table)
+    curves = survival_by(table, tuple(args.by.split(',')), args.normalize)
+    unit = '% of game' if args.normalize else 'turn'
+    print_section(f"KAPLAN-MEIER SURVIVAL ({len(table['game'])} games)")
+    for group, c in sorted(curves.items()):
+        median = c['time'][np.argmax(c['survival'] <= 0.5)] if (c['survival'] <= 0.5).any() else None
+        print(f"\n  {group}  (n={c['at_risk'][0]}, median survival: "
+              f"{'-' if median is None else f'{median} ({unit})'})")
+        step = max(1, len(c['time']) // 8)
+        for t, s, se in list(zip(c['time'], c['survival'], c['se']))[::step]:
+            print(f"    {unit} {t:>4}: {s:6.1%} ± {1.96 * se:5.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Prompt Growth
+Measures how the per-call user prompt grows over a game, from the recorded
+llmRequest/llmResponse fields, and what the simulator's --prompt-mode compact
+saves.
+
+Every decision and off_turn call contributes one row: turn, prompt characters
+(decision userPrompt, or off_turn llmRequest.promptChars), the CHAT HISTORY
+share of it, provider-reported promptTokens and response time. Rows are grouped
+by chips x talking/silent x prompt mode.
+
+For full-mode talking games the compact prompt is also re-rendered offline:
+each player's consecutive decision prompts are diffed to find the chat
+messages and board changes since their previous one, and the chat block is
+rebuilt the way AIAgent.compactChat does. Off-turn prompts are not recorded,
+so the "since last prompt" window is longer than in a live run and the
+estimate is conservative. Tokens are estimated with a per-model linear fit of
+promptTokens on prompt characters (system prompt and tool schemas are the
+intercept).
+
+    python prompt_growth.py ../data_v2
+    python prompt_growth.py ../data_v2 --bucket 5 --json cache/prompt_growth.json
+"""
+
+import argparse
+import json
+from collections import defaultdict
+
+import numpy as np
+
+from corpus import find_session_files, iter_game_snapshots, load_session, session_id
+from game_state import parse_prompt_state
+
+CHAT_HEADER = '\n\nCHAT HISTORY:\n'
+# Keep in sync with cli/HeadlessGame.js
+COMPACT_NEW_MESSAGES = 20
+COMPACT_QUOTE_CHARS = 100
+CHARS_PER_TOKEN = 4.0
+
+
+# =============================================================================
+# ROWS
+# =============================================================================
+
+def chat_lines(prompt):
+    """The 'COLOR: text' lines of a prompt's CHAT HISTORY block."""
+    if not prompt or CHAT_HEADER not in prompt:
+        return []
+    block = prompt.split(CHAT_HEADER, 1)[1].split('\n\n', 1)[0]
+    return block.split('\n')
+
+
+def chat_chars(prompt):
+    if not prompt or CHAT_HEADER not in prompt:
+        return 0
+    return len(CHAT_HEADER) + len(prompt.split(CHAT_HEADER, 1)[1].split('\n\n', 1)[0])
+
+
+def game_configs(data):
+    """{game: (chips, 'talking'|'silent', prompt mode)} from game_start, else the session."""
+    session = data.get('session') or {}
+    configs = {}
+    for game, snap in iter_game_snapshots(data):
+        if snap.get('type') == 'game_start':
+            configs[game] = (
+                snap.get('chips') or session.get('chips'),
+                'silent' if snap.get('silent', session.get('silent')) else 'talking',
+                snap.get('promptMode') or session.get('promptMode') or 'full',
+            )
+    return configs
+
+
+def prompt_rows(data, sid=None):
+    """One row per decision/off_turn call with a measurable prompt."""
+    session = data.get('session') or {}
+    default = (session.get('chips'), 'silent' if session.get('silent') else 'talking',
+               session.get('promptMode') or 'full')
+    configs = game_configs(data)
+    rows = []
+    for game, snap in iter_game_snapshots(data):
+        if snap.get('type') not in ('decision', 'off_turn'):
+            continue
+        request = snap.get('llmRequest') or {}
+        response = snap.get('llmResponse') or {}
+        prompt = request.get('userPrompt')
+        chars = len(prompt) if prompt else request.get('promptChars')
+        if not chars and not response.get('promptTokens'):
+            continue
+        chips, mode, prompt_mode = configs.get(game, default)
+        rows.append({
+            'session': sid,
+            'game': game,
+            'turn': snap.get('turn') or 0,
+            'player': snap.get('player'),
+            'model': snap.get('model'),
+            'type': snap['type'],
+            'chips': chips,
+            'mode': mode,
+            'prompt_mode': prompt_mode,
+            'chars': chars,
+            'chat_chars': chat_chars(prompt),
+            'prompt_tokens': response.get('promptTokens'),
+            'latency': response.get('responseTime'),
+            'prompt': prompt,
+        })
+    return rows
+
+
+# =============================================================================
+# OFFLINE COMPACT ESTIMATE
+# =============================================================================
+
+def new_message_count(prev, cur):
+    """Messages in `cur` that were not in `prev` (both are sliding windows of one chat)."""
+    for k in range(min(len(prev), len(cur)), 0, -1):
+        if prev[-k:] == cur[:k]:
+            return len(cur) - k
+    return len(cur)
+
+
+def compact_chat_text(lines, new_count):
+    """The CHAT HISTORY body AIAgent.compactChat would send for a full-mode window."""
+    start = max(0, len(lines) - min(new_count, COMPACT_NEW_MESSAGES))
+    earlier, recent = lines[:start], lines[start:]
+    out = []
+    if earlier:
+        last, count = {}, defaultdict(int)
+        for line in earlier:
+            speaker, _, text = line.partition(': ')
+            count[speaker] += 1
+            last[speaker] = text
+        out.append(f'({len(earlier)} earlier messages; last said by each player)')
+        for speaker, text in last.items():
+            quote = text[:COMPACT_QUOTE_CHARS] + '…' if len(text) > COMPACT_QUOTE_CHARS else text
+            out.append(f'- {speaker} ({count[speaker]}): "{quote}"')
+    if recent:
+        if earlier:
+            out.append('NEW:')
+        out.extend(recent)
+    else:
+        out.append('No new messages since your last prompt.')
+    return '\n'.join(out)
+
+
+def board_changes_chars(prev_prompt, prompt):
+    """Length of the SINCE YOUR LAST PROMPT block for two consecutive prompts."""
+    before, after = parse_prompt_state(prev_prompt), parse_prompt_state(prompt)
+    if not before or not after:
+        return 0
+    old = {p['id']: p['chips'] for p in before['piles']}
+    lines = []
+    for pile in after['piles']:
+        chips = old.pop(pile['id'], None)
+        if chips is None:
+            lines.append(f"- new pile {pile['id']}: {' → '.join(pile['chips'])}")
+        elif len(pile['chips']) > len(chips):
+            lines.append(f"- pile {pile['id']}: + {' → '.join(pile['chips'][len(chips):])}")
+    lines.extend(f'- pile {pid} was captured' for pid in old)
+    for b, a in zip(before['players'], after['players']):
+        if b['alive'] and not a['alive']:
+            lines.append(f"- {a['color']} was ELIMINATED")
+    return len('\n\nSINCE YOUR LAST PROMPT:\n') + len('\n'.join(lines) or '- no board changes')
+
+
+def estimate_compact(rows):
+    """Add 'compact_chars' to full-mode talking decision rows (the re-rendered compact prompt)."""
+    last = {}
+    for row in sorted(rows, key=lambda r: (r['session'], str(r['game']), r['turn'])):
+        if row['prompt_mode'] != 'full' or row['mode'] != 'talking' or not row['prompt']:
+            continue
+        key = (row['session'], row['game'], row['player'])
+        prev = last.get(key)
+        last[key] = row
+        lines = chat_lines(row['prompt'])
+        if prev is None:
+            new = len(lines)
+            changes = 0
+        else:
+            new = new_message_count(chat_lines(prev['prompt']), lines)
+            changes = board_changes_chars(prev['prompt'], row['prompt'])
+        chat = len(CHAT_HEADER) + len(compact_chat_text(lines, new)) if lines else 0
+        row['compact_chars'] = row['chars'] - row['chat_chars'] + chat + changes
+
+
+# =============================================================================
+# STATISTICS
+# =============================================================================
+
+def token_models(rows):
+    """Per model (intercept, tokens per char) from rows with both chars and promptTokens."""
+    by_model = defaultdict(list)
+    for r in rows:
+        if r['chars'] and r['prompt_tokens']:
+            by_model[r['model']].append((r['chars'], r['prompt_tokens']))
+    fits = {}
+    for model, pts in by_model.items():
+        x, y = np.array(pts, dtype=float).T
+        if len(pts) >= 10 and np.ptp(x) > 0:
+            slope, intercept = np.polyfit(x, y, 1)
+            if slope > 0:
+                fits[model] = (intercept, slope)
+    return fits
+
+
+def tokens(row, fits, chars=None):
+    """Provider-reported tokens if known, else the per-model fit, else chars / 4."""
+    chars = row['chars'] if chars is None else chars
+    if chars is None:
+        return row['prompt_tokens']
+    if row['model'] in fits:
+        intercept, slope = fits[row['model']]
+        return intercept + slope * chars
+    return chars / CHARS_PER_TOKEN
+
+
+def group_stats(rows, fits, bucket=10):
+    """Per (chips, mode, prompt mode) size distribution, growth slope and turn curve."""
+    groups = defaultdict(list)
+    for r in rows:
+        groups[(r['chips'], r['mode'], r['prompt_mode'])].append(r)
+    stats = {}
+    for key, group in groups.items():
+        toks = np.array([r['prompt_tokens'] or tokens(r, fits) for r in group], dtype=float)
+        turns = np.array([r['turn'] for r in group], dtype=float)
+        chars = [r['chars'] for r in group if r['chars']]
+        chat = [r['chat_chars'] / r['chars'] for r in group if r['chars'] and r['prompt']]
+        curve = defaultdict(list)
+        for t, v in zip(turns, toks):
+            curve[int(t) // bucket * bucket].append(v)
+        per_game = defaultdict(float)
+        for r, v in zip(group, toks):
+            per_game[(r['session'], r['game'])] += v
+        stats[key] = {
+            'calls': len(group),
+            'games': len(per_game),
+            'mean_tokens': float(toks.mean()),
+            'p50_tokens': float(np.percentile(toks, 50)),
+            'p95_tokens': float(np.percentile(toks, 95)),
+            'mean_chars': float(np.mean(chars)) if chars else None,
+            'chat_share': float(np.mean(chat)) if chat else None,
+            'tokens_per_turn': float(np.polyfit(turns, toks, 1)[0]) if np.ptp(turns) > 0 else 0.0,
+            'tokens_per_game': float(np.mean(list(per_game.values()))),
+            'curve': {b: float(np.mean(v)) for b, v in sorted(curve.items())},
+        }
+    return stats
+
+
+def latency_fit(rows, fits):
+    """Response-time ms per 1k prompt tokens, per model (least squares)."""
+    by_model = defaultdict(list)
+    for r in rows:
+        if r['latency'] and (r['prompt_tokens'] or r['chars']):
+            by_model[r['model']].append((r['prompt_tokens'] or tokens(r, fits), r['latency']))
+    out = {}
+    for model, pts in by_model.items():
+        x, y = np.array(pts, dtype=float).T
+        if len(pts) >= 10 and np.ptp(x) > 0 and np.ptp(y) > 0:
+            out[model] = (float(np.polyfit(x, y, 1)[0] * 1000), float(np.corrcoef(x, y)[0, 1]), len(pts))
+    return out
+
+
+def compact_savings(rows, fits, latency):
+    """Per chips: estimated full vs compact tokens and latency for full-mode talking decisions."""
+    by_chips = defaultdict(lambda: [0.0, 0.0, 0.0, 0])
+    for r in rows:
+        if 'compact_chars' not in r:
+            continue
+        full = tokens(r, fits)
+        compact = tokens(r, fits, r['compact_chars'])
+        acc = by_chips[r['chips']]
+        acc[0] += full
+        acc[1] += compact
+        acc[2] += (full - compact) * latency.get(r['model'], (0.0,))[0] / 1000
+        acc[3] += 1
+    return {chips: {'calls': n, 'full_tokens': f / n, 'compact_tokens': c / n,
+                    'saved': 1 - c / f if f else 0.0, 'latency_saved_ms': ms / n}
+            for chips, (f, c, ms, n) in by_chips.items()}
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def print_section(title):
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure prompt growth per turn and compact-mode savings.')
+    parser.add_argument('paths', nargs='*', help='Session files or directories')
+    parser.add_argument('--bucket', type=int, default=10, help='Turns per growth-curve bucket')
+    parser.add_argument('--json', help='Also write the statistics to this file')
+    args = parser.parse_args()
+
+    rows = []
+    for path in find_session_files(args.paths or None):
+        data = load_session(path)
+        if data is not None:
+            rows.extend(prompt_rows(data, session_id(data, path)))
+    if not rows:
+        print("  No calls with recorded prompts.")
+        return
+
+    fits = token_models(rows)
+    estimate_compact(rows)
+    stats = group_stats(rows, fits, args.bucket)
+    latency = latency_fit(rows, fits)
+    savings = compact_savings(rows, fits, latency)
+    label = lambda key: f"{key[0]} chips {key[1]} {key[2]}"
+
+    print_section('PROMPT SIZE PER CALL')
+    print(f"\n  {'Configuration':<28} {'Calls':>7} {'Mean tok':>9} {'p95 tok':>8} {'tok/turn':>9} "
+          f"{'Chat %':>7} {'tok/game':>10}")
+    print(f"  {'-'*84}")
+    for key, s in sorted(stats.items(), key=lambda kv: tuple(map(str, kv[0]))):
+        chat = f"{s['chat_share']:.0%}" if s['chat_share'] is not None else '-'
+        print(f"  {label(key):<28} {s['calls']:>7} {s['mean_tokens']:>9.0f} {s['p95_tokens']:>8.0f} "
+              f"{s['tokens_per_turn']:>9.1f} {chat:>7} {s['tokens_per_game']:>10.0f}")
+
+    print_section(f'GROWTH CURVE (mean prompt tokens per {args.bucket}-turn bucket)')
+    for key, s in sorted(stats.items(), key=lambda kv: tuple(map(str, kv[0]))):
+        curve = '  '.join(f"{b}:{v:.0f}" for b, v in s['curve'].items())
+        print(f"  {label(key):<28} {curve}")
+
+    print_section('LATENCY VS PROMPT SIZE')
+    if not latency:
+        print("  Not enough calls with response times.")
+    for model, (ms, r, n) in sorted(latency.items()):
+        print(f"  {str(model):<28} {ms:>+8.0f} ms per 1k tokens  (r = {r:+.2f}, n = {n})")
+
+    print_section('COMPACT MODE (estimated from full-mode talking games)')
+    if not savings:
+        print("  No full-mode talking decisions with recorded prompts.")
+    for chips, s in sorted(savings.items(), key=lambda kv: str(kv[0])):
+        print(f"  {chips} chips: {s['full_tokens']:.0f} -> {s['compact_tokens']:.0f} tokens per decision "
+              f"({s['saved']:.0%} saved, {-s['latency_saved_ms']:+.0f} ms latency, n = {s['calls']})")
+
+    measured = defaultdict(dict)
+    for (chips, mode, prompt_mode), s in stats.items():
+        measured[(chips, mode)][prompt_mode] = s
+    pairs = {k: v for k, v in measured.items() if 'full' in v and 'compact' in v}
+    if pairs:
+        print_section('COMPACT MODE (measured)')
+        for (chips, mode), v in sorted(pairs.items(), key=lambda kv: tuple(map(str, kv[0]))):
+            full, compact = v['full']['mean_tokens'], v['compact']['mean_tokens']
+            print(f"  {chips} chips {mode}: {full:.0f} -> {compact:.0f} tokens per call ({1 - compact / full:.0%} saved)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'groups': {label(k): v for k, v in stats.items()},
+                'latency_ms_per_1k_tokens': {str(m): v[0] for m, v in latency.items()},
+                'compact_estimate': {str(c): v for c, v in savings.items()},
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
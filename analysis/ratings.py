@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Plackett-Luce Ratings
+Multiplayer ratings per model (and chip config) fit on full finishing orders
+instead of win rates alone.
+
+Each finished game is read from the outcome table's rank column (1 = winner,
+then reverse elimination order) as a sequence of Plackett-Luce stages: the
+winner is chosen from all four seats, second place from the remaining three,
+and so on. Places shared by several seats (stalled games) contribute no
+stage; the places below them still do.
+A model in several seats of one game counts once per seat. Games with a human
+seat are left out unless --humans is given, which rates the humans as one
+more item, 'human'.
+
+Strengths w are fit by Hunter's MM algorithm, vectorized over stages:
+
+    w_i <- (stage wins of i + 1) / (sum over stages containing i of seats_i / sum_stage w
+                                    + 2 / (w_i + 1))
+
+The "+1" and 2/(w_i + 1) terms are one win and one loss against a virtual
+average player (w = 1), which keeps models with no wins finite. Standard
+errors of log w come from the diagonal of the observed information.
+
+Ratings update online: Ratings.add() appends the stages of new games and
+refits from the current strengths, which converges in a few iterations.
+
+    python outcome_table.py build ../data_v2 talking.json
+    python ratings.py fit                     # per chip config and overall
+    python ratings.py fit --by model          # one leaderboard
+    python ratings.py update new_sessions/    # add games to the saved ratings
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+
+import outcome_table
+from corpus import find_session_files, load_session, session_id
+
+DEFAULT_STATE = Path(__file__).parent / 'cache' / 'ratings.npz'
+SEATS = 4
+
+
+# =============================================================================
+# STAGES
+# =============================================================================
+
+def stages_from_ranks(rank, items):
+    """
+    Plackett-Luce stages for games with finishing places `rank` (G, 4) and item
+    codes `items` (G, 4). Returns (chooser (S,), members (S, 4), mask (S, 4)).
+    """
+    rank = np.asarray(rank)
+    choosers, members, masks = [], [], []
+    for place in range(1, int(rank.max(initial=0)) + 1):
+        at_place = rank == place
+        unique = at_place.sum(axis=1) == 1
+        remaining = rank >= place
+        # A stage needs one seat at this place and at least one seat left below it
+        ok = unique & (remaining.sum(axis=1) > 1)
+        if not ok.any():
+            continue
+        choosers.append(items[ok][at_place[ok]])
+        members.append(items[ok])
+        masks.append(remaining[ok])
+    if not choosers:
+        return np.zeros(0, np.int64), np.zeros((0, SEATS), np.int64), np.zeros((0, SEATS), bool)
+    return np.concatenate(choosers), np.concatenate(members), np.concatenate(masks)
+
+
+class Ratings:
+    """Plackett-Luce strengths for a growing set of items and games."""
+
+    def __init__(self, names=()):
+        self.names = list(names)
+        self.index = {n: i for i, n in enumerate(self.names)}
+        self.w = np.ones(len(self.names))
+        self.chooser = np.zeros(0, np.int64)
+        self.members = np.zeros((0, SEATS), np.int64)
+        self.mask = np.zeros((0, SEATS), bool)
+        self.games = np.zeros(len(self.names), np.int64)
+        self.keys = set()
+        self.iterations = 0
+
+    def _codes(self, labels):
+        for label in map(str, np.unique(labels)):
+            if label not in self.index:
+                self.index[label] = len(self.names)
+                self.names.append(label)
+        grow = len(self.names) - len(self.w)
+        if grow:
+            self.w = np.concatenate([self.w, np.ones(grow)])
+            self.games = np.concatenate([self.games, np.zeros(grow, np.int64)])
+        return np.vectorize(self.index.__getitem__, otypes=[np.int64])(labels)
+
+    def add(self, rank, labels, keys=None, refit=True):
+        """
+        Add games: finishing places (G, 4) and item labels (G, 4). Games whose
+        key is already in the ratings are skipped. Refits from the current
+        strengths unless refit=False.
+        """
+        rank, labels = np.asarray(rank), np.asarray(labels)
+        if keys is not None:
+            new = np.array([k not in self.keys for k in keys], dtype=bool)
+            rank, labels = rank[new], labels[new]
+            self.keys.update(k for k, n in zip(keys, new) if n)
+        if len(rank) == 0:
+            return 0
+        items = self._codes(labels)
+        chooser, members, mask = stages_from_ranks(rank, items)
+        self.chooser = np.concatenate([self.chooser, chooser])
+        self.members = np.concatenate([self.members, members])
+        self.mask = np.concatenate([self.mask, mask])
+        self.games += np.bincount(items.ravel(), minlength=len(self.names))
+        if refit:
+            self.fit()
+        return len(rank)
+
+    def fit(self, max_iter=1000, tol=1e-10):
+        """Hunter's MM iterations from the current strengths until log w moves less than tol."""
+        n = len(self.names)
+        if n == 0:
+            return self
+        wins = np.bincount(self.chooser, minlength=n) + 1.0
+        flat_members = self.members[self.mask]
+        stage_of = np.broadcast_to(np.arange(len(self.members))[:, None], self.members.shape)[self.mask]
+        w = self.w.copy()
+        for iteration in range(1, max_iter + 1):
+            denom = np.bincount(stage_of, w[flat_members], len(self.members))
+            expected = np.bincount(flat_members, 1.0 / denom[stage_of], n) + 2.0 / (w + 1.0)
+            new = wins / expected
+            new /= np.exp(np.mean(np.log(new)))
+            delta = np.max(np.abs(np.log(new) - np.log(w)))
+            w = new
+            if delta < tol:
+                break
+        self.w = w
+        self.iterations = iteration
+        return self
+
+    def stderr(self):
+        """Approximate SE of log w (diagonal of the observed information, prior included)."""
+        n = len(self.names)
+        flat_members = self.members[self.mask]
+        stage_of = np.broadcast_to(np.arange(len(self.members))[:, None], self.members.shape)[self.mask]
+        denom = np.bincount(stage_of, self.w[flat_members], len(self.members))
+        # Seats of the same item in one stage share a parameter: sum their probability first
+        pair = stage_of * n + flat_members
+        uniq, inverse = np.unique(pair, return_inverse=True)
+        p = np.bincount(inverse, self.w[flat_members] / denom[stage_of])
+        info = np.bincount(uniq % n, p * (1 - p), n)
+        prior = 2 * self.w / (self.w + 1) ** 2
+        return 1 / np.sqrt(info + prior)
+
+    def table(self):
+        """[(name, w, log w, se, games, P(win vs 3 average seats))] best first."""
+        se = self.stderr() if len(self.names) else np.zeros(0)
+        rows = [(name, self.w[i], np.log(self.w[i]), se[i], int(self.games[i]), self.w[i] / (self.w[i] + 3))
+                for i, name in enumerate(self.names)]
+        return sorted(rows, key=lambda r: -r[1])
+
+    def save(self, path=DEFAULT_STATE):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(path, names=np.array(self.names, dtype=str), w=self.w, chooser=self.chooser,
+                            members=self.members, mask=self.mask, games=self.games,
+                            keys=np.array(sorted(self.keys), dtype=str))
+
+    @classmethod
+    def load(cls, path=DEFAULT_STATE):
+        with np.load(path) as z:
+            r = cls(z['names'].tolist())
+            r.w, r.chooser, r.members, r.mask, r.games = z['w'], z['chooser'], z['members'], z['mask'], z['games']
+            r.keys = set(z['keys'].tolist())
+        return r
+
+
+# =============================================================================
+# LEADERBOARDS
+# =============================================================================
+
+def labels_for(table, by):
+    """Item label per seat: 'model' or 'model / N chips'."""
+    labels = table['models']
+    if by == 'model,chips':
+        labels = np.char.add(np.char.add(labels, ' / '),
+                             np.broadcast_to(table['chips'][:, None].astype(str), labels.shape))
+        labels = np.char.add(labels, ' chips')
+    return labels
+
+
+def game_keys(table):
+    return [f'{s}:{g}' for s, g in zip(table['session'], table['game'])]
+
+
+def without_humans(table):
+    """The columns fits read, for games with no human seat."""
+    if 'human' not in table:
+        return table
+    keep = ~table['human'].any(axis=1)
+    return {k: table[k][keep] for k in ('session', 'game', 'chips', 'models', 'rank')}
+
+
+def fit_table(table, by='model,chips', humans=False):
+    """
+    {config: Ratings}: one fit per chip count (by='model,chips') or a single
+    'all' fit. Games with a human seat only count if humans=True.
+    """
+    if not humans:
+        table = without_humans(table)
+    if by == 'model':
+        r = Ratings()
+        r.add(table['rank'], table['models'], game_keys(table))
+        return {'all': r}
+    fits = {}
+    keys = np.array(game_keys(table), dtype=object)
+    for chips in np.unique(table['chips']):
+        rows = table['chips'] == chips
+        r = Ratings()
+        r.add(table['rank'][rows], table['models'][rows], list(keys[rows]))
+        fits[f'{chips} chips'] = r
+    return fits
+
+
+def print_section(title):
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def print_leaderboard(title, ratings):
+    print_section(f"{title} ({len(ratings.chooser)} stages, {ratings.iterations} MM iterations)")
+    print(f"\n  {'Model':<28} {'Games':>6} {'log w':>8} {'95% CI':>17} {'P(win)':>8}")
+    print(f"  {'-'*71}")
+    for name, w, logw, se, games, p in ratings.table():
+        print(f"  {name:<28} {games:>6} {logw:>+8.2f}   [{logw - 1.96 * se:>+6.2f}, {logw + 1.96 * se:>+6.2f}] {p:>8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plackett-Luce ratings from finishing orders.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_fit = sub.add_parser('fit', help='Fit ratings on the outcome table')
+    p_fit.add_argument('--by', choices=['model,chips', 'model'], default='model,chips')
+    p_fit.add_argument('--table', default=outcome_table.DEFAULT_TABLE, help='outcome_table.py build output')
+    p_fit.add_argument('--json', help='Also write the leaderboards to this file')
+    p_up = sub.add_parser('update', help='Add games from session files to the saved ratings')
+    p_up.add_argument('paths', nargs='+', help='Session files or directories')
+    for p in (p_fit, p_up):
+        p.add_argument('--state', default=DEFAULT_STATE, help='Saved overall ratings (.npz)')
+        p.add_argument('--humans', action='store_true', help="Include games with a human seat (rated as 'human')")
+    args = parser.parse_args()
+
+    if args.command == 'fit':
+        table = outcome_table.load_table(args.table)
+        fits = fit_table(table, args.by, args.humans)
+        for config, ratings in fits.items():
+            print_leaderboard(f'PLACKETT-LUCE RATINGS: {config}', ratings)
+        overall = fits['all'] if 'all' in fits else fit_table(table, 'model', args.humans)['all']
+        overall.save(args.state)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump({config: [{'model': name, 'log_w': logw, 'se': se, 'games': games, 'p_win': p}
+                                    for name, _, logw, se, games, p in r.table()]
+                           for config, r in fits.items()}, f, indent=2)
+        return
+
+    ratings = Ratings.load(args.state) if Path(args.state).exists() else Ratings()
+    added = 0
+    for path in find_session_files(args.paths):
+        data = load_session(path)
+        if data is None:
+            continue
+        sid = session_id(data, path)
+        records = [r for r in outcome_table.game_records(data, sid) if args.humans or not any(r['human'])]
+        if records:
+            added += ratings.add([r['rank'] for r in records], [r['models'] for r in records],
+                                 [f"{sid}:{r['game']}" for r in records], refit=False)
+    ratings.fit()
+    ratings.save(args.state)
+    print_leaderboard(f'PLACKETT-LUCE RATINGS: +{added} games', ratings)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Compact Records
+Slotted record types for the per-message and per-turn rows the extract
+functions build, in place of one dict per row.
+
+A record has no __dict__: its fields live in __slots__, colors and game phases
+are stored as small integer codes and decoded on access, and repeated strings
+(game ids, tool names, model names) are interned so every row shares one copy.
+For the full corpus that is several times less memory than the equivalent
+dicts and far fewer objects for the garbage collector to track.
+
+Records keep dict-style read access - r['turn'], 'self_rate' in r, r.get(),
+dict(r), {**r} - so analyses written against dicts take them unchanged.
+Derived rows (a message annotated with turns-before-betrayal, a think turn
+tagged with a mismatch type) wrap the original record instead of copying it;
+see annotated().
+
+    python records.py ../data_v2      # memory of dict vs record extraction
+"""
+
+import sys
+
+from corpus import COLORS
+
+PHASES = ('early', 'mid', 'late', 'unknown')
+COLOR_CODES = {c: i for i, c in enumerate(COLORS)}
+PHASE_CODES = {p: i for i, p in enumerate(PHASES)}
+
+
+def intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Coded:
+    """Descriptor storing one of a fixed set of values (or None) as its index (-1 = None)."""
+
+    def __init__(self, slot, values):
+        self.slot = slot
+        self.values = values
+        self.codes = {v: i for i, v in enumerate(values)}
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        code = getattr(obj, self.slot)
+        return self.values[code] if code >= 0 else None
+
+    def __set__(self, obj, value):
+        code = self.codes.get(value, -1)
+        if code < 0 and value is not None:
+            raise ValueError(f'{self.slot[1:]} must be one of {", ".join(map(str, self.values))} or None, got {value!r}')
+        setattr(obj, self.slot, code)
+
+
+class Record:
+    """Base for slotted records with read-only mapping access over FIELDS."""
+
+    __slots__ = ()
+    FIELDS = ()
+    _field_set = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_set = frozenset(cls.FIELDS)
+
+    def __init__(self, *values):
+        for name, value in zip(self.FIELDS, values):
+            setattr(self, name, value)
+
+    def __getitem__(self, key):
+        if key not in self._field_set:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self._field_set:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self._field_set
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def keys(self):
+        return self.FIELDS
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._field_set else default
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def __eq__(self, other):
+        if isinstance(other, (Record, dict)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'{type(self).__name__}({dict(self.items())!r})'
+
+
+# =============================================================================
+# MESSAGES AND TURNS
+# =============================================================================
+
+class Message(Record):
+    """One sendChat message: game, player, turn, max_turn, message, phase."""
+
+    __slots__ = ('game', '_player', 'turn', 'max_turn', 'message', '_phase')
+    FIELDS = ('game', 'player', 'turn', 'max_turn', 'message', 'phase')
+    player = Coded('_player', COLORS)
+    phase = Coded('_phase', PHASES)
+
+    def __init__(self, game, player, turn, max_turn, message, phase='unknown'):
+        self.game = intern(game)
+        self.player = player
+        self.turn = turn
+        self.max_turn = max_turn
+        self.message = message
+        self.phase = phase
+
+
+# Keys of depaulo_analysis.analyze_message, in its order
+MARKERS = ('word_count', 'self_reference', 'other_reference', 'certainty', 'tentative', 'exclusive',
+           'negative_emotion', 'positive_emotion', 'self_rate', 'other_rate', 'certainty_rate',
+           'tentative_rate', 'certainty_tentative_ratio')
+
+
+class MarkedMessage(Record):
+    """A message with its DePaulo markers as fields (game, player, turn, message, *MARKERS)."""
+
+    __slots__ = ('game', '_player', 'turn', 'message') + MARKERS
+    FIELDS = ('game', 'player', 'turn', 'message') + MARKERS
+    player = Coded('_player', COLORS)
+
+    def __init__(self, game, player, turn, message, markers):
+        self.game = intern(game)
+        self.player = player
+        self.turn = turn
+        self.message = message
+        for name in MARKERS:
+            setattr(self, name, markers[name])
+
+
+class ThinkTurn(Record):
+    """One decision with think calls: its thoughts, chats and other actions (tuples)."""
+
+    __slots__ = ('game', '_player', 'turn', 'thinks', 'chats', 'actions')
+    FIELDS = ('game', 'player', 'turn', 'thinks', 'chats', 'actions')
+    player = Coded('_player', COLORS)
+
+    def __init__(self, game, player, turn, thinks, chats, actions):
+        self.game = intern(game)
+        self.player = player
+        self.turn = turn
+        self.thinks = tuple(thinks)
+        self.chats = tuple(chats)
+        self.actions = tuple(actions)
+
+
+def annotated(name, *fields):
+    """
+    A record type that adds `fields` to an existing record without copying it:
+    annotated('Gloat', 'is_winner')(msg, True)['message'] reads msg['message'].
+    The added fields come first in keys(), matching {'type': ..., **record}.
+    """
+
+    class Annotated(Record):
+        __slots__ = ('record',) + fields
+        FIELDS = fields
+
+        def __init__(self, record, *values):
+            self.record = record
+            for field, value in zip(fields, values):
+                setattr(self, field, value)
+
+        def __getitem__(self, key):
+            if key in self._field_set:
+                return getattr(self, key)
+            return self.record[key]
+
+        def __contains__(self, key):
+            return key in self._field_set or key in self.record
+
+        def keys(self):
+            return fields + tuple(k for k in self.record.keys() if k not in self._field_set)
+
+        def get(self, key, default=None):
+            return self[key] if key in self else default
+
+    Annotated.__name__ = Annotated.__qualname__ = name
+    return Annotated
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def deep_size(obj, seen=None):
+    """Approximate retained size of a record/dict/list tree (shared objects counted once)."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_size(v, seen) for v in obj)
+    elif isinstance(obj, Record):
+        size += sum(deep_size(getattr(obj, s), seen) for s in type(obj).__slots__ if s != 'record')
+    return size
+
+
+def main():
+    import argparse
+    import time
+
+    from corpus import find_session_files, load_session
+    import depaulo_analysis
+
+    parser = argparse.ArgumentParser(description='Compare dict and slotted record extraction.')
+    parser.add_argument('paths', nargs='*', help='Session files or directories')
+    args = parser.parse_args()
+
+    records, dicts = [], []
+    elapsed = 0.0
+    for path in find_session_files(args.paths or None):
+        data = load_session(path)
+        if data is None:
+            continue
+        start = time.perf_counter()
+        messages = depaulo_analysis.extract_all_events(data)[0]
+        elapsed += time.perf_counter() - start
+        records.extend(messages)
+        dicts.extend(dict(m.items()) for m in messages)
+
+    print(f"  {len(records)} messages extracted in {elapsed:.2f}s")
+    if records:
+        r, d = deep_size(records), deep_size(dicts)
+        print(f"  dicts:   {d / 1e6:8.2f} MB  ({d / len(dicts):.0f} B per message)")
+        print(f"  records: {r / 1e6:8.2f} MB  ({r / len(records):.0f} B per message, {d / r:.1f}x smaller)")
+
+
+if __name__ == '__main__':
+    main()
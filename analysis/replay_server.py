@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Recorded-Response Replay Server
+A local OpenAI-compatible /chat/completions endpoint that answers from the
+archive instead of a provider, so the simulator and the analysis pipeline can
+be load-tested and regression-tested offline at full parallelism.
+
+Every recorded decision/off_turn call with its user prompt is indexed by a
+request fingerprint: blake2b(model, user prompt, sorted tool names). Off-turn
+snapshots record the prompt only from this version of cli/HeadlessGame.js on;
+older recordings have just promptChars, so their off-turn requests always go
+to the fallback. /stats counts those as fallback_off_turn. A request is
+answered by, in order:
+
+1. the recorded response with the same fingerprint
+2. a recorded response to the same prompt and tools from any model
+3. the fallback policy (--fallback):
+   - legal  (default) a legal game action derived from the prompt's GAME STATE,
+            chosen by the fingerprint, so the same request always gets the same
+            answer
+   - empty  a response with no tool calls (the simulator's recovery path)
+   - error  HTTP 404, to catch requests that drifted from the recording
+
+The server is plain asyncio (no dependencies) with HTTP/1.1 keep-alive.
+
+    python replay_server.py build ../data_v2 talking.json
+    python replay_server.py serve --port 8765
+    LOCAL_BASE_URL=http://127.0.0.1:8765/v1 node cli/index.js --providers local:gemini-3-flash,local:kimi-k2,local:qwen3-32b,local:gpt-oss-120b
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import pickle
+import time
+from collections import Counter
+from pathlib import Path
+
+from corpus import COLORS, find_session_files, load_session
+from game_state import parse_prompt_state
+
+DEFAULT_INDEX = Path(__file__).parent / 'cache' / 'replay_index.pkl'
+FALLBACKS = ('legal', 'empty', 'error')
+# Tools only offered when a game action is due; requests without them are off-turn negotiation
+GAME_TOOLS = {'playChip', 'selectPile', 'chooseNextPlayer', 'killChip', 'respondToDonation'}
+
+
+def fingerprint(model, prompt, tools):
+    raw = '\0'.join([model or '', prompt or '', ','.join(sorted(tools or []))])
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+# =============================================================================
+# INDEX
+# =============================================================================
+
+def build_index(paths=None):
+    """
+    {'exact': {fp: response}, 'any_model': {fp: response}} from recorded calls
+    (first wins), and counts of off_turn calls skipped for lack of a prompt.
+    """
+    exact, any_model = {}, {}
+    skipped = Counter()
+    for path in find_session_files(paths):
+        data = load_session(path)
+        if data is None:
+            continue
+        for snap in data['snapshots']:
+            request = snap.get('llmRequest') or {}
+            response = snap.get('llmResponse') or {}
+            prompt = request.get('userPrompt')
+            if not prompt or not response:
+                if response and snap.get('type') in ('decision', 'off_turn'):
+                    skipped[snap['type']] += 1
+                continue
+            tools = request.get('availableTools') or []
+            recorded = {
+                'toolCalls': response.get('toolCalls') or [],
+                'promptTokens': response.get('promptTokens'),
+                'completionTokens': response.get('completionTokens'),
+                'responseTime': response.get('responseTime'),
+            }
+            exact.setdefault(fingerprint(snap.get('model'), prompt, tools), recorded)
+            any_model.setdefault(fingerprint(None, prompt, tools), recorded)
+    return {'exact': exact, 'any_model': any_model, 'skipped': dict(skipped)}
+
+
+def load_index(path=DEFAULT_INDEX):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def save_index(index, path=DEFAULT_INDEX):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'wb') as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+# =============================================================================
+# FALLBACK POLICY
+# =============================================================================
+
+def legal_action(prompt, tools, seed):
+    """A game tool call that is legal in the prompt's state, picked by `seed`."""
+    state = parse_prompt_state(prompt)
+    if state is None:
+        return []
+    me = next((p for p in state['players'] if p['color'] == state['viewer']), None)
+    options = []
+    if 'playChip' in tools and me:
+        colors = sorted(set(me['prisoners'] or []) | ({me['color']} if me['supply'] > 0 else set()))
+        options = [('playChip', {'color': c}) for c in colors]
+    elif 'selectPile' in tools:
+        options = [('selectPile', {'pileId': p['id']}) for p in state['piles']] + [('selectPile', {'pileId': None})]
+    elif 'chooseNextPlayer' in tools:
+        options = [('chooseNextPlayer', {'playerId': COLORS.index(p['color'])})
+                   for p in state['players'] if p.get('alive', True)]
+    elif 'killChip' in tools and state.get('pendingCapture'):
+        options = [('killChip', {'color': c}) for c in sorted(set(state['pendingCapture']['chips']))]
+    elif 'respondToDonation' in tools:
+        options = [('respondToDonation', {'accept': False})]
+    if not options:
+        return []
+    name, args = options[seed % len(options)]
+    return [{'name': name, 'arguments': args}]
+
+
+# =============================================================================
+# SERVER
+# =============================================================================
+
+class ReplayServer:
+    def __init__(self, index, fallback='legal', latency_scale=0.0):
+        self.index = index
+        self.fallback = fallback
+        self.latency_scale = latency_scale
+        self.stats = Counter()
+        self.started = time.time()
+
+    def answer(self, body):
+        """(status, payload) for one chat/completions request body."""
+        model = body.get('model')
+        messages = body.get('messages') or []
+        prompt = next((m.get('content') for m in reversed(messages) if m.get('role') == 'user'), '')
+        if isinstance(prompt, list):  # content parts
+            prompt = ''.join(part.get('text', '') for part in prompt if isinstance(part, dict))
+        tools = [t.get('function', t).get('name') for t in body.get('tools') or []]
+
+        fp = fingerprint(model, prompt, tools)
+        recorded = self.index['exact'].get(fp)
+        source = 'exact'
+        if recorded is None:
+            recorded = self.index['any_model'].get(fingerprint(None, prompt, tools))
+            source = 'any_model'
+        if recorded is None:
+            source = f'fallback_{self.fallback}'
+            if tools and not GAME_TOOLS & set(tools):
+                self.stats['fallback_off_turn'] += 1
+            if self.fallback == 'error':
+                self.stats[source] += 1
+                return 404, {'error': {'message': 'No recorded response for this request', 'fingerprint': fp}}
+            calls = legal_action(prompt, tools, int(fp[:8], 16)) if self.fallback == 'legal' else []
+            recorded = {'toolCalls': calls}
+        self.stats[source] += 1
+
+        tool_calls = [{
+            'id': f'call_{fp[:8]}_{i}',
+            'type': 'function',
+            'function': {'name': tc.get('name'),
+                         'arguments': tc['arguments'] if isinstance(tc.get('arguments'), str)
+                         else json.dumps(tc.get('arguments') or {})},
+        } for i, tc in enumerate(recorded['toolCalls']) if tc.get('name') in tools or not tools]
+        return 200, {
+            'id': f'replay-{fp}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': None, 'tool_calls': tool_calls},
+                'finish_reason': 'tool_calls' if tool_calls else 'stop',
+            }],
+            'usage': {'prompt_tokens': recorded.get('promptTokens') or 0,
+                      'completion_tokens': recorded.get('completionTokens') or 0},
+            'replay': {'source': source, 'fingerprint': fp,
+                       'delay_ms': (recorded.get('responseTime') or 0) * self.latency_scale},
+        }
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                length = int(headers.get('content-length') or 0)
+                raw = await reader.readexactly(length) if length else b''
+
+                if method == 'POST' and target.rstrip('/').endswith('/chat/completions'):
+                    try:
+                        status, payload = self.answer(json.loads(raw or b'{}'))
+                    except (ValueError, AttributeError) as e:
+                        status, payload = 400, {'error': {'message': f'Bad request: {e}'}}
+                    delay = payload.get('replay', {}).get('delay_ms', 0)
+                    if delay:
+                        await asyncio.sleep(delay / 1000)
+                elif method == 'GET' and target.rstrip('/') in ('/health', '/stats'):
+                    elapsed = max(time.time() - self.started, 1e-9)
+                    total = sum(n for k, n in self.stats.items() if k != 'fallback_off_turn')
+                    status, payload = 200, {'requests': total, 'qps': total / elapsed, **self.stats}
+                else:
+                    status, payload = 404, {'error': {'message': f'No route {method} {target}'}}
+
+                out = json.dumps(payload).encode()
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write((f'HTTP/1.1 {status} {"OK" if status == 200 else "Error"}\r\n'
+                              f'Content-Type: application/json\r\nContent-Length: {len(out)}\r\n'
+                              f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n').encode() + out)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        print(f"  Replaying {len(self.index['exact'])} recorded calls on http://{host}:{port}/v1 "
+              f"(fallback: {self.fallback})")
+        async with server:
+            await server.serve_forever()
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve recorded LLM responses over an OpenAI-style API.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_build = sub.add_parser('build', help='Index recorded request/response pairs')
+    p_build.add_argument('paths', nargs='*', help='Session files or directories')
+    p_serve = sub.add_parser('serve', help='Run the replay server')
+    p_serve.add_argument('--host', default='127.0.0.1')
+    p_serve.add_argument('--port', type=int, default=8765)
+    p_serve.add_argument('--fallback', choices=FALLBACKS, default='legal')
+    p_serve.add_argument('--latency-scale', type=float, default=0.0,
+                         help='Sleep this fraction of each recorded response time (0 = as fast as possible)')
+    for p in (p_build, p_serve):
+        p.add_argument('--index', default=DEFAULT_INDEX)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        index = build_index(args.paths or None)
+        save_index(index, args.index)
+        print(f"  {len(index['exact'])} fingerprints ({len(index['any_model'])} model-agnostic) -> {args.index}")
+        if index['skipped']:
+            print(f"  Skipped calls without a recorded prompt: {index['skipped']} "
+                  f"(those requests will use the fallback)")
+        return
+
+    server = ReplayServer(load_index(args.index), args.fallback, args.latency_scale)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print(f"\n  Served: {dict(server.stats)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Rules Engine
+A Python port of the game rules in js/game.js (identical in cli/HeadlessGame.js)
+for search: positions are immutable tuples, so they hash and memoize directly.
+
+Moves correspond 1:1 to the game tools a model calls in each phase:
+
+    selectChip        ('playChip', color)
+    selectPile        ('selectPile', pile)          pile = chip tuple, or None for a new pile
+    selectNextPlayer  ('chooseNextPlayer', player)
+    capture           ('killChip', color)
+    donation          ('respondToDonation', color)  color = None to refuse
+
+Colors and players are indices into COLORS. Piles are kept as a sorted tuple of
+chip tuples (bottom -> top): pile ids and order never affect the rules, so two
+positions that differ only in pile numbering are the same position.
+
+Deliberate simplifications: negotiation side-actions (givePrisoner, promises,
+trades) are not moves, and the dead box is not tracked (it never affects play).
+A selectChip player with no chips goes straight to donation, as the
+HeadlessGame loop does.
+"""
+
+COLORS = ['red', 'blue', 'green', 'yellow']
+
+SELECT_CHIP, SELECT_PILE, SELECT_NEXT, CAPTURE, DONATION, GAME_OVER = range(6)
+PHASES = ['selectChip', 'selectPile', 'selectNextPlayer', 'capture', 'donation', 'gameOver']
+
+# Position tuple fields
+SUPPLY, PRISONERS, ALIVE, PILES, CURRENT, PHASE, SELECTED, PENDING, DONOR, ASKED, WINNER = range(11)
+
+ALL_ALIVE = 0b1111
+
+
+def initial_position(chips=3, first=0):
+    return ((chips,) * 4, ((),) * 4, ALL_ALIVE, (), first, SELECT_CHIP, -1, None, -1, 0, -1)
+
+
+def _replace(pos, **changes):
+    fields = list(pos)
+    for name, value in changes.items():
+        fields[FIELD_INDEX[name]] = value
+    return tuple(fields)
+
+
+FIELD_INDEX = {
+    'supply': SUPPLY, 'prisoners': PRISONERS, 'alive': ALIVE, 'piles': PILES,
+    'current': CURRENT, 'phase': PHASE, 'selected': SELECTED, 'pending': PENDING,
+    'donor': DONOR, 'asked': ASKED, 'winner': WINNER,
+}
+
+
+def _set_item(t, i, value):
+    return t[:i] + (value,) + t[i + 1:]
+
+
+def _remove_one(t, value):
+    i = t.index(value)
+    return t[:i] + t[i + 1:]
+
+
+def _add_sorted(t, value):
+    return tuple(sorted(t + (value,)))
+
+
+def has_chips(pos, p):
+    return pos[SUPPLY][p] > 0 or len(pos[PRISONERS][p]) > 0
+
+
+def is_alive(pos, p):
+    return bool(pos[ALIVE] >> p & 1)
+
+
+def mover(pos):
+    """Player who decides in this position (the donor during donation)."""
+    return pos[DONOR] if pos[PHASE] == DONATION else pos[CURRENT]
+
+
+def is_terminal(pos):
+    return pos[PHASE] == GAME_OVER
+
+
+# =============================================================================
+# TRANSITIONS (mirroring Game methods of the same names)
+# =============================================================================
+
+def _settle(pos):
+    """A selectChip player with no chips triggers donation (HeadlessGame.gameLoop)."""
+    if pos[PHASE] == SELECT_CHIP and not has_chips(pos, pos[CURRENT]):
+        return start_donation(pos)
+    return pos
+
+
+def _check_win(pos):
+    alive = pos[ALIVE]
+    if alive & (alive - 1) == 0:
+        return _replace(pos, phase=GAME_OVER, winner=alive.bit_length() - 1,
+                        donor=-1, asked=0, pending=None, selected=-1)
+    return None
+
+
+def set_next_player(pos, p):
+    while not is_alive(pos, p):
+        p = (p + 1) % 4
+    pos = _replace(pos, current=p, pending=None)
+    if not has_chips(pos, p):
+        return start_donation(pos)
+    return _replace(pos, phase=SELECT_CHIP)
+
+
+def start_donation(pos):
+    return ask_next_donation(_replace(pos, phase=DONATION, asked=0, donor=-1))
+
+
+def ask_next_donation(pos):
+    requester = pos[CURRENT]
+    for i in (1, 2, 3):
+        idx = (requester + i) % 4
+        if is_alive(pos, idx) and not pos[ASKED] >> idx & 1 and pos[PRISONERS][idx]:
+            return _replace(pos, donor=idx)
+    return eliminate_player(_replace(pos, donor=-1), requester)
+
+
+def eliminate_player(pos, p):
+    pos = _replace(pos, alive=pos[ALIVE] & ~(1 << p), donor=-1, asked=0)
+    won = _check_win(pos)
+    if won:
+        return won
+    # Game.eliminatePlayer hands the turn to the *first* alive player by seat
+    next_alive = (pos[ALIVE] & -pos[ALIVE]).bit_length() - 1
+    pos = _replace(pos, current=next_alive)
+    if not has_chips(pos, next_alive):
+        return start_donation(pos)
+    return _replace(pos, phase=SELECT_CHIP)
+
+
+def determine_next_player(pos, pile):
+    present = set(pile)
+    missing = [c for c in range(4) if c not in present]
+    if not missing:
+        return set_next_player(pos, pile[0])
+    if len(missing) == 1:
+        return set_next_player(pos, missing[0])
+    valid = [c for c in missing if is_alive(pos, c)]
+    if len(valid) == 1:
+        return set_next_player(pos, valid[0])
+    if not valid:
+        for c in pile:
+            if is_alive(pos, c):
+                return set_next_player(pos, c)
+    return _replace(pos, phase=SELECT_NEXT, pending=pile)
+
+
+def play_chip(pos, color):
+    return _replace(pos, phase=SELECT_PILE, selected=color)
+
+
+def play_on_pile(pos, pile):
+    p = pos[CURRENT]
+    color = pos[SELECTED]
+    if color == p and pos[SUPPLY][p] > 0:
+        pos = _replace(pos, supply=_set_item(pos[SUPPLY], p, pos[SUPPLY][p] - 1))
+    else:
+        pos = _replace(pos, prisoners=_set_item(pos[PRISONERS], p, _remove_one(pos[PRISONERS][p], color)))
+
+    piles = pos[PILES]
+    if pile is None:
+        new_pile = (color,)
+        will_capture = False
+    else:
+        piles = _remove_one(piles, pile)
+        will_capture = pile[-1] == color
+        new_pile = pile + (color,)
+    pos = _replace(pos, selected=-1)
+
+    if will_capture:
+        if not is_alive(pos, color):
+            # Captured by an eliminated color: whole pile to the dead box, same player continues
+            return _settle(_replace(pos, piles=piles, phase=SELECT_CHIP))
+        return _replace(pos, piles=_add_sorted(piles, new_pile), current=color,
+                        phase=CAPTURE, pending=new_pile)
+    return determine_next_player(_replace(pos, piles=_add_sorted(piles, new_pile)), new_pile)
+
+
+def resolve_capture(pos, kill):
+    pile = pos[PENDING]
+    captured = _remove_one(pile, kill)
+    p = pos[CURRENT]
+    own = captured.count(p)
+    supply = _set_item(pos[SUPPLY], p, pos[SUPPLY][p] + own)
+    prisoners = _set_item(pos[PRISONERS], p, tuple(sorted(pos[PRISONERS][p] + tuple(c for c in captured if c != p))))
+    pos = _replace(pos, piles=_remove_one(pos[PILES], pile), supply=supply, prisoners=prisoners,
+                   pending=None, phase=SELECT_CHIP)
+    return _settle(pos)
+
+
+def handle_donation(pos, color):
+    donor = pos[DONOR]
+    pos = _replace(pos, asked=pos[ASKED] | (1 << donor))
+    if color is None:
+        return ask_next_donation(pos)
+    requester = pos[CURRENT]
+    prisoners = _set_item(pos[PRISONERS], donor, _remove_one(pos[PRISONERS][donor], color))
+    supply = pos[SUPPLY]
+    if color == requester:
+        supply = _set_item(supply, requester, supply[requester] + 1)
+    else:
+        prisoners = _set_item(prisoners, requester, _add_sorted(prisoners[requester], color))
+    return _replace(pos, supply=supply, prisoners=prisoners, phase=SELECT_CHIP, donor=-1, asked=0)
+
+
+def give_prisoner(pos, giver, receiver, color):
+    """
+    Game.givePrisoner: a free negotiation transfer, not a search move. Used
+    when replaying recorded games so later positions stay in sync.
+    """
+    prisoners = _set_item(pos[PRISONERS], giver, _remove_one(pos[PRISONERS][giver], color))
+    supply = pos[SUPPLY]
+    if color == receiver:
+        supply = _set_item(supply, receiver, supply[receiver] + 1)
+    else:
+        prisoners = _set_item(prisoners, receiver, _add_sorted(prisoners[receiver], color))
+    pos = _replace(pos, supply=supply, prisoners=prisoners)
+    if pos[CURRENT] == giver and pos[SELECTED] == color:
+        pos = _replace(pos, selected=-1, phase=SELECT_CHIP)
+    return pos
+
+
+# =============================================================================
+# MOVES
+# =============================================================================
+
+def legal_moves(pos):
+    """Distinct legal moves in a fixed order (identical piles/chips collapse to one move)."""
+    phase = pos[PHASE]
+    if phase == SELECT_CHIP:
+        p = pos[CURRENT]
+        colors = sorted(set(pos[PRISONERS][p]) | ({p} if pos[SUPPLY][p] > 0 else set()))
+        return [('playChip', c) for c in colors]
+    if phase == SELECT_PILE:
+        return [('selectPile', pile) for pile in sorted(set(pos[PILES]))] + [('selectPile', None)]
+    if phase == SELECT_NEXT:
+        present = set(pos[PENDING])
+        return [('chooseNextPlayer', c) for c in range(4) if c not in present and is_alive(pos, c)]
+    if phase == CAPTURE:
+        return [('killChip', c) for c in sorted(set(pos[PENDING]))]
+    if phase == DONATION:
+        return [('respondToDonation', None)] + [('respondToDonation', c)
+                                                for c in sorted(set(pos[PRISONERS][pos[DONOR]]))]
+    return []
+
+
+def apply_move(pos, move):
+    tool, arg = move
+    if tool == 'playChip':
+        return play_chip(pos, arg)
+    if tool == 'selectPile':
+        return play_on_pile(pos, arg)
+    if tool == 'chooseNextPlayer':
+        return set_next_player(pos, arg)
+    if tool == 'killChip':
+        return resolve_capture(pos, arg)
+    if tool == 'respondToDonation':
+        return handle_donation(pos, arg)
+    raise ValueError(f'Unknown move {move!r}')
+
+
+# =============================================================================
+# CONVERSION FROM RECORDED STATES
+# =============================================================================
+
+def position_from_state(state, selected=None, pending=None, donor=None, requester=None, asked=None):
+    """
+    Build a position from a getStateSnapshot-shaped dict (see game_state.py).
+    Prisoner colors must be known for every player. Phase-specific context the
+    snapshot does not carry is passed in: `selected` chip color (selectPile),
+    `pending` pile chips (capture / selectNextPlayer), `donor`/`requester`
+    colors (donation). Returns None if the state is incomplete.
+    """
+    players = state['players']
+    if any(p.get('prisoners') is None for p in players):
+        return None
+    idx = {c: i for i, c in enumerate(COLORS)}
+    supply = tuple(p['supply'] for p in players)
+    prisoners = tuple(tuple(sorted(idx[c] for c in p['prisoners'])) for p in players)
+    alive = sum(1 << i for i, p in enumerate(players) if p.get('alive', p.get('isAlive', True)))
+    piles = tuple(sorted(tuple(idx[c] for c in pile['chips']) for pile in state['piles'] if pile['chips']))
+    phase = PHASES.index(state['phase']) if state.get('phase') in PHASES else SELECT_CHIP
+    current = state.get('currentPlayer')
+    current = idx[current] if isinstance(current, str) else current
+
+    pending_pile = tuple(idx[c] for c in pending) if pending else None
+    if phase == CAPTURE and pending_pile is None and state.get('pendingCapture'):
+        pending_pile = tuple(idx[c] for c in state['pendingCapture']['chips'])
+    if phase in (CAPTURE, SELECT_NEXT) and (pending_pile is None or pending_pile not in piles):
+        return None
+    if phase == SELECT_PILE and selected is None:
+        return None
+    donor_idx = -1
+    if phase == DONATION:
+        if donor is None or requester is None:
+            return None
+        donor_idx = idx[donor]
+        current = idx[requester]
+        if asked is None:
+            # Everyone seated between the requester and the donor has been asked already
+            asked = 0
+            i = (current + 1) % 4
+            while i != donor_idx:
+                asked |= 1 << i
+                i = (i + 1) % 4
+    winner = -1
+    if phase == GAME_OVER or alive & (alive - 1) == 0:
+        phase = GAME_OVER
+        winner = alive.bit_length() - 1
+    return (supply, prisoners, alive, piles, current, phase,
+            idx[selected] if selected is not None else -1,
+            pending_pile, donor_idx, asked or 0, winner)
+
+
+def move_from_action(pos, tool, args, state=None):
+    """
+    Translate a recorded tool call into a move for `pos`. selectPile refers to a
+    pile id, so the recorded `state` (with ids) is needed to find its chips.
+    Returns None if the action does not map to a legal move.
+    """
+    idx = {c: i for i, c in enumerate(COLORS)}
+    args = args or {}
+    if tool == 'playChip':
+        move = ('playChip', idx.get(args.get('color')))
+    elif tool == 'selectPile':
+        pile_id = args.get('pileId')
+        if pile_id in (None, 'new', 'null'):
+            move = ('selectPile', None)
+        else:
+            try:
+                pile_id = int(pile_id)
+            except (TypeError, ValueError):
+                move = ('selectPile', None)
+            else:
+                chips = next((p['chips'] for p in (state or {}).get('piles', []) if p['id'] == pile_id), None)
+                if chips is None:
+                    return None
+                move = ('selectPile', tuple(idx[c] for c in chips))
+    elif tool == 'chooseNextPlayer':
+        try:
+            player = int(args.get('playerId'))
+        except (TypeError, ValueError):
+            return None
+        # Game.chooseNextPlayer accepts any seat, not just the missing colors
+        return ('chooseNextPlayer', player) if 0 <= player <= 3 and pos[PHASE] == SELECT_NEXT else None
+    elif tool == 'killChip':
+        move = ('killChip', idx.get(args.get('color') or args.get('chipColor')))
+    elif tool == 'respondToDonation':
+        move = ('respondToDonation', idx.get(args.get('color')) if args.get('accept') else None)
+    else:
+        return None
+    return move if move in legal_moves(pos) else None
+
+
+def describe_move(move):
+    tool, arg = move
+    if tool == 'selectPile':
+        return 'selectPile(new)' if arg is None else f"selectPile([{' > '.join(COLORS[c] for c in arg)}])"
+    if tool == 'respondToDonation':
+        return 'respondToDonation(refuse)' if arg is None else f'respondToDonation({COLORS[arg]})'
+    return f'{tool}({COLORS[arg]})'
+
+
+def chips_in_play(pos):
+    """Chips still on the board or in hand - a rough measure of remaining game size."""
+    return sum(pos[SUPPLY]) + sum(map(len, pos[PRISONERS])) + sum(map(len, pos[PILES]))
+
+
+def matches_state(pos, state):
+    """Whether a replayed position agrees with a recorded (possibly prompt-parsed) state."""
+    idx = {c: i for i, c in enumerate(COLORS)}
+    players = state['players']
+    if tuple(p['supply'] for p in players) != pos[SUPPLY]:
+        return False
+    for p, mine in zip(players, pos[PRISONERS]):
+        if p.get('prisoners') is not None:
+            if tuple(sorted(idx[c] for c in p['prisoners'])) != mine:
+                return False
+        elif p.get('prisonerCount', 0) != len(mine):
+            return False
+    alive = sum(1 << i for i, p in enumerate(players) if p.get('alive', True))
+    piles = tuple(sorted(tuple(idx[c] for c in pile['chips']) for pile in state['piles'] if pile['chips']))
+    return alive == pos[ALIVE] and piles == pos[PILES]
+
+
+GAME_TOOLS = ('playChip', 'selectPile', 'chooseNextPlayer', 'killChip', 'respondToDonation')
+
+
+def replay_decisions(data):
+    """
+    Replay every game in a session from its game_start state, applying each
+    executed game action and givePrisoner transfer in snapshot order, and yield
+    one record per decision that made a game move:
+
+        {'game', 'turn', 'player', 'model', 'phase', 'position', 'move', 'state'}
+
+    `position` is the full position before the move (prisoner colors included,
+    which the prompts alone do not reveal). If the replay ever disagrees with a
+    recorded state (missing snapshots, auto-recovery moves), the rest of that
+    game is skipped rather than labelled from a wrong position.
+    """
+    from corpus import iter_game_snapshots
+    from game_state import state_from_snapshot
+
+    idx = {c: i for i, c in enumerate(COLORS)}
+    pos = None
+    for game, snap in iter_game_snapshots(data):
+        kind = snap['type']
+        if kind == 'game_start':
+            pos = position_from_state(snap['state']) if snap.get('state') else None
+            continue
+        if kind == 'game_end' or pos is None:
+            pos = None
+            continue
+        executed = [e for e in snap.get('execution') or [] if e.get('success')]
+        state = state_from_snapshot(snap) if kind == 'decision' else None
+        if state is not None and not matches_state(pos, state):
+            pos = None
+            continue
+        player = idx.get(snap.get('player'))
+        for ex in executed:
+            tool = ex.get('tool')
+            args = ex.get('args') or {}
+            if tool == 'givePrisoner':
+                try:
+                    pos = give_prisoner(pos, player, int(args['toPlayerId']), idx[args['color']])
+                except (KeyError, ValueError, TypeError):
+                    pos = None
+                    break
+            elif tool in GAME_TOOLS and kind == 'decision':
+                move = move_from_action(pos, tool, args, state)
+                if move is None:
+                    pos = None
+                    break
+                if mover(pos) == player:
+                    yield {
+                        'game': game, 'turn': snap.get('turn', 0), 'player': snap.get('player'),
+                        'model': snap.get('model'), 'phase': PHASES[pos[PHASE]],
+                        'position': pos, 'move': move, 'state': state,
+                    }
+                pos = apply_move(pos, move)
+            if pos is None or is_terminal(pos):
+                break
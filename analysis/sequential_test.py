@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Sequential Testing
+Early-stopping advisor for simulation campaigns. Reads finished games from a
+live session log (or finished session files) and runs Wald's sequential
+probability ratio test on every pair of models, so a `cli/index.js --games N`
+run can stop as soon as each comparison is decided instead of playing all N.
+
+For a pair (A, B), every finished game with both models seated is one
+Bernoulli trial, taken in the order games finished:
+
+    order   A's best seat finishes above B's best seat (default). Under the
+            Plackett-Luce ratings of ratings.py P(A above B) = w_A / (w_A + w_B),
+            so this tests the rating difference.
+    win     A won, among games won by A or B (the win-rate difference).
+
+Games with a human seat are skipped unless --humans is given, which tests the
+humans as one more model, 'human'.
+
+H0 is p = 0.5, H1 is p = 0.5 + delta for A and for B. The two one-sided SPRTs
+run at alpha / (2 * pairs), Bonferroni over all pairs, with power 1 - beta,
+and each pair stops at the first game that crosses a boundary:
+
+    A better    A's log-likelihood ratio reached log((1 - beta) / alpha')
+    futility    both ratios fell to log(beta / (1 - alpha')): any difference
+                is smaller than delta
+    continue    otherwise, with a rough count of games still needed
+
+    node cli/index.js --games 200 --providers ... --stream --stop-file stop.flag
+    python sequential_test.py ../data_v2 --follow --stop-file ../stop.flag
+    python sequential_test.py ../data_v2/session-X.json --metric win   # replay a finished campaign
+"""
+
+import argparse
+import json
+import math
+import time
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+
+import outcome_table
+from corpus import find_session_files, iter_game_snapshots, load_session
+from session_tail import NDJSONTail, newest_log
+
+METRICS = ('order', 'win')
+
+
+# =============================================================================
+# GAMES
+# =============================================================================
+
+class Campaign:
+    """Models and finishing places of finished games, in the order they finished."""
+
+    def __init__(self, chips=None, humans=False):
+        self.chips = chips
+        self.humans = humans
+        self.session = {}
+        self.starts = {}
+        self.models = []
+        self.ranks = []
+        self.finished = False
+
+    def new_session(self, session=None):
+        self.session = dict(session or {})
+        self.starts = {}
+        self.finished = False
+
+    def consume(self, record, game=None):
+        kind = record.get('type')
+        if kind in ('session', 'session_end'):
+            self.session.update(record.get('session') or {})
+            self.finished = self.finished or kind == 'session_end'
+            return
+        game = record.get('game', game)
+        if kind == 'game_start':
+            self.starts[game] = record
+        elif kind == 'game_end':
+            start = self.starts.pop(game, {})
+            players = ((start.get('state') or {}).get('players')) or []
+            chips = players[0].get('totalChips') if players else self.session.get('chips')
+            if self.chips is not None and chips != self.chips:
+                return
+            if not self.humans and any(outcome_table.human_seats(start, self.session)):
+                return
+            self.models.append(outcome_table.game_models(start, self.session))
+            self.ranks.append(outcome_table.finishing_places(record))
+
+    def arrays(self):
+        if not self.models:
+            return np.zeros((0, 4), dtype=str), np.zeros((0, 4), np.int8)
+        return np.array(self.models), np.array(self.ranks)
+
+
+def load_campaign(paths, chips=None, humans=False):
+    """A Campaign from session files; NDJSON logs are read in the order lines were written."""
+    campaign = Campaign(chips, humans)
+    for path in find_session_files(paths):
+        if str(path).endswith('.ndjson'):
+            campaign.new_session()
+            for record in NDJSONTail(path).read_new():
+                campaign.consume(record)
+            continue
+        data = load_session(path)
+        if data is None:
+            continue
+        campaign.new_session(data.get('session'))
+        for game, snap in iter_game_snapshots(data):
+            campaign.consume(snap, game)
+    return campaign
+
+
+# =============================================================================
+# SPRT
+# =============================================================================
+
+def pair_trials(models, ranks, a, b, metric='order'):
+    """(outcomes (True = A ahead), game index) of the games that are trials for the pair."""
+    big = np.iinfo(np.int8).max
+    best_a = np.where(models == a, ranks, big).min(axis=1)
+    best_b = np.where(models == b, ranks, big).min(axis=1)
+    both = (best_a < big) & (best_b < big)
+    if metric == 'win':
+        unique_winner = (ranks == 1).sum(axis=1) == 1
+        a_won, b_won = both & unique_winner & (best_a == 1), both & unique_winner & (best_b == 1)
+        trial = a_won | b_won
+        return a_won[trial], np.flatnonzero(trial)
+    trial = both & (best_a != best_b)
+    return (best_a < best_b)[trial], np.flatnonzero(trial)
+
+
+def sprt(outcomes, alpha, beta, delta):
+    """
+    Two one-sided SPRTs of p = 0.5 against 0.5 + delta (A ahead) and 0.5 - delta
+    (B ahead). Returns (decision, trial it was reached at or None, final LLRs,
+    whether each side has already accepted H0).
+    """
+    upper, lower = math.log((1 - beta) / alpha), math.log(beta / (1 - alpha))
+    up, down = math.log(2 * (0.5 + delta)), math.log(2 * (0.5 - delta))
+    ahead = np.asarray(outcomes, dtype=bool)
+    llr_a = np.cumsum(np.where(ahead, up, down))
+    llr_b = np.cumsum(np.where(ahead, down, up))
+    # The lower boundary is absorbing for each side on its own; futility needs both
+    a_out = np.maximum.accumulate(llr_a <= lower)
+    b_out = np.maximum.accumulate(llr_b <= lower)
+    crossed = {
+        'A better': (llr_a >= upper) & ~a_out,
+        'B better': (llr_b >= upper) & ~b_out,
+        'futility': a_out & b_out,
+    }
+    first = {name: int(np.argmax(hit)) for name, hit in crossed.items() if hit.any()}
+    if not len(ahead):
+        return 'continue', None, (0.0, 0.0), (False, False)
+    final = (float(llr_a[-1]), float(llr_b[-1]))
+    out = (bool(a_out[-1]), bool(b_out[-1]))
+    if not first:
+        return 'continue', None, final, out
+    decision = min(first, key=first.get)
+    return decision, first[decision] + 1, final, out
+
+
+def trials_to_go(outcomes, llrs, out, alpha, beta, delta):
+    """
+    Rough trials until the nearest decision at the observed drift: one side
+    reaching the upper boundary, or both sides reaching the lower one. None if
+    the drift approaches neither.
+    """
+    upper, lower = math.log((1 - beta) / alpha), math.log(beta / (1 - alpha))
+    if len(outcomes) == 0:
+        return None
+    p = float(np.mean(outcomes))
+    up, down = math.log(2 * (0.5 + delta)), math.log(2 * (0.5 - delta))
+    better, futile = [], []
+    for llr, q, done in zip(llrs, (p, 1 - p), out):
+        drift = q * up + (1 - q) * down
+        if done:
+            futile.append(0.0)
+        elif drift > 0:
+            better.append((upper - llr) / drift)
+        elif drift < 0:
+            futile.append((lower - llr) / drift)
+    candidates = better + ([max(futile)] if len(futile) == 2 else [])
+    return math.ceil(min(candidates)) if candidates else None
+
+
+def advise(campaign, metric='order', alpha=0.05, beta=0.2, delta=0.15):
+    """One result per model pair: decision, trials, A-ahead count, LLRs, and the game (1-based) it was decided at."""
+    models, ranks = campaign.arrays()
+    names = sorted(set(models.ravel().tolist()))
+    pairs = list(combinations(names, 2))
+    alpha_pair = alpha / (2 * max(len(pairs), 1))
+    results = []
+    for a, b in pairs:
+        outcomes, games = pair_trials(models, ranks, a, b, metric)
+        decision, at, llrs, out = sprt(outcomes, alpha_pair, beta, delta)
+        per_game = len(outcomes) / len(models) if len(models) else 0
+        to_go = trials_to_go(outcomes, llrs, out, alpha_pair, beta, delta) if decision == 'continue' else None
+        results.append({
+            'a': a, 'b': b,
+            'decision': {'A better': f'{a} better', 'B better': f'{b} better'}.get(decision, decision),
+            'decided': decision != 'continue',
+            'trials': len(outcomes),
+            'a_ahead': int(np.sum(outcomes)),
+            'llr_a': llrs[0], 'llr_b': llrs[1],
+            'at_game': int(games[at - 1]) + 1 if at else None,
+            'games_to_go': math.ceil(to_go / per_game) if to_go and per_game else None,
+        })
+    return results
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def print_section(title):
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def render(results, games, args):
+    pairs = max(len(results), 1)
+    alpha_pair = args.alpha / (2 * pairs)
+    print_section(f"SEQUENTIAL TEST ({args.metric}): {games} games, "
+                  f"{sum(r['decided'] for r in results)}/{len(results)} pairs decided")
+    print(f"  H1: p = {0.5 + args.delta:.2f}   alpha {args.alpha} over {len(results)} pairs "
+          f"({alpha_pair:.4f} per side)   power {1 - args.beta:.0%}")
+    print(f"  Boundaries: LLR >= {math.log((1 - args.beta) / alpha_pair):+.2f} accept, "
+          f"<= {math.log(args.beta / (1 - alpha_pair)):+.2f} reject")
+    print(f"\n  {'Pair':<36} {'Trials':>6} {'A ahead':>8} {'LLR A':>7} {'LLR B':>7}  Decision")
+    print(f"  {'-'*84}")
+    for r in results:
+        if r['decided']:
+            status = f"{r['decision']} (game {r['at_game']})"
+        elif r['games_to_go']:
+            status = f"continue (~{r['games_to_go']} more games)"
+        else:
+            status = 'continue'
+        pair = f"{r['a']} vs {r['b']}"
+        print(f"  {pair:<36} {r['trials']:>6} {r['a_ahead']:>8} {r['llr_a']:>+7.2f} {r['llr_b']:>+7.2f}  {status}")
+    if results and all(r['decided'] for r in results):
+        last = max(r['at_game'] for r in results)
+        print(f"\n  Every pair decided by game {last} of {games} ({games - last} games not needed)")
+
+
+def should_stop(results, when):
+    if not results:
+        return False
+    decided = [r['decided'] for r in results]
+    return any(decided) if when == 'any' else all(decided)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sequential tests of model pairs for early stopping.')
+    parser.add_argument('paths', nargs='*', help='Session files or directories (default: ../data_v2)')
+    parser.add_argument('--metric', choices=METRICS, default='order',
+                        help='order: A finishes above B; win: A won among games won by A or B')
+    parser.add_argument('--alpha', type=float, default=0.05, help='Family-wise false positive rate')
+    parser.add_argument('--beta', type=float, default=0.2, help='False negative rate at --delta')
+    parser.add_argument('--delta', type=float, default=0.15, help='Smallest difference worth detecting (p - 0.5)')
+    parser.add_argument('--chips', type=int, help='Only games with this many chips per player')
+    parser.add_argument('--humans', action='store_true', help="Include games with a human seat (as model 'human')")
+    parser.add_argument('--follow', action='store_true', help='Follow the newest NDJSON log until it ends')
+    parser.add_argument('--interval', type=float, default=10.0, help='Seconds between polls (--follow)')
+    parser.add_argument('--stop-file', help='Create this file when the campaign can stop (cli/index.js --stop-file)')
+    parser.add_argument('--stop-when', choices=['all', 'any'], default='all',
+                        help='Stop once all pairs (default) or any pair is decided')
+    args = parser.parse_args()
+    if not 0 < args.delta < 0.5:
+        parser.error('--delta must be between 0 and 0.5')
+
+    def check(campaign):
+        results = advise(campaign, args.metric, args.alpha, args.beta, args.delta)
+        render(results, len(campaign.models), args)
+        if args.stop_file and should_stop(results, args.stop_when):
+            if not Path(args.stop_file).exists():
+                with open(args.stop_file, 'w') as f:
+                    json.dump({'games': len(campaign.models), 'metric': args.metric, 'results': results}, f, indent=2)
+                print(f"\n  Decided: wrote {args.stop_file}")
+            return True
+        return False
+
+    if not args.follow:
+        check(load_campaign(args.paths or None, args.chips, args.humans))
+        return
+
+    path = newest_log(args.paths[0] if args.paths else Path(__file__).parent.parent / 'data_v2')
+    if path is None:
+        print("No .ndjson session logs to follow (run cli/index.js with --stream)")
+        return
+    tail = NDJSONTail(path)
+    campaign = Campaign(args.chips, args.humans)
+    try:
+        while True:
+            before = len(campaign.models)
+            for record in tail.read_new():
+                campaign.consume(record)
+            if len(campaign.models) > before or campaign.finished:
+                if check(campaign) or campaign.finished:
+                    break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        check(campaign)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Live Session Tailer
+Follows the append-only NDJSON log written by `node cli/index.js --stream` and
+keeps running aggregates up to date as snapshots arrive: per-model win rates
+(with Wilson intervals), game length, message volume and the hallucination
+flags from hallucination_analysis.py. Off-turn snapshots carry no board
+state, so Halluc/100 is per message sent from a decision snapshot.
+
+Each poll reads only the bytes appended since the last one; a partially
+written last line is held back until it is complete. Every snapshot updates
+the aggregates once, so the cost of a refresh is O(new snapshots).
+
+    python session_tail.py ../data_v2                 # newest *.ndjson in the directory
+    python session_tail.py ../data_v2/session-X.ndjson --interval 5
+    python session_tail.py ../data_v2 --once          # summarize what is there and exit
+"""
+
+import argparse
+import json
+import math
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from corpus import COLORS, iter_messages
+from game_state import state_from_snapshot
+from hallucination_analysis import detect_chip_hallucinations, detect_pile_hallucinations
+
+
+def wilson_interval(wins, n, z=1.96):
+    if n == 0:
+        return 0.0, 0.0
+    p = wins / n
+    centre = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def _detector_state(state):
+    """The {'num_piles', 'players'} view the hallucination detectors expect."""
+    players = {}
+    for p in state.get('players') or []:
+        prisoners = p.get('prisoners')
+        if prisoners is None:
+            prisoners = [None] * p.get('prisonerCount', 0)
+        players[p['color']] = {'supply': p.get('supply', 0), 'prisoners': prisoners}
+    return {'num_piles': len(state.get('piles') or []), 'players': players}
+
+
+class LiveStats:
+    """Aggregates updated one snapshot at a time."""
+
+    def __init__(self):
+        self.session = {}
+        self.finished = False
+        self.snapshots = 0
+        self.game_models = {}            # game -> {color: model}
+        self.games_started = 0
+        self.games_done = 0
+        self.turns = []
+        self.played = defaultdict(int)   # model -> seats in finished games
+        self.wins = defaultdict(int)
+        self.messages = defaultdict(int)
+        self.checked = defaultdict(int)  # messages with a board state to check (decision snapshots)
+        self.hallucinations = defaultdict(int)
+
+    def model(self, game, color):
+        models = self.game_models.get(game) or {}
+        return models.get(color) or (self.session.get('playerModels') or {}).get(color) or color
+
+    def consume(self, record):
+        kind = record.get('type')
+        if kind in ('session', 'session_end'):
+            self.session.update(record.get('session') or {})
+            self.finished = self.finished or kind == 'session_end'
+            return
+        self.snapshots += 1
+        game = record.get('game')
+        if kind == 'game_start':
+            self.games_started += 1
+            self.game_models[game] = {m['player']: m['model'] for m in record.get('models') or []}
+        elif kind == 'game_end':
+            self.games_done += 1
+            self.turns.append(record.get('turns', 0))
+            for color in COLORS:
+                self.played[self.model(game, color)] += 1
+            if record.get('winner'):
+                self.wins[self.model(game, record['winner'])] += 1
+            self.game_models.pop(game, None)
+        elif kind in ('decision', 'off_turn'):
+            texts = [m['text'] for m in iter_messages({'snapshots': [record]}) if m['tool'] == 'sendChat']
+            if not texts:
+                return
+            model = self.model(game, record.get('player'))
+            self.messages[model] += len(texts)
+            state = state_from_snapshot(record) if kind == 'decision' else None
+            if state:
+                view = _detector_state(state)
+                self.checked[model] += len(texts)
+                for text in texts:
+                    if detect_pile_hallucinations(text, view) or detect_chip_hallucinations(text, view):
+                        self.hallucinations[model] += 1
+
+
+class NDJSONTail:
+    """Reads complete lines appended to a file since the previous call."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.offset = 0
+        self.partial = b''
+
+    def read_new(self):
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read()
+        self.offset += len(chunk)
+        lines = (self.partial + chunk).split(b'\n')
+        self.partial = lines.pop()
+        records = []
+        for line in lines:
+            if line.strip():
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return records
+
+
+def newest_log(path):
+    path = Path(path)
+    if path.is_file():
+        return path
+    logs = sorted(path.rglob('*.ndjson'), key=lambda p: p.stat().st_mtime)
+    return logs[-1] if logs else None
+
+
+def render(stats, path):
+    print("\n" + "=" * 70)
+    print(f"  LIVE: {path.name}  ({stats.snapshots} snapshots, "
+          f"{stats.games_done}/{stats.session.get('totalGames', '?')} games done, "
+          f"{stats.games_started - stats.games_done} running)")
+    print("=" * 70)
+    if stats.turns:
+        print(f"  Mean turns/game: {sum(stats.turns) / len(stats.turns):.1f}")
+    models = sorted(set(stats.played) | set(stats.messages))
+    print(f"\n  {'Model':<22} {'Games':>6} {'Win rate':>9} {'95% CI':>15} {'Msgs':>7} {'Halluc/100':>11}")
+    print(f"  {'-'*74}")
+    for model in models:
+        n, w = stats.played[model], stats.wins[model]
+        lo, hi = wilson_interval(w, n)
+        rate = f"{w / n:.1%}" if n else '-'
+        msgs, checked = stats.messages[model], stats.checked[model]
+        halluc = f"{100 * stats.hallucinations[model] / checked:.1f}" if checked else '-'
+        print(f"  {model:<22} {n:>6} {rate:>9} {f'{lo:.0%}-{hi:.0%}':>15} {msgs:>7} {halluc:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Follow a streaming NDJSON session log.')
+    parser.add_argument('path', nargs='?', default=Path(__file__).parent.parent / 'data_v2',
+                        help='NDJSON log, or a directory (newest log is followed)')
+    parser.add_argument('--interval', type=float, default=2.0, help='Seconds between polls')
+    parser.add_argument('--once', action='store_true', help='Read what is there, print, and exit')
+    args = parser.parse_args()
+
+    path = newest_log(args.path)
+    if path is None:
+        print(f"No .ndjson session logs under {args.path}")
+        return
+    tail = NDJSONTail(path)
+    stats = LiveStats()
+    try:
+        while True:
+            records = tail.read_new()
+            for record in records:
+                stats.consume(record)
+            if records or args.once:
+                render(stats, path)
+            if args.once or stats.finished:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        render(stats, path)
+
+
+if __name__ == '__main__':
+    main()
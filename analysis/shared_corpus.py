@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Shared-Memory Corpus
+Puts the columnar corpus tables (outcome_table.py, event_table.py) in one
+multiprocessing.shared_memory block so process-pool workers attach to them
+read-only instead of each re-loading and re-parsing the sessions.
+
+The parent copies every array into the block once. Workers get only a small
+handle (block name plus (key, dtype, shape, offset) per array) and build
+NumPy views over the shared buffer: nothing is pickled or copied per worker
+or per task, so N workers cost one corpus of RAM, with any start method.
+
+    with SharedCorpus.from_files() as corpus:
+        results = parallel_map(my_task, items, corpus, workers=8)
+
+    def my_task(item):
+        outcomes = section(worker_tables(), 'outcomes')
+        ...
+
+    python shared_corpus.py info
+    python shared_corpus.py bootstrap --resamples 20000 --workers 4   # win-rate CIs per model
+    python shared_corpus.py study --workers 4                         # event study, one type per worker
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+
+import event_study
+import outcome_table
+from corpus import COLORS
+
+ALIGN = 64
+
+
+def section(tables, prefix):
+    """The arrays of one source table, without the 'prefix.' namespace."""
+    start = prefix + '.'
+    return {k[len(start):]: v for k, v in tables.items() if k.startswith(start)}
+
+
+def _views(buf, layout):
+    tables = {}
+    for key, dtype, shape, offset in layout:
+        arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=buf, offset=offset)
+        arr.flags.writeable = False
+        tables[key] = arr
+    return tables
+
+
+class SharedCorpus:
+    """A dict of NumPy arrays in one shared-memory block; the creator owns (and unlinks) it."""
+
+    def __init__(self, tables):
+        arrays = {k: np.ascontiguousarray(v) for k, v in tables.items()}
+        layout = []
+        size = 0
+        for key, arr in arrays.items():
+            if arr.dtype.hasobject:
+                raise TypeError(f'{key}: object arrays cannot be shared')
+            size = -(-size // ALIGN) * ALIGN
+            layout.append((key, arr.dtype.str, arr.shape, size))
+            size += arr.nbytes
+        self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self.nbytes = size
+        for key, dtype, shape, offset in layout:
+            np.ndarray(shape, dtype=np.dtype(dtype), buffer=self.shm.buf, offset=offset)[...] = arrays[key]
+        self.handle = (self.shm.name, tuple(layout))
+        self.tables = _views(self.shm.buf, layout)
+
+    @classmethod
+    def from_files(cls, outcomes=outcome_table.DEFAULT_TABLE, events=event_study.DEFAULT_TABLES):
+        """Outcome and event tables (whichever exist) under 'outcomes.' and 'events.'."""
+        tables = {}
+        for prefix, path, load in (('outcomes', outcomes, outcome_table.load_table),
+                                   ('events', events, event_study.load_tables)):
+            if path and Path(path).exists():
+                tables.update((f'{prefix}.{k}', v) for k, v in load(path).items())
+        if not tables:
+            raise FileNotFoundError('No tables found; run outcome_table.py build / event_table.py first')
+        return cls(tables)
+
+    def close(self):
+        self.tables = {}
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach(handle):
+    """(shared block, read-only tables) for a SharedCorpus.handle; keep the block referenced."""
+    name, layout = handle
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, _views(shm.buf, layout)
+
+
+# =============================================================================
+# WORKER POOL
+# =============================================================================
+
+_worker = {}
+
+
+def _init_worker(handle):
+    _worker['shm'], _worker['tables'] = attach(handle)
+
+
+def worker_tables():
+    """The shared tables inside a parallel_map task."""
+    return _worker['tables']
+
+
+def parallel_map(func, items, corpus, workers=None, chunksize=1):
+    """list(map(func, items)) across processes that attach to `corpus` once each."""
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(corpus.handle,)) as pool:
+        return list(pool.map(func, items, chunksize=chunksize))
+
+
+# =============================================================================
+# TASKS
+# =============================================================================
+
+def _seat_table(outcomes):
+    """(model code per seat, win flag per seat, model names) for finished games."""
+    models = outcomes['models']
+    names, codes = np.unique(models, return_inverse=True)
+    wins = outcomes['winner'][:, None] == np.arange(len(COLORS))[None, :]
+    return codes.reshape(models.shape), wins, names
+
+
+def _bootstrap_chunk(task):
+    """Win rate per model for `n` resamples of games (one chunk of the bootstrap)."""
+    seed, n = task
+    codes, wins, names = _seat_table(section(worker_tables(), 'outcomes'))
+    games = len(codes)
+    rng = np.random.default_rng(seed)
+    out = np.empty((n, len(names)))
+    flat_codes = codes.ravel()
+    for i in range(n):
+        weight = np.repeat(np.bincount(rng.integers(0, games, games), minlength=games), codes.shape[1])
+        played = np.bincount(flat_codes, weight, len(names))
+        won = np.bincount(flat_codes, weight * wins.ravel(), len(names))
+        with np.errstate(invalid='ignore'):
+            out[i] = won / played
+    return out
+
+
+def _study_task(task):
+    event_type, window, role = task
+    return event_type, event_study.event_study(section(worker_tables(), 'events'), event_type, window, role)
+
+
+def bootstrap_win_rates(corpus, resamples=10000, workers=None, seed=0):
+    """{model: (win rate, lo, hi)} with 95% percentile CIs, resamples split across workers."""
+    workers = workers or os.cpu_count()
+    sizes = [resamples // workers + (i < resamples % workers) for i in range(workers)]
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    chunks = parallel_map(_bootstrap_chunk, [(s, n) for s, n in zip(seeds, sizes) if n], corpus, workers)
+    samples = np.concatenate(chunks)
+    codes, wins, names = _seat_table(section(corpus.tables, 'outcomes'))
+    point = np.bincount(codes.ravel(), wins.ravel(), len(names)) / np.bincount(codes.ravel(), minlength=len(names))
+    lo, hi = np.nanpercentile(samples, [2.5, 97.5], axis=0)
+    return {str(name): (point[i], lo[i], hi[i]) for i, name in enumerate(names)}
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def print_section(title):
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run corpus analyses on a shared-memory copy of the tables.')
+    parser.add_argument('command', choices=['info', 'bootstrap', 'study'])
+    parser.add_argument('--outcomes', default=outcome_table.DEFAULT_TABLE, help='outcome_table.py build output')
+    parser.add_argument('--events', default=event_study.DEFAULT_TABLES, help='event_table.py output')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--resamples', type=int, default=10000, help='Bootstrap resamples')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--window', type=int, default=5, help='Event study window (study)')
+    parser.add_argument('--role', choices=event_study.ROLES, default='actor')
+    args = parser.parse_args()
+
+    with SharedCorpus.from_files(args.outcomes, args.events) as corpus:
+        if args.command == 'info':
+            print_section(f'SHARED CORPUS ({corpus.nbytes / 1e6:.1f} MB in {corpus.shm.name})')
+            for key, arr in corpus.tables.items():
+                print(f"  {key:<28} {str(arr.dtype):<8} {str(arr.shape):<16} {arr.nbytes / 1e6:>8.2f} MB")
+            return
+
+        start = time.perf_counter()
+        if args.command == 'bootstrap':
+            rates = bootstrap_win_rates(corpus, args.resamples, args.workers, args.seed)
+            print_section(f'WIN RATE PER MODEL ({args.resamples} bootstrap resamples of games)')
+            print(f"\n  {'Model':<24} {'Win rate':>9} {'95% CI':>18}")
+            print(f"  {'-'*53}")
+            for model, (rate, lo, hi) in sorted(rates.items(), key=lambda kv: -kv[1][0]):
+                print(f"  {model:<24} {rate:>8.1%}   [{lo:>6.1%}, {hi:>6.1%}]")
+        else:
+            tasks = [(t, args.window, args.role) for t in event_study.EVENT_TYPES]
+            print_section(f'EVENT STUDY LEAD-UP vs BASELINE (Cohen\'s d, window {args.window}, {args.role})')
+            print(f"\n  {'Event':<18} {'Events':>7} " + ' '.join(f"{f[:12]:>12}" for f in event_study.FEATURES[:5]))
+            for event_type, result in parallel_map(_study_task, tasks, corpus, args.workers):
+                print(f"  {event_type:<18} {result['events']:>7} " +
+                      ' '.join(f"{d:>+12.2f}" for d in result['cohens_d'][:5]))
+        print(f"\n  {time.perf_counter() - start:.2f}s with {args.workers or os.cpu_count()} workers, "
+              f"{corpus.nbytes / 1e6:.1f} MB shared")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Exact Game-Tree Solver
+Solves positions exactly under the rules in rules.py and labels every recorded
+LLM move as optimal or not.
+
+Search is max^n (each player maximizes their own payoff; the winner gets 1):
+- transposition table keyed by the position's Zobrist hash (zobrist.py,
+  updated incrementally from parent to child), bounded with LRU eviction
+- immediate pruning: stop once the mover has found a forced win
+- shallow pruning: payoffs sum to 1, so once a child's mover can secure more
+  than the parent's mover would concede, the rest of that child is skipped
+  (pruned values are bounds and are never stored in the table)
+
+    python solver.py solve --chips 3 --first 0
+    python solver.py label ../data_v2 talking.json --max-chips 10
+"""
+
+import argparse
+import sys
+import time
+from collections import OrderedDict, defaultdict
+
+from corpus import find_session_files, load_session
+from rules import (
+    COLORS, apply_move, chips_in_play, describe_move, initial_position, is_terminal,
+    legal_moves, mover, replay_decisions, WINNER,
+)
+from zobrist import hash_position, rehash
+
+INF = float('inf')
+DEFAULT_MAX_ENTRIES = 2_000_000
+
+
+class SearchLimit(Exception):
+    """Raised when a search exceeds its node budget."""
+
+
+class Solver:
+    """Memoized max^n solver. Values are 4-tuples of payoffs (one winner gets 1)."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, node_limit=None):
+        self.max_entries = max_entries
+        self.node_limit = node_limit
+        self.table = OrderedDict()
+        self.nodes = 0
+        self.hits = 0
+        self._budget = None
+
+    def _lookup(self, key):
+        value = self.table.get(key)
+        if value is not None:
+            self.table.move_to_end(key)
+            self.hits += 1
+        return value
+
+    def _store(self, key, value):
+        self.table[key] = value
+        if len(self.table) > self.max_entries:
+            self.table.popitem(last=False)
+
+    def _search(self, pos, key, bound):
+        """
+        Returns (value, exact). `key` is the position's Zobrist hash. `bound` is
+        the payoff at which the parent's mover loses interest in this node:
+        reaching it for our mover prunes.
+        """
+        if is_terminal(pos):
+            value = [0.0] * 4
+            value[pos[WINNER]] = 1.0
+            return tuple(value), True
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached, True
+
+        self.nodes += 1
+        if self._budget is not None and self.nodes > self._budget:
+            raise SearchLimit()
+
+        me = mover(pos)
+        best = None
+        for move in legal_moves(pos):
+            child = apply_move(pos, move)
+            child_mover = None if is_terminal(child) else mover(child)
+            # Shallow pruning only applies across a change of mover
+            child_bound = INF if best is None or child_mover == me else 1.0 - best[me]
+            value, _ = self._search(child, rehash(pos, key, child), child_bound)
+            if best is None or value[me] > best[me]:
+                best = value
+            if best[me] >= 1.0:
+                break  # immediate pruning: a forced win cannot be improved on
+            if best[me] >= bound:
+                return best, False
+        self._store(key, best)
+        return best, True
+
+    def value(self, pos):
+        """Exact payoff vector of a position."""
+        self._budget = None if self.node_limit is None else self.nodes + self.node_limit
+        return self._search(pos, hash_position(pos), INF)[0]
+
+    def move_values(self, pos):
+        """Exact payoff vector after each legal move: [(move, value)]."""
+        self._budget = None if self.node_limit is None else self.nodes + self.node_limit
+        key = hash_position(pos)
+        values = []
+        for move in legal_moves(pos):
+            child = apply_move(pos, move)
+            values.append((move, self._search(child, rehash(pos, key, child), INF)[0]))
+        return values
+
+
+def label_move(solver, pos, move):
+    """
+    Score one recorded move. For the mover, every legal move is worth 0 or 1
+    under max^n, so regret is 1 exactly when a winning move was available and
+    a losing one was played.
+    """
+    values = solver.move_values(pos)
+    me = mover(pos)
+    best = max(v[me] for _, v in values)
+    chosen = next((v[me] for m, v in values if m == move), None)
+    if chosen is None:
+        # Off-menu chooseNextPlayer (the game accepts any seat)
+        chosen = solver.value(apply_move(pos, move))[me]
+    return {
+        'best': best,
+        'chosen': chosen,
+        'regret': best - chosen,
+        'optimal': chosen >= best,
+        'winning_moves': [describe_move(m) for m, v in values if v[me] >= best],
+    }
+
+
+def label_archive(paths=None, max_chips=10, node_limit=50_000, max_entries=DEFAULT_MAX_ENTRIES):
+    """Label every replayable decision with at most `max_chips` chips left in play."""
+    solver = Solver(max_entries=max_entries, node_limit=node_limit)
+    labels = []
+    skipped = defaultdict(int)
+    for path in find_session_files(paths):
+        data = load_session(path)
+        if data is None:
+            continue
+        for rec in replay_decisions(data):
+            if chips_in_play(rec['position']) > max_chips:
+                skipped['too large'] += 1
+                continue
+            try:
+                label = label_move(solver, rec['position'], rec['move'])
+            except SearchLimit:
+                skipped['node limit'] += 1
+                continue
+            label.update({k: rec[k] for k in ('game', 'turn', 'player', 'model', 'phase')})
+            label['move'] = describe_move(rec['move'])
+            labels.append(label)
+    return labels, dict(skipped), solver
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def print_section(title):
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exact solver for So Long Sucker positions.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_solve = sub.add_parser('solve', help='Solve a fresh game')
+    p_solve.add_argument('--chips', type=int, default=3)
+    p_solve.add_argument('--first', type=int, default=0, help='Seat to move first (0=red)')
+    p_label = sub.add_parser('label', help='Label recorded decisions as optimal or not')
+    p_label.add_argument('paths', nargs='*', help='Session files or directories')
+    p_label.add_argument('--max-chips', type=int, default=10, help='Only positions with this many chips left in play')
+    p_label.add_argument('--node-limit', type=int, default=50_000, help='Give up on a position after this many nodes')
+    for p in (p_solve, p_label):
+        p.add_argument('--max-entries', type=int, default=DEFAULT_MAX_ENTRIES, help='Transposition table size')
+    args = parser.parse_args()
+    sys.setrecursionlimit(100_000)
+
+    start = time.time()
+    if args.command == 'solve':
+        solver = Solver(max_entries=args.max_entries)
+        values = solver.move_values(initial_position(args.chips, args.first))
+        elapsed = time.time() - start
+        print_section(f"{args.chips}-CHIP GAME, {COLORS[args.first].upper()} TO MOVE")
+        for move, value in values:
+            print(f"  {describe_move(move):<24} winner: {COLORS[value.index(1.0)]}")
+        print(f"\n  {solver.nodes:,} nodes, {len(solver.table):,} table entries, "
+              f"{solver.nodes / max(elapsed, 1e-9):,.0f} nodes/s")
+        return
+
+    labels, skipped, solver = label_archive(args.paths or None, args.max_chips, args.node_limit, args.max_entries)
+    elapsed = time.time() - start
+    print_section(f"MOVE QUALITY ({len(labels)} decisions solved)")
+    by_model = defaultdict(list)
+    for label in labels:
+        by_model[label['model'] or label['player']].append(label)
+    print(f"\n  {'Model':<20} {'Solved':>7} {'Optimal':>9} {'Blunders':>9}")
+    print(f"  {'-'*48}")
+    for model, rows in sorted(by_model.items()):
+        optimal = sum(r['optimal'] for r in rows)
+        blunders = sum(r['regret'] >= 1.0 for r in rows)
+        print(f"  {model:<20} {len(rows):>7} {optimal / len(rows):>8.1%} {blunders:>9}")
+    if skipped:
+        print(f"\n  Skipped: " + ', '.join(f"{n} {why}" for why, n in skipped.items()))
+    print(f"  {solver.nodes:,} nodes in {elapsed:.1f}s ({solver.nodes / max(elapsed, 1e-9):,.0f} nodes/s, "
+          f"{solver.hits:,} table hits)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Targeting Tensor
+Kill counts indexed by attacker model x victim model x chip config x mode x
+game phase, built in one vectorized pass from the columnar tables
+(event_table.py kills joined to outcome_table.py games) instead of
+re-scanning toolCalls per analysis.
+
+    mode    talking | silent | vs_human (a browser game with a human seat;
+            human seats are the model 'human')
+    phase   early | mid | late (thirds of the game's turns)
+
+Kills of a player's own chips and kills in games without a game_end are left
+out. Alongside the counts the tensor keeps seat exposure (model x chips x
+mode), so rates per game seat come from the same file. Tensors built from
+different corpora merge by label, and figures read slices of the saved file:
+
+    python targeting.py build                          # cache/event_study.npz + cache/outcomes.npz
+    python targeting.py merge phase1.npz phase2.npz --out cache/targeting.npz
+    python targeting.py show --by attacker,victim --chips 7 --mode talking
+    python targeting.py show --by victim,phase --mode vs_human
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+import event_study
+import outcome_table
+from corpus import HUMAN
+
+DEFAULT_TENSOR = Path(__file__).parent / 'cache' / 'targeting.npz'
+AXES = ('attacker', 'victim', 'chips', 'mode', 'phase')
+MODES = ('talking', 'silent', 'vs_human')
+PHASES = ('early', 'mid', 'late')
+
+
+class TargetingTensor:
+    """counts (attacker, victim, chips, mode, phase) and seats (model, chips, mode) with their labels."""
+
+    def __init__(self, models, chips, counts=None, seats=None):
+        self.models = [str(m) for m in models]
+        self.chips = [int(c) for c in chips]
+        shape = (len(self.models), len(self.models), len(self.chips), len(MODES), len(PHASES))
+        self.counts = np.zeros(shape, dtype=np.int64) if counts is None else counts
+        self.seats = np.zeros((len(self.models), len(self.chips), len(MODES)), np.int64) if seats is None else seats
+
+    def labels(self, axis):
+        return {'attacker': self.models, 'victim': self.models, 'chips': self.chips,
+                'mode': list(MODES), 'phase': list(PHASES)}[axis]
+
+    def _reindexed(self, models, chips):
+        """Copy of the arrays on larger (superset) label axes."""
+        m = np.array([models.index(x) for x in self.models], dtype=np.int64)
+        c = np.array([chips.index(x) for x in self.chips], dtype=np.int64)
+        other = TargetingTensor(models, chips)
+        other.counts[np.ix_(m, m, c)] = self.counts
+        other.seats[np.ix_(m, c)] = self.seats
+        return other
+
+    def merge(self, other):
+        """Sum of two tensors over the union of their model and chip labels."""
+        models = sorted(set(self.models) | set(other.models))
+        chips = sorted(set(self.chips) | set(other.chips))
+        a, b = self._reindexed(models, chips), other._reindexed(models, chips)
+        return TargetingTensor(models, chips, a.counts + b.counts, a.seats + b.seats)
+
+    __add__ = merge
+
+    def select(self, **filters):
+        """
+        Kill counts with each filtered axis restricted to a label or list of
+        labels (a single label drops the axis). Returns (array, kept axis names).
+        """
+        counts = self.counts
+        axes = list(AXES)
+        for axis in AXES:
+            value = filters.get(axis)
+            if value is None:
+                continue
+            labels = self.labels(axis)
+            where = axes.index(axis)
+            if isinstance(value, (list, tuple)):
+                counts = np.take(counts, [labels.index(v) for v in value], axis=where)
+            else:
+                counts = np.take(counts, labels.index(value), axis=where)
+                axes.pop(where)
+        return counts, axes
+
+    def total(self, by, **filters):
+        """Kill counts summed over every axis not in `by` (in `by` order), after select()."""
+        counts, axes = self.select(**filters)
+        keep = [axes.index(a) for a in by]
+        summed = counts.sum(axis=tuple(i for i in range(len(axes)) if i not in keep))
+        return summed.transpose([sorted(keep).index(i) for i in keep])
+
+    def save(self, path=DEFAULT_TENSOR):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(path, models=np.array(self.models, dtype=str), chips=np.array(self.chips),
+                            counts=self.counts, seats=self.seats)
+
+    @classmethod
+    def load(cls, path=DEFAULT_TENSOR):
+        with np.load(path) as z:
+            return cls(z['models'].tolist(), z['chips'].tolist(), z['counts'], z['seats'])
+
+
+# =============================================================================
+# BUILD
+# =============================================================================
+
+def game_labels(outcomes):
+    """'<session>:<game>' per outcome row, as event_table.py labels games."""
+    game = np.where(outcomes['game'] == -1, 'None', outcomes['game'].astype(str))
+    return np.char.add(np.char.add(outcomes['session'], ':'), game)
+
+
+def game_modes(outcomes):
+    human = outcomes.get('human')
+    mode = np.where(outcomes['silent'], MODES.index('silent'), MODES.index('talking'))
+    return mode if human is None else np.where(human.any(axis=1), MODES.index('vs_human'), mode)
+
+
+def build_tensor(events, outcomes):
+    """TargetingTensor of every kill in `events` whose game is in `outcomes`; returns (tensor, unmatched kills)."""
+    models = outcomes['models']
+    names, codes = np.unique(models, return_inverse=True)
+    codes = codes.reshape(models.shape)
+    chips, chip_code = np.unique(outcomes['chips'], return_inverse=True)
+    mode = game_modes(outcomes)
+
+    # Game codes of the event table -> outcome rows (-1 = unfinished game)
+    labels = game_labels(outcomes)
+    order = np.argsort(labels)
+    pos = np.searchsorted(labels[order], events['games']).clip(0, max(len(labels) - 1, 0))
+    found = labels[order][pos] == events['games'] if len(labels) else np.zeros(len(events['games']), bool)
+    row_of_game = np.where(found, order[pos], -1)
+
+    kill = events['ev_type'] == event_study.EVENT_TYPES.index('kill')
+    actor, target = events['ev_actor'][kill].astype(np.int64), events['ev_target'][kill].astype(np.int64)
+    row = row_of_game[events['ev_game'][kill]]
+    valid = (row >= 0) & (actor >= 0) & (target >= 0) & (actor != target)
+    row, actor, target, turn = row[valid], actor[valid], target[valid], events['ev_turn'][kill][valid]
+
+    turns = np.maximum(outcomes['turns'][row], 1)
+    phase = (turn >= 0.33 * turns).astype(np.int64) + (turn >= 0.66 * turns)
+    tensor = TargetingTensor(names, chips)
+    flat = np.ravel_multi_index((codes[row, actor], codes[row, target], chip_code[row], mode[row], phase),
+                                tensor.counts.shape)
+    tensor.counts += np.bincount(flat, minlength=tensor.counts.size).reshape(tensor.counts.shape)
+    seat_flat = np.ravel_multi_index((codes.ravel(), np.repeat(chip_code, codes.shape[1]),
+                                      np.repeat(mode, codes.shape[1])), tensor.seats.shape)
+    tensor.seats += np.bincount(seat_flat, minlength=tensor.seats.size).reshape(tensor.seats.shape)
+    return tensor, int(kill.sum() - valid.sum())
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def print_section(title):
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Attacker x victim x chips x mode x phase kill counts.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_build = sub.add_parser('build', help='Build from the event and outcome tables')
+    p_build.add_argument('--events', default=event_study.DEFAULT_TABLES, help='event_table.py output')
+    p_build.add_argument('--outcomes', default=outcome_table.DEFAULT_TABLE, help='outcome_table.py build output')
+    p_build.add_argument('--out', default=DEFAULT_TENSOR)
+    p_merge = sub.add_parser('merge', help='Sum tensors built from different corpora')
+    p_merge.add_argument('inputs', nargs='+')
+    p_merge.add_argument('--out', default=DEFAULT_TENSOR)
+    p_show = sub.add_parser('show', help='Print a one- or two-axis slice')
+    p_show.add_argument('--by', default='attacker,victim', help=f"One or two of {', '.join(AXES)}")
+    p_show.add_argument('--chips', type=int)
+    p_show.add_argument('--mode', choices=MODES)
+    p_show.add_argument('--phase', choices=PHASES)
+    p_show.add_argument('--tensor', default=DEFAULT_TENSOR)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        tensor, unmatched = build_tensor(event_study.load_tables(args.events), outcome_table.load_table(args.outcomes))
+        tensor.save(args.out)
+        print(f"  {int(tensor.counts.sum())} kills ({unmatched} left out), {len(tensor.models)} models, "
+              f"chips {tensor.chips} -> {args.out}")
+        return
+
+    if args.command == 'merge':
+        tensors = [TargetingTensor.load(p) for p in args.inputs]
+        merged = tensors[0]
+        for t in tensors[1:]:
+            merged = merged + t
+        merged.save(args.out)
+        print(f"  {int(merged.counts.sum())} kills from {len(tensors)} tensors -> {args.out}")
+        return
+
+    tensor = TargetingTensor.load(args.tensor)
+    by = args.by.split(',')
+    filters = {'chips': args.chips, 'mode': args.mode, 'phase': args.phase}
+    counts = tensor.total(by, **filters)
+    shown = ', '.join(f'{k}={v}' for k, v in filters.items() if v is not None) or 'all games'
+    print_section(f"KILLS BY {' x '.join(a.upper() for a in by)} ({shown}, {int(counts.sum())} kills)")
+    rows = tensor.labels(by[0])
+    if len(by) == 1:
+        for label, n in zip(rows, counts):
+            print(f"  {str(label):<24} {n:>7} {n / max(counts.sum(), 1):>7.1%}")
+        return
+    cols = tensor.labels(by[1])
+    corner = f'{by[0]} \\ {by[1]}'
+    print(f"\n  {corner:<24}" + ''.join(f"{str(c)[:10]:>11}" for c in cols) + f"{'total':>9}")
+    for label, line in zip(rows, counts):
+        print(f"  {str(label)[:24]:<24}" + ''.join(f"{n:>11}" for n in line) + f"{line.sum():>9}")
+
+
+if __name__ == '__main__':
+    main()
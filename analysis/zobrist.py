@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+So Long Sucker - Zobrist Hashing and Position Index
+64-bit Zobrist hashes for board positions, and an index of every position
+reached in the corpus: hash -> [(session, game, turn, model, action)].
+
+The hash covers every field of a rules.py position: supply, prisoners (as
+per-color counts), alive seats, piles (chip sequences), current player, phase,
+the selected chip, the pending pile, and donation state. Piles are unordered,
+so pile hashes are combined by addition mod 2^64 rather than XOR (which would
+cancel two identical piles); field hashes are summed the same way.
+
+rehash() updates a hash from a parent position to a child by touching only
+the fields that changed - the rules engine shares unchanged field objects, so
+most moves rehash one supply/prisoner entry and one or two piles.
+
+    python zobrist.py build ../data_v2 talking.json
+    python zobrist.py build ../data_v2 talking.json --canonical   # pool color permutations
+    python zobrist.py book --top 10          # most frequent positions and how each model played them
+    python zobrist.py stats
+"""
+
+import argparse
+import os
+import pickle
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import numpy as np
+
+import rules as R
+from corpus import find_session_files, load_session, session_id
+
+DEFAULT_INDEX = Path(__file__).parent / 'cache' / 'position_index.pkl'
+MASK = (1 << 64) - 1
+MAX_COUNT = 64  # chips of one kind one player can hold / pile height
+
+
+def _table(rng, *shape):
+    return [int(x) for x in rng.integers(0, 1 << 64, size=int(np.prod(shape)), dtype=np.uint64)]
+
+
+_rng = np.random.default_rng(0x5150)
+Z_SUPPLY = _table(_rng, 4, MAX_COUNT)               # [player * MAX_COUNT + count]
+Z_PRISONERS = _table(_rng, 4, 4, MAX_COUNT)         # [(player * 4 + color) * MAX_COUNT + count]
+Z_PILE = _table(_rng, MAX_COUNT, 4)                 # [height * 4 + color]
+Z_PENDING = _table(_rng, MAX_COUNT, 4)
+Z_ALIVE = _table(_rng, 16)
+Z_CURRENT = _table(_rng, 4)
+Z_PHASE = _table(_rng, len(R.PHASES))
+Z_SELECTED = _table(_rng, 5)                        # color + 1 (0 = none)
+Z_DONOR = _table(_rng, 5)
+Z_ASKED = _table(_rng, 16)
+Z_WINNER = _table(_rng, 5)
+del _rng
+
+_pile_cache = {}
+
+
+def pile_hash(pile, table=Z_PILE):
+    key = (pile, table is Z_PILE)
+    h = _pile_cache.get(key)
+    if h is None:
+        h = 0
+        for i, c in enumerate(pile):
+            h ^= table[i * 4 + c]
+        if len(_pile_cache) > 200_000:
+            _pile_cache.clear()
+        _pile_cache[key] = h
+    return h
+
+
+def _supply_hash(supply):
+    h = 0
+    for p, n in enumerate(supply):
+        h ^= Z_SUPPLY[p * MAX_COUNT + n]
+    return h
+
+
+def _prisoner_hash(p, colors):
+    h = 0
+    for c in range(4):
+        n = colors.count(c)
+        if n:
+            h ^= Z_PRISONERS[(p * 4 + c) * MAX_COUNT + n]
+    return h
+
+
+def _piles_hash(piles):
+    return sum(pile_hash(p) for p in piles) & MASK
+
+
+def _field_hash(i, value):
+    """Hash contribution of one position field."""
+    if i == R.SUPPLY:
+        return _supply_hash(value)
+    if i == R.PRISONERS:
+        h = 0
+        for p, colors in enumerate(value):
+            h ^= _prisoner_hash(p, colors)
+        return h
+    if i == R.ALIVE:
+        return Z_ALIVE[value]
+    if i == R.PILES:
+        return _piles_hash(value)
+    if i == R.CURRENT:
+        return Z_CURRENT[value]
+    if i == R.PHASE:
+        return Z_PHASE[value]
+    if i == R.SELECTED:
+        return Z_SELECTED[value + 1]
+    if i == R.PENDING:
+        return 0 if value is None else pile_hash(value, Z_PENDING)
+    if i == R.DONOR:
+        return Z_DONOR[value + 1]
+    if i == R.ASKED:
+        return Z_ASKED[value]
+    if i == R.WINNER:
+        return Z_WINNER[value + 1]
+    raise IndexError(i)
+
+
+def hash_position(pos):
+    """Full 64-bit hash of a rules.py position: field hashes summed mod 2^64."""
+    h = 0
+    for i, value in enumerate(pos):
+        h += _field_hash(i, value)
+    return h & MASK
+
+
+def rehash(old, old_hash, new):
+    """Hash of `new` from its parent `old`, touching only changed fields."""
+    h = old_hash
+    for i in range(len(new)):
+        a, b = old[i], new[i]
+        if a is b or a == b:
+            continue
+        if i == R.PILES:
+            # Remove piles that left, add piles that arrived (multiset difference)
+            gone = Counter(a)
+            gone.subtract(b)
+            for pile, n in gone.items():
+                if n:
+                    h -= n * pile_hash(pile)
+        else:
+            h += _field_hash(i, b) - _field_hash(i, a)
+    return h & MASK
+
+
+def hash_hex(h):
+    return f'{h:016x}'
+
+
+# =============================================================================
+# POSITION INDEX
+# =============================================================================
+
+class PositionIndex:
+    """
+    hash -> [(session, game, turn, model, action)], plus one sample position per
+    hash. With canonical=True positions are pooled across color permutations
+    (canonical.py) and actions are recorded in canonical colors.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX, canonical=False):
+        self.path = Path(path)
+        self.canonical = canonical
+        self.entries = defaultdict(list)
+        self.positions = {}
+        if self.path.exists():
+            with open(self.path, 'rb') as f:
+                saved = pickle.load(f)
+            self.entries = defaultdict(list, saved['entries'])
+            self.positions = saved['positions']
+            self.canonical = saved.get('canonical', False)
+
+    def build(self, paths=None):
+        self.entries.clear()
+        self.positions.clear()
+        for path in find_session_files(paths):
+            data = load_session(path)
+            if data is None:
+                continue
+            sid = session_id(data, path)
+            for rec in R.replay_decisions(data):
+                pos, move = self._frame(rec['position'], rec['move'])
+                key = hash_position(pos)
+                self.entries[key].append((sid, rec['game'], rec['turn'], rec['model'] or rec['player'],
+                                          R.describe_move(move)))
+                self.positions.setdefault(key, pos)
+        return self
+
+    def _frame(self, pos, move=None):
+        if not self.canonical:
+            return pos, move
+        from canonical import canonical_decision, canonicalize
+        if move is None:
+            return canonicalize(pos)[0], None
+        return canonical_decision(pos, move)[:2]
+
+    def key(self, pos):
+        return hash_position(self._frame(pos)[0])
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump({'entries': dict(self.entries), 'positions': self.positions,
+                         'canonical': self.canonical}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
+
+    def lookup(self, pos):
+        return self.entries.get(self.key(pos), [])
+
+    def most_frequent(self, top=10, min_count=2):
+        ranked = sorted(self.entries.items(), key=lambda kv: -len(kv[1]))
+        return [(h, occ) for h, occ in ranked[:top] if len(occ) >= min_count]
+
+
+def describe_position(pos):
+    """One-line summary of a position for tables."""
+    hands = ' '.join(f"{R.COLORS[p][0].upper()}:{pos[R.SUPPLY][p]}+{len(pos[R.PRISONERS][p])}"
+                     for p in range(4) if R.is_alive(pos, p))
+    piles = ' '.join('[' + ''.join(R.COLORS[c][0] for c in pile) + ']' for pile in pos[R.PILES]) or '-'
+    extra = f" chip={R.COLORS[pos[R.SELECTED]]}" if pos[R.SELECTED] >= 0 else ''
+    return f"{R.PHASES[pos[R.PHASE]]} {R.COLORS[R.mover(pos)] if not R.is_terminal(pos) else '-'} to move{extra} | {hands} | piles {piles}"
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def print_section(title):
+    print("\n" + "=" * 70)
+    print(f"  {title}")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Zobrist position index and opening book.')
+    parser.add_argument('command', choices=['build', 'book', 'stats'])
+    parser.add_argument('paths', nargs='*', help='Session files or directories (build)')
+    parser.add_argument('--index', default=DEFAULT_INDEX)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--min-count', type=int, default=2)
+    parser.add_argument('--canonical', action='store_true',
+                        help='Pool positions across color permutations (build)')
+    args = parser.parse_args()
+
+    index = PositionIndex(args.index)
+    if args.command == 'build':
+        index.canonical = args.canonical
+        index.build(args.paths or None).save()
+        total = sum(len(v) for v in index.entries.values())
+        print(f"  {total} decisions, {len(index.entries)} distinct positions -> {index.path}")
+        return
+
+    if args.command == 'stats':
+        counts = np.array([len(v) for v in index.entries.values()])
+        print_section('POSITION INDEX')
+        print(f"  Decisions: {counts.sum()}, distinct positions: {len(counts)}")
+        if len(counts):
+            print(f"  Positions seen more than once: {(counts > 1).sum()} "
+                  f"({counts[counts > 1].sum() / counts.sum():.1%} of decisions)")
+        return
+
+    print_section(f"OPENING BOOK (top {args.top} recurring positions)")
+    for h, occurrences in index.most_frequent(args.top, args.min_count):
+        print(f"\n  {hash_hex(h)}  x{len(occurrences)}  {describe_position(index.positions[h])}")
+        by_model = defaultdict(Counter)
+        for _, _, _, model, action in occurrences:
+            by_model[model][action] += 1
+        for model, actions in sorted(by_model.items()):
+            played = ', '.join(f"{a} x{n}" for a, n in actions.most_common(3))
+            print(f"    {model:<18} {played}")
+
+
+if __name__ == '__main__':
+    main()
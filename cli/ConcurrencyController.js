@@ -0,0 +1,144 @@
+// Concurrency Controller - adaptive limit on in-flight LLM calls per provider
+// AIMD driven by call outcomes: while calls succeed at healthy latency the limit
+// grows by about one slot per window of `limit` completions; a throttled call
+// (429/408/503/timeout) halves it, at most once per observed round-trip so a
+// burst of errors from one window counts as one congestion signal. Calls
+// slower than `latencyTolerance` x the recent best latency hold the limit.
+//
+// One controller is shared by every HeadlessGame that uses the same provider
+// endpoint, so --parallel can be set high and the controller decides how many
+// calls actually run at once.
+
+const THROTTLE_RE = /\b(408|429|503)\b|timeout|timed out|ETIMEDOUT|ECONNRESET|rate limit|overloaded/i;
+
+export function isThrottleError(error) {
+  return THROTTLE_RE.test(error?.message || String(error));
+}
+
+export class ConcurrencyController {
+  constructor(options = {}) {
+    this.min = options.min ?? 1;
+    this.max = options.max ?? 64;
+    this.limit = options.initial ?? 4;
+    this.decrease = options.decrease ?? 0.5;
+    this.latencyTolerance = options.latencyTolerance ?? 2.0;
+    this.minLatencyWindow = options.minLatencyWindow ?? 200;
+
+    this.inFlight = 0;
+    this.queue = [];
+    this.lastDecrease = 0;
+    this.ewmaLatency = null;
+    this.bestLatency = Infinity;
+    this.windowSamples = 0;
+
+    this.stats = { calls: 0, throttled: 0, errors: 0, peakLimit: this.limit };
+  }
+
+  // Wait for a free slot
+  acquire() {
+    if (this.inFlight < Math.floor(this.limit)) {
+      this.inFlight++;
+      return Promise.resolve();
+    }
+    return new Promise(resolve => this.queue.push(resolve));
+  }
+
+  // Free a slot and feed the outcome back into the limit
+  release({ latency, throttled = false, error = false }) {
+    this.inFlight--;
+    this.stats.calls++;
+    const now = Date.now();
+
+    if (throttled) {
+      this.stats.throttled++;
+      // One multiplicative decrease per round-trip
+      if (now - this.lastDecrease > (this.ewmaLatency ?? 1000)) {
+        this.limit = Math.max(this.min, this.limit * this.decrease);
+        this.lastDecrease = now;
+      }
+    } else if (error) {
+      this.stats.errors++;
+    } else {
+      this.ewmaLatency = this.ewmaLatency === null ? latency : 0.9 * this.ewmaLatency + 0.1 * latency;
+      // Best latency over a sliding window of samples, so the baseline can recover upward
+      if (++this.windowSamples > this.minLatencyWindow) {
+        this.bestLatency = this.ewmaLatency;
+        this.windowSamples = 0;
+      }
+      this.bestLatency = Math.min(this.bestLatency, latency);
+      if (latency <= this.bestLatency * this.latencyTolerance) {
+        this.limit = Math.min(this.max, this.limit + 1 / Math.max(this.limit, 1));
+        this.stats.peakLimit = Math.max(this.stats.peakLimit, this.limit);
+      }
+    }
+    this.drain();
+  }
+
+  drain() {
+    while (this.queue.length > 0 && this.inFlight < Math.floor(this.limit)) {
+      this.inFlight++;
+      this.queue.shift()();
+    }
+  }
+
+  snapshot() {
+    return {
+      limit: Math.floor(this.limit),
+      inFlight: this.inFlight,
+      queued: this.queue.length,
+      ewmaLatency: this.ewmaLatency === null ? null : Math.round(this.ewmaLatency),
+      ...this.stats,
+      peakLimit: Math.floor(this.stats.peakLimit)
+    };
+  }
+}
+
+// Provider wrapper: every call goes through the controller
+export class ControlledProvider {
+  constructor(provider, controller) {
+    this.provider = provider;
+    this.controller = controller;
+  }
+
+  get model() {
+    return this.provider.model;
+  }
+
+  getModelName() {
+    return this.provider.getModelName();
+  }
+
+  async call(...args) {
+    await this.controller.acquire();
+    const start = Date.now();
+    try {
+      const result = await this.provider.call(...args);
+      this.controller.release({ latency: Date.now() - start });
+      return result;
+    } catch (error) {
+      this.controller.release({ latency: Date.now() - start, throttled: isThrottleError(error), error: true });
+      throw error;
+    }
+  }
+}
+
+// Controllers keyed by provider endpoint (providers on one host share its rate limits)
+export function controllerKey(provider) {
+  try {
+    return new URL(provider.baseUrl).host;
+  } catch {
+    return provider.constructor?.name || 'default';
+  }
+}
+
+export function createControlledProviders(providers, options = {}) {
+  const controllers = new Map();
+  const wrapped = providers.map(provider => {
+    const key = controllerKey(provider);
+    if (!controllers.has(key)) {
+      controllers.set(key, new ConcurrencyController(options));
+    }
+    return new ControlledProvider(provider, controllers.get(key));
+  });
+  return { providers: wrapped, controllers };
+}
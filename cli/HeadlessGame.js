@@ -668,12 +668,18 @@ function filterTools(names) {
 // ============================================
 // AI AGENT
 // ============================================
+// Compact prompt mode: new messages shown in full, and longest quote in the summary
+const COMPACT_NEW_MESSAGES = 20;
+const COMPACT_QUOTE_CHARS = 100;
+
 class AIAgent {
   constructor(playerId, provider, options = {}) {
     this.playerId = playerId;
     this.color = COLORS[playerId];
     this.provider = provider;
     this.silent = options.silent || false; // No chat mode
+    this.promptMode = options.promptMode || 'full'; // 'compact' = chat summary + changes since last prompt
+    this.seen = null; // What the last answered compact prompt showed (message count, piles, alive players)
     this.thoughts = [];
     this.consecutiveThinks = 0;
   }
@@ -779,6 +785,11 @@ DEAD BOX: ${state.deadBox.length > 0 ? state.deadBox.join(', ') : 'empty'}
 PHASE: ${state.phase}
 TURN: ${COLORS[state.currentPlayer]}${isMyTurn ? ' (YOU)' : ''}`;
 
+    // The delta only pays for itself next to compacted chat; silent prompts are smaller without it
+    if (this.promptMode === 'compact' && !this.silent && state.messages.length > 0) {
+      prompt += this.describeChanges(state);
+    }
+
     if (state.phase === 'selectChip' && isMyTurn) {
       const playable = me.supply > 0 ? [me.color] : [];
       playable.push(...me.prisoners);
@@ -822,7 +833,13 @@ TURN: ${COLORS[state.currentPlayer]}${isMyTurn ? ' (YOU)' : ''}`;
 
     if (!this.silent) {
       // Add chat history (last 50 messages for context)
-      if (state.messages.length > 0) {
+      if (state.messages.length > 0 && this.promptMode === 'compact') {
+        const { text, hasOtherMessages } = this.compactChat(state.messages);
+        prompt += `\n\nCHAT HISTORY:\n${text}`;
+        if (hasOtherMessages) {
+          prompt += `\n\nConsider responding to the chat or continuing negotiations.`;
+        }
+      } else if (state.messages.length > 0) {
         const recent = state.messages.slice(-50);
         const hasOtherMessages = recent.some(m => m.color !== this.color);
         prompt += `\n\nCHAT HISTORY:\n${recent.map(m => `${m.color.toUpperCase()}: ${m.text}`).join('\n')}`;
@@ -848,6 +865,70 @@ TURN: ${COLORS[state.currentPlayer]}${isMyTurn ? ' (YOU)' : ''}`;
     return prompt;
   }
 
+  // Compact mode: record what a prompt built from `state` showed. Call only once
+  // the provider has answered it, so failed or retried calls don't hide messages.
+  markSeen(state) {
+    if (this.promptMode !== 'compact') return;
+    this.seen = {
+      messages: state.messages.length,
+      piles: new Map(state.piles.map(p => [p.id, p.chips])),
+      alive: state.players.map(p => p.isAlive)
+    };
+  }
+
+  // Compact mode: board changes since this agent's last prompt
+  describeChanges(state) {
+    if (!this.seen) return '';
+    const changes = [];
+    for (const pile of state.piles) {
+      const before = this.seen.piles.get(pile.id);
+      if (!before) {
+        changes.push(`- new pile ${pile.id}: ${pile.chips.join(' → ')}`);
+      } else if (pile.chips.length > before.length) {
+        changes.push(`- pile ${pile.id}: + ${pile.chips.slice(before.length).join(' → ')}`);
+      }
+    }
+    const current = new Set(state.piles.map(p => p.id));
+    for (const id of this.seen.piles.keys()) {
+      if (!current.has(id)) changes.push(`- pile ${id} was captured`);
+    }
+    state.players.forEach((p, i) => {
+      if (this.seen.alive[i] && !p.isAlive) changes.push(`- ${p.color} was ELIMINATED`);
+    });
+    return `\n\nSINCE YOUR LAST PROMPT:\n${changes.length > 0 ? changes.join('\n') : '- no board changes'}`;
+  }
+
+  // Compact mode: one summary line per speaker for older messages, full text for new ones
+  compactChat(messages) {
+    const seenCount = this.seen ? Math.min(this.seen.messages, messages.length) : messages.length - COMPACT_NEW_MESSAGES;
+    const start = Math.max(0, seenCount, messages.length - COMPACT_NEW_MESSAGES);
+    const earlier = messages.slice(0, start);
+    const recent = messages.slice(start);
+
+    const lines = [];
+    if (earlier.length > 0) {
+      const bySpeaker = new Map();
+      for (const m of earlier) {
+        const entry = bySpeaker.get(m.color) || { count: 0, last: '' };
+        entry.count++;
+        entry.last = m.text;
+        bySpeaker.set(m.color, entry);
+      }
+      lines.push(`(${earlier.length} earlier messages; last said by each player)`);
+      for (const [color, { count, last }] of bySpeaker) {
+        const quote = last.length > COMPACT_QUOTE_CHARS ? `${last.slice(0, COMPACT_QUOTE_CHARS)}…` : last;
+        lines.push(`- ${color.toUpperCase()} (${count}): "${quote}"`);
+      }
+    }
+    if (recent.length > 0) {
+      if (earlier.length > 0) lines.push('NEW:');
+      lines.push(...recent.map(m => `${m.color.toUpperCase()}: ${m.text}`));
+    } else {
+      lines.push('No new messages since your last prompt.');
+    }
+    return { text: lines.join('\n'), hasOtherMessages: recent.some(m => m.color !== this.color) };
+  }
+
   async decide(state) {
     const isMyTurn = state.currentPlayer === this.playerId;
     const me = state.players[this.playerId];
@@ -875,6 +956,7 @@ TURN: ${COLORS[state.currentPlayer]}${isMyTurn ? ' (YOU)' : ''}`;
         userPrompt,
         tools
       );
+      this.markSeen(state);
 
       return {
         toolCalls: result.toolCalls.length > 0 ? result.toolCalls : null,
@@ -905,6 +987,7 @@ export class HeadlessGame extends EventEmitter {
     this.provider = config.provider; // legacy single provider
     this.providers = config.providers || null; // array of 4 providers for mixed-model games
     this.silent = config.silent || false; // No chat mode for control experiments
+    this.promptMode = config.promptMode || 'full'; // 'full' or 'compact' user prompts
     this.agents = [];
     this.isRunning = false;
     this.isFinished = false;
@@ -966,10 +1049,12 @@ export class HeadlessGame extends EventEmitter {
 
   // Add a snapshot
   addSnapshot(snapshot) {
-    this.snapshots.push({
+    const record = {
       ...snapshot,
       timestamp: Date.now()
-    });
+    };
+    this.snapshots.push(record);
+    this.emit('snapshot', record);
   }
 
   // Check for eliminations and track them
@@ -994,7 +1079,7 @@ export class HeadlessGame extends EventEmitter {
     // Create AI agents - use per-player providers if available, otherwise single provider
     for (let i = 0; i < 4; i++) {
       const playerProvider = this.providers ? this.providers[i] : this.provider;
-      this.agents.push(new AIAgent(i, playerProvider, { silent: this.silent }));
+      this.agents.push(new AIAgent(i, playerProvider, { silent: this.silent, promptMode: this.promptMode }));
     }
 
     // Add game_start snapshot with model info
@@ -1004,6 +1089,7 @@ export class HeadlessGame extends EventEmitter {
       state: this.getStateSnapshot(),
       chatHistory: [],
       silent: this.silent, // Track if this game was silent mode
+      promptMode: this.promptMode,
       models: this.agents.map(a => ({
         player: a.color,
         model: a.provider.getModelName()
@@ -1105,7 +1191,7 @@ export class HeadlessGame extends EventEmitter {
               }
             }
           }
-          await this.delay(1000);
+          await this.delay(this.config.recoveryDelay ?? 1000);
           continue;
         }
       } else {
@@ -1145,7 +1231,7 @@ export class HeadlessGame extends EventEmitter {
       }
 
       // Rate limiting
-      await this.delay(this.config.delay || 500);
+      await this.delay(this.config.delay ?? 500);
     }
 
     if (this.game.phase === 'gameOver') {
@@ -1240,11 +1326,13 @@ export class HeadlessGame extends EventEmitter {
         : ['sendChat', 'think', 'wait', 'givePrisoner', 'makePromise', 'breakPromise', 'proposeTrade', 'respondToTrade', 'breakTrade'];
 
       try {
+        const userPrompt = agent.buildUserPrompt(state);
         const result = await agent.provider.call(
           agent.buildSystemPrompt(),
-          agent.buildUserPrompt(state),
+          userPrompt,
           filterTools(toolNames)
         );
+        agent.markSeen(state);
 
         const actions = result.toolCalls?.length > 0 ? result.toolCalls : null;
         if (!actions) return;
@@ -1259,7 +1347,9 @@ export class HeadlessGame extends EventEmitter {
           phase: state.phase,
           newMessages: newChatMessages,
           llmRequest: {
-            availableTools: toolNames
+            userPrompt,
+            availableTools: toolNames,
+            promptChars: userPrompt.length
           },
           llmResponse: result.metadata ? {
             responseTime: result.metadata.responseTime,
@@ -1366,6 +1456,7 @@ export class HeadlessGame extends EventEmitter {
                   agent.buildUserPrompt(state),
                   filterTools(toolNames)
                 );
+                agent.markSeen(state);
                 const actions = result.toolCalls?.length > 0 ? result.toolCalls : null;
                 if (actions) {
                   for (const action of actions) {
@@ -1384,7 +1475,7 @@ export class HeadlessGame extends EventEmitter {
 
     // No valid current donor - auto-advance
     this.handleDonationAuto(state);
-    await this.delay(500);
+    await this.delay(Math.min(this.config.recoveryDelay ?? 500, 500));
   }
 
   handleDonationAuto(state) {
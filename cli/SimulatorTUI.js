@@ -2,6 +2,8 @@
 // Displays game progress and allows focusing on individual games
 
 import { HeadlessGame } from './HeadlessGame.js';
+import { SnapshotSink } from './SnapshotSink.js';
+import { createControlledProviders } from './ConcurrencyController.js';
 import { createProvider } from './providers.js';
 import { colorize, colorChip, formatDuration, truncate, clearScreen, hideCursor, showCursor, enterAltScreen, exitAltScreen } from './utils.js';
 import * as readline from 'readline';
@@ -18,8 +20,17 @@ export class SimulatorTUI {
     this.chips = config.chips;
     this.outputDir = config.outputDir;
     this.delay = config.delay;
+    this.recoveryDelay = config.recoveryDelay;
     this.silent = config.silent || false; // No chat mode for control experiments
     this.headless = config.headless;
+    this.stream = config.stream || false; // Append-only NDJSON log instead of a final JSON dump
+    this.sink = null;
+    this.promptMode = config.promptMode || 'full'; // 'compact' = chat summary + changes since last prompt
+    this.adaptive = config.adaptive || false; // AIMD limit on in-flight LLM calls per provider endpoint
+    this.maxInflight = config.maxInflight || this.parallel * 4;
+    this.controllers = null;
+    this.stopFile = config.stopFile || null; // Stop starting games once this file exists
+    this.stopRequested = false;
 
     this.provider = null;
     this.providers = null; // Array of 4 provider instances for mixed-model
@@ -52,14 +63,40 @@ export class SimulatorTUI {
       // Single provider mode (legacy)
       this.provider = createProvider(this.providerType);
     }
+
+    // Adaptive concurrency: route every LLM call through a shared per-endpoint controller
+    if (this.adaptive) {
+      const options = { initial: Math.min(4, this.maxInflight), max: this.maxInflight };
+      if (this.providers) {
+        const controlled = createControlledProviders(this.providers, options);
+        this.providers = controlled.providers;
+        this.provider = this.providers[0];
+        this.controllers = controlled.controllers;
+      } else {
+        const controlled = createControlledProviders([this.provider], options);
+        this.provider = controlled.providers[0];
+        this.controllers = controlled.controllers;
+      }
+    }
     this.startTime = Date.now();
     this.isRunning = true;
 
+    // A stop file left over from an earlier run would end this one at the first check
+    if (this.stopFile && fs.existsSync(this.stopFile)) {
+      fs.unlinkSync(this.stopFile);
+      console.log(`Removed stop file ${this.stopFile} left from an earlier run`);
+    }
+
     // Ensure output directory exists
     if (!fs.existsSync(this.outputDir)) {
       fs.mkdirSync(this.outputDir, { recursive: true });
     }
 
+    if (this.stream) {
+      const timestamp = new Date(this.startTime).toISOString().replace(/[:.]/g, '-');
+      this.sink = new SnapshotSink(`${this.outputDir}/session-${timestamp}.ndjson`, this.getSessionInfo());
+    }
+
     // Capture console output to prevent it from breaking the TUI
     if (!this.headless) {
       this.captureConsole();
@@ -70,7 +107,9 @@ export class SimulatorTUI {
       const gameConfig = {
         chips: this.chips,
         delay: this.delay,
-        silent: this.silent // Pass silent mode to HeadlessGame
+        recoveryDelay: this.recoveryDelay,
+        silent: this.silent, // Pass silent mode to HeadlessGame
+        promptMode: this.promptMode
       };
       
       // Pass either array of providers or single provider
@@ -88,6 +127,9 @@ export class SimulatorTUI {
       game.on('turn', (data) => this.onGameTurn(i, data));
       game.on('chat', (data) => this.onGameChat(i, data));
       game.on('think', (data) => this.onGameThink(i, data));
+      if (this.sink) {
+        game.on('snapshot', (snapshot) => this.sink.write(i, snapshot));
+      }
 
       this.games.push(game);
       this.queue.push(game);
@@ -110,7 +152,15 @@ export class SimulatorTUI {
     // Wait for all games to complete
     return new Promise((resolve) => {
       const checkComplete = setInterval(() => {
-        if (this.completedGames.length >= this.totalGames) {
+        if (this.stopFile && !this.stopRequested && fs.existsSync(this.stopFile)) {
+          this.requestStop();
+        }
+        const drained = this.stopRequested && this.activeGames.length === 0;
+        if (drained && this.sink) {
+          // Stopped early: end the log with the session_end footer as soon as the last game is in
+          this.sink.close(this.getSessionInfo());
+        }
+        if (this.completedGames.length >= this.totalGames || drained) {
           clearInterval(checkComplete);
           this.finish();
           resolve({ gameCount: this.completedGames.length });
@@ -196,6 +246,16 @@ export class SimulatorTUI {
     process.stdin.resume();
   }
 
+  // Early stop (e.g. analysis/sequential_test.py reached a decision): drop queued
+  // games and let the running ones finish
+  requestStop() {
+    this.stopRequested = true;
+    const skipped = this.queue.length;
+    this.queue = [];
+    console.log(`Stop file ${this.stopFile} found: skipping ${skipped} queued games, ` +
+      `finishing ${this.activeGames.length} running`);
+  }
+
   startNextBatch() {
     while (this.activeGames.length < this.parallel && this.queue.length > 0 && !this.isPaused) {
       const game = this.queue.shift();
@@ -265,7 +325,7 @@ ${colorize('║', 'cyan')}  🎮 ${colorize('So Long Sucker - Mass Simulation',
 ${colorize('╚═══════════════════════════════════════════════════════════════════╝', 'cyan')}
 
   Provider: ${providerDisplay} | Games: ${colorize(`${completed}/${this.totalGames}`, 'green')} | Time: ${elapsed}
-  ${this.isPaused ? colorize('⏸  PAUSED', 'yellow') : colorize('▶  Running', 'green')}
+  ${this.stopRequested ? colorize('■  Stopping early (finishing running games)', 'yellow') : this.isPaused ? colorize('⏸  PAUSED', 'yellow') : colorize('▶  Running', 'green')}${this.formatControllers()}
 
 ${colorize('─────────────────────────────────────────────────────────────────────', 'gray')}
 `;
@@ -489,7 +549,7 @@ ${colorize('║', 'green')}  ✅ ${colorize('Simulation Complete!', 'bold')}
 ${colorize('╚═══════════════════════════════════════════════════════════════════╝', 'green')}
 
   📊 ${colorize('Results:', 'bold')}
-     Games Played: ${gameCount}
+     Games Played: ${gameCount}${this.stopRequested ? ` of ${this.totalGames} (stopped early)` : ''}
      Total Time:   ${elapsed}
 
   🏆 ${colorize('Win Rates:', 'bold')}
@@ -502,10 +562,48 @@ ${colorize('╚═════════════════════
      Turns/Game:    ${avgTurns}
      Duration/Game: ${avgDuration}s
 
-  💾 Data saved to: ${colorize(this.outputDir, 'cyan')}
+  💾 Data saved to: ${colorize(this.outputDir, 'cyan')}${this.formatControllers()}
 `);
   }
 
+  // One-line adaptive concurrency status per provider endpoint
+  formatControllers() {
+    if (!this.controllers) return '';
+    return [...this.controllers].map(([host, c]) => {
+      const snap = c.snapshot();
+      return `\n  LLM ${host}: limit ${snap.limit} (peak ${snap.peakLimit}), in-flight ${snap.inFlight}, ` +
+        `queued ${snap.queued}, throttled ${snap.throttled}/${snap.calls}`;
+    }).join('');
+  }
+
+  // Session metadata shared by the JSON dump and the NDJSON header/footer
+  getSessionInfo() {
+    this.sessionId = this.sessionId || `session-${Date.now()}`;
+    return {
+      id: this.sessionId,
+      provider: this.providerTypes ? 'mixed' : this.providerType,
+      model: this.providerTypes 
+        ? this.providers.map(p => p.getModelName?.() || p.model || 'unknown')
+        : (this.provider?.getModelName?.() || this.provider?.model || 'unknown'),
+      // For mixed-model games, store model per player color
+      playerModels: this.providerTypes ? {
+        red: this.providers[0]?.getModelName?.() || 'unknown',
+        blue: this.providers[1]?.getModelName?.() || 'unknown',
+        green: this.providers[2]?.getModelName?.() || 'unknown',
+        yellow: this.providers[3]?.getModelName?.() || 'unknown'
+      } : null,
+      silent: this.silent, // Track if this was a silent (no-chat) run
+      promptMode: this.promptMode,
+      startTime: this.startTime,
+      endTime: Date.now(),
+      totalGames: this.totalGames,
+      chips: this.chips,
+      completedGames: this.completedGames.length,
+      stoppedEarly: this.stopRequested,
+      activeGames: this.activeGames.length
+    };
+  }
+
   async saveResults() {
     // Prevent duplicate saves
     if (this.hasSaved) {
@@ -514,6 +612,13 @@ ${colorize('╚═════════════════════
     }
     this.hasSaved = true;
 
+    // Streaming: every snapshot is already on disk, just close the log
+    if (this.sink) {
+      this.sink.close(this.getSessionInfo());
+      console.log(`\n💾 Streamed ${this.sink.count} snapshots to: ${this.sink.filename}`);
+      return;
+    }
+
     const timestamp = new Date().toISOString().replace(/[:.]/g, '-');
     const filename = `${this.outputDir}/session-${timestamp}.json`;
 
@@ -543,27 +648,7 @@ ${colorize('╚═════════════════════
 
     // Simplified output format
     const data = {
-      session: {
-        id: `session-${Date.now()}`,
-        provider: this.providerTypes ? 'mixed' : this.providerType,
-        model: this.providerTypes 
-          ? this.providers.map(p => p.getModelName?.() || p.model || 'unknown')
-          : (this.provider?.getModelName?.() || this.provider?.model || 'unknown'),
-        // For mixed-model games, store model per player color
-        playerModels: this.providerTypes ? {
-          red: this.providers[0]?.getModelName?.() || 'unknown',
-          blue: this.providers[1]?.getModelName?.() || 'unknown',
-          green: this.providers[2]?.getModelName?.() || 'unknown',
-          yellow: this.providers[3]?.getModelName?.() || 'unknown'
-        } : null,
-        silent: this.silent, // Track if this was a silent (no-chat) run
-        startTime: this.startTime,
-        endTime: Date.now(),
-        totalGames: this.totalGames,
-        chips: this.chips,
-        completedGames: this.completedGames.length,
-        activeGames: this.activeGames.length
-      },
+      session: this.getSessionInfo(),
       snapshots: allSnapshots
     };
 
@@ -0,0 +1,35 @@
+// Snapshot Sink - append-only NDJSON session log
+// One JSON object per line: a session header, every snapshot as it is recorded,
+// and a session_end footer on save. Each append costs O(new snapshot), so a
+// long --parallel run can be followed live (analysis/session_tail.py) instead
+// of re-serializing the whole session on every save.
+
+import * as fs from 'fs';
+
+export class SnapshotSink {
+  constructor(filename, session) {
+    this.filename = filename;
+    this.fd = fs.openSync(filename, 'a');
+    this.count = 0;
+    this.append({ type: 'session', session });
+  }
+
+  append(record) {
+    if (this.fd === null) return;
+    // A single write per line keeps lines whole for readers tailing the file
+    fs.writeSync(this.fd, JSON.stringify(record) + '\n');
+  }
+
+  // Snapshots from parallel games interleave, so every line carries its game
+  write(slot, snapshot) {
+    this.append({ ...snapshot, game: snapshot.game ?? slot });
+    this.count++;
+  }
+
+  close(session) {
+    if (this.fd === null) return;
+    this.append({ type: 'session_end', session });
+    fs.closeSync(this.fd);
+    this.fd = null;
+  }
+}
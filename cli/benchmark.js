@@ -0,0 +1,365 @@
+#!/usr/bin/env node
+// Simulator throughput benchmark
+// Sweeps --parallel, chip counts and talking/silent mode against the stub
+// endpoint (cli/stub.js) and records games/min, decisions/s, LLM calls/s,
+// event-loop lag and memory for each configuration. Each configuration runs in
+// its own Node process so memory and event-loop numbers are not shared.
+//
+// Results go to a JSON report; every run is also appended to a history file,
+// and each configuration is compared with the latest history entry from a
+// different commit (or with --baseline) to flag regressions.
+//
+// Usage: npm run bench -- --parallel 1,4,16 --chips 3,7 --mode talking,silent --games 8
+
+import { spawn, execSync } from 'child_process';
+import { monitorEventLoopDelay } from 'perf_hooks';
+import * as fs from 'fs';
+import * as os from 'os';
+import * as path from 'path';
+import { fileURLToPath } from 'url';
+
+const HERE = path.dirname(fileURLToPath(import.meta.url));
+
+const HELP = `
+So Long Sucker - Simulator Benchmark
+
+Usage: node cli/benchmark.js [options]
+
+Sweep:
+  --games N             Games per configuration (default: 8)
+  --parallel LIST       Concurrent games, comma-separated (default: 1,4,16)
+  --chips LIST          Chips per player (default: 3)
+  --mode LIST           talking and/or silent (default: talking,silent)
+
+Simulator:
+  --delay MS            Delay between turns (default: 0)
+  --recovery-delay MS   Pause after stuck-state recovery (default: 1000)
+  --adaptive LIST       off and/or on: adaptive LLM concurrency (default: off)
+  --prompt-mode LIST    full and/or compact user prompts (default: full)
+
+Stub endpoint:
+  --latency SPEC        fixed:MS | uniform:MIN-MAX | lognormal:MEDIAN,SIGMA (default: lognormal:200,0.5)
+  --error-rate P        Fraction of 429 responses (default: 0)
+  --seed N              Stub random seed (default: 1)
+
+Report:
+  --report PATH         JSON report (default: ./benchmarks/latest.json)
+  --history PATH        Append-only run history (default: ./benchmarks/history.ndjson)
+  --baseline PATH       Compare against this report instead of the history
+  --threshold P         Relative throughput drop flagged as a regression (default: 0.1)
+  --fail-on-regression  Exit with status 1 if any configuration regressed
+`;
+
+function parseList(value, map = (x) => x) {
+  return String(value).split(',').map(s => map(s.trim())).filter(x => x !== '' && !Number.isNaN(x));
+}
+
+function parseBenchArgs(argv) {
+  const opts = {
+    games: 8,
+    parallel: [1, 4, 16],
+    chips: [3],
+    mode: ['talking', 'silent'],
+    delay: 0,
+    recoveryDelay: 1000,
+    adaptive: ['off'],
+    promptMode: ['full'],
+    latency: 'lognormal:200,0.5',
+    errorRate: 0,
+    seed: 1,
+    report: './benchmarks/latest.json',
+    history: './benchmarks/history.ndjson',
+    baseline: null,
+    threshold: 0.1,
+    failOnRegression: false
+  };
+  for (let i = 0; i < argv.length; i++) {
+    const next = argv[i + 1];
+    switch (argv[i]) {
+      case '--games': opts.games = parseInt(next); i++; break;
+      case '--parallel': opts.parallel = parseList(next, Number); i++; break;
+      case '--chips': opts.chips = parseList(next, Number); i++; break;
+      case '--mode': opts.mode = parseList(next); i++; break;
+      case '--delay': opts.delay = parseInt(next); i++; break;
+      case '--recovery-delay': opts.recoveryDelay = parseInt(next); i++; break;
+      case '--adaptive': opts.adaptive = parseList(next); i++; break;
+      case '--prompt-mode': opts.promptMode = parseList(next); i++; break;
+      case '--latency': opts.latency = next; i++; break;
+      case '--error-rate': opts.errorRate = Number(next); i++; break;
+      case '--seed': opts.seed = Number(next); i++; break;
+      case '--report': opts.report = next; i++; break;
+      case '--history': opts.history = next; i++; break;
+      case '--baseline': opts.baseline = next; i++; break;
+      case '--threshold': opts.threshold = Number(next); i++; break;
+      case '--fail-on-regression': opts.failOnRegression = true; break;
+      case '--child': opts.child = JSON.parse(next); i++; break;
+      case '--help':
+      case '-h': opts.help = true; break;
+    }
+  }
+  return opts;
+}
+
+export function configKey(c) {
+  return `games=${c.games} parallel=${c.parallel} chips=${c.chips} mode=${c.mode}` +
+    (c.adaptive ? ' adaptive' : '') + (c.promptMode === 'compact' ? ' compact' : '');
+}
+
+// ============================================
+// CHILD: run one configuration
+// ============================================
+
+async function runChild(config) {
+  // Keep the simulator's logging out of the result stream, but count recoveries
+  let recoveries = 0;
+  const quiet = (...args) => {
+    if (/recovery/i.test(args.join(' '))) recoveries++;
+  };
+  console.log = quiet;
+  console.error = quiet;
+  console.warn = quiet;
+
+  const { SimulatorTUI } = await import('./SimulatorTUI.js');
+  const outputDir = fs.mkdtempSync(path.join(os.tmpdir(), 'sls-bench-'));
+
+  const lag = monitorEventLoopDelay({ resolution: 10 });
+  lag.enable();
+  let rssPeak = 0;
+  let heapPeak = 0;
+  const sampleMemory = () => {
+    const mem = process.memoryUsage();
+    rssPeak = Math.max(rssPeak, mem.rss);
+    heapPeak = Math.max(heapPeak, mem.heapUsed);
+  };
+  const sampler = setInterval(sampleMemory, 100);
+
+  const tui = new SimulatorTUI({
+    totalGames: config.games,
+    parallel: config.parallel,
+    provider: 'local',
+    chips: config.chips,
+    outputDir,
+    delay: config.delay,
+    recoveryDelay: config.recoveryDelay,
+    silent: config.mode === 'silent',
+    headless: true,
+    adaptive: config.adaptive,
+    promptMode: config.promptMode
+  });
+  await tui.start();
+  clearInterval(sampler);
+  sampleMemory();
+  lag.disable();
+
+  // Wall time to the last game finishing (start() itself polls every 500ms)
+  const lastEnd = Math.max(...tui.games.map(g => g.endTime || 0));
+  const wallMs = Math.max(lastEnd - tui.startTime, 1);
+  let decisions = 0;
+  let turns = 0;
+  let promptTokens = 0;
+  for (const result of tui.completedGames) {
+    turns += result.turns || 0;
+    for (const s of result.snapshots || []) {
+      if (s.type !== 'decision' && s.type !== 'off_turn') continue;
+      decisions++;
+      promptTokens += s.llmResponse?.promptTokens || 0;
+    }
+  }
+  fs.rmSync(outputDir, { recursive: true, force: true });
+
+  const ns = (v) => v / 1e6;
+  return {
+    games_completed: tui.completedGames.length,
+    wall_s: wallMs / 1000,
+    games_per_min: tui.completedGames.length / (wallMs / 60000),
+    decisions_per_s: decisions / (wallMs / 1000),
+    mean_turns: tui.completedGames.length ? turns / tui.completedGames.length : 0,
+    recoveries,
+    prompt_tokens_per_decision: decisions ? promptTokens / decisions : 0,
+    event_loop_lag_ms: {
+      mean: ns(lag.mean),
+      p99: ns(lag.percentile(99)),
+      max: ns(lag.max)
+    },
+    rss_peak_mb: rssPeak / 1048576,
+    heap_peak_mb: heapPeak / 1048576,
+    controllers: tui.controllers
+      ? Object.fromEntries([...tui.controllers].map(([host, c]) => [host, c.snapshot()]))
+      : null
+  };
+}
+
+// ============================================
+// PARENT: sweep, report, compare
+// ============================================
+
+function startStubProcess(opts) {
+  return new Promise((resolve, reject) => {
+    const child = spawn(process.execPath, [
+      path.join(HERE, 'stub.js'), '--port', '0',
+      '--latency', opts.latency, '--error-rate', String(opts.errorRate), '--seed', String(opts.seed)
+    ], { stdio: ['ignore', 'pipe', 'inherit'] });
+    child.stdout.on('data', (chunk) => {
+      const match = String(chunk).match(/(http:\/\/[^\s]+\/v1)/);
+      if (match) resolve({ child, baseUrl: match[1] });
+    });
+    child.on('exit', (code) => reject(new Error(`stub exited with code ${code}`)));
+  });
+}
+
+async function stubRequests(baseUrl) {
+  try {
+    const res = await fetch(baseUrl.replace(/\/v1$/, '/stats'));
+    return (await res.json()).requests;
+  } catch {
+    return null;
+  }
+}
+
+function runConfig(config, baseUrl) {
+  return new Promise((resolve, reject) => {
+    const child = spawn(process.execPath, [fileURLToPath(import.meta.url), '--child', JSON.stringify(config)], {
+      env: { ...process.env, LOCAL_BASE_URL: baseUrl },
+      stdio: ['ignore', 'pipe', 'inherit']
+    });
+    let out = '';
+    child.stdout.on('data', (chunk) => { out += chunk; });
+    child.on('exit', (code) => {
+      const line = out.split('\n').find(l => l.startsWith('BENCH_RESULT '));
+      if (code !== 0 || !line) {
+        reject(new Error(`benchmark run failed (${configKey(config)}), exit code ${code}`));
+      } else {
+        resolve(JSON.parse(line.slice('BENCH_RESULT '.length)));
+      }
+    });
+  });
+}
+
+function gitCommit() {
+  try {
+    return execSync('git rev-parse --short HEAD', { cwd: HERE, stdio: ['ignore', 'pipe', 'ignore'] }).toString().trim();
+  } catch {
+    return 'unknown';
+  }
+}
+
+function loadBaselines(opts, commit) {
+  const baselines = new Map();
+  if (opts.baseline) {
+    const report = JSON.parse(fs.readFileSync(opts.baseline, 'utf-8'));
+    for (const r of report.results) baselines.set(r.key, { ...r, commit: report.meta.commit });
+    return baselines;
+  }
+  if (!fs.existsSync(opts.history)) return baselines;
+  // Latest entry per configuration from any other commit
+  for (const line of fs.readFileSync(opts.history, 'utf-8').split('\n')) {
+    if (!line.trim()) continue;
+    let entry;
+    try { entry = JSON.parse(line); } catch { continue; }
+    if (entry.commit !== commit && entry.latency === opts.latency) baselines.set(entry.key, entry);
+  }
+  return baselines;
+}
+
+function pct(now, before) {
+  if (!before) return '';
+  const d = (now - before) / before;
+  return `${d >= 0 ? '+' : ''}${(d * 100).toFixed(0)}%`;
+}
+
+async function runSweep(opts) {
+  const commit = gitCommit();
+  const baselines = loadBaselines(opts, commit);
+  const { child: stub, baseUrl } = await startStubProcess(opts);
+
+  const configs = [];
+  for (const adaptive of opts.adaptive) {
+    for (const mode of opts.mode) {
+      for (const chips of opts.chips) {
+        for (const parallel of opts.parallel) {
+          for (const promptMode of opts.promptMode) {
+            configs.push({
+              games: opts.games, parallel, chips, mode, delay: opts.delay, recoveryDelay: opts.recoveryDelay,
+              adaptive: adaptive === 'on', promptMode
+            });
+          }
+        }
+      }
+    }
+  }
+
+  console.log(`\nBenchmark @ ${commit}: ${configs.length} configurations, stub latency ${opts.latency}\n`);
+  console.log(`  ${'Configuration'.padEnd(61)} ${'games/min'.padStart(10)} ${'dec/s'.padStart(8)} ${'calls/s'.padStart(8)} ${'tok/dec'.padStart(8)} ${'lag p99'.padStart(8)} ${'RSS MB'.padStart(7)} ${'vs base'.padStart(8)}`);
+  const results = [];
+  let regressions = 0;
+  try {
+    for (const config of configs) {
+      const before = await stubRequests(baseUrl);
+      const metrics = await runConfig(config, baseUrl);
+      const after = await stubRequests(baseUrl);
+      const key = configKey(config);
+      const result = {
+        key,
+        config,
+        ...metrics,
+        llm_calls_per_s: before !== null && after !== null ? (after - before) / metrics.wall_s : null
+      };
+      const base = baselines.get(key);
+      result.regression = Boolean(base && result.games_per_min < base.games_per_min * (1 - opts.threshold));
+      regressions += result.regression;
+      results.push(result);
+      console.log(`  ${key.padEnd(61)} ${result.games_per_min.toFixed(1).padStart(10)} ${result.decisions_per_s.toFixed(1).padStart(8)} ` +
+        `${(result.llm_calls_per_s ?? 0).toFixed(1).padStart(8)} ${(result.prompt_tokens_per_decision ?? 0).toFixed(0).padStart(8)} ${result.event_loop_lag_ms.p99.toFixed(1).padStart(8)} ` +
+        `${result.rss_peak_mb.toFixed(0).padStart(7)} ${pct(result.games_per_min, base?.games_per_min).padStart(8)}` +
+        `${result.regression ? '  REGRESSION' : ''}`);
+    }
+  } finally {
+    stub.kill();
+  }
+
+  const report = {
+    meta: {
+      commit,
+      date: new Date().toISOString(),
+      node: process.version,
+      platform: `${os.platform()} ${os.arch()}`,
+      cpus: os.cpus().length,
+      latency: opts.latency,
+      errorRate: opts.errorRate,
+      seed: opts.seed
+    },
+    results
+  };
+  fs.mkdirSync(path.dirname(opts.report), { recursive: true });
+  fs.writeFileSync(opts.report, JSON.stringify(report, null, 2));
+  fs.mkdirSync(path.dirname(opts.history), { recursive: true });
+  fs.appendFileSync(opts.history, results.map(r => JSON.stringify({
+    commit, date: report.meta.date, latency: opts.latency, ...r
+  })).join('\n') + '\n');
+
+  console.log(`\n  Report: ${opts.report}  (history: ${opts.history})`);
+  if (regressions) {
+    console.log(`  ${regressions} configuration(s) regressed by more than ${(opts.threshold * 100).toFixed(0)}%`);
+  }
+  return regressions;
+}
+
+async function main() {
+  const opts = parseBenchArgs(process.argv.slice(2));
+  if (opts.help) {
+    console.log(HELP);
+    process.exit(0);
+  }
+  if (opts.child) {
+    const result = await runChild(opts.child);
+    process.stdout.write(`BENCH_RESULT ${JSON.stringify(result)}\n`);
+    process.exit(0);
+  }
+  const regressions = await runSweep(opts);
+  process.exit(regressions && opts.failOnRegression ? 1 : 0);
+}
+
+main().catch(err => {
+  console.error('Benchmark failed:', err);
+  process.exit(1);
+});
@@ -19,9 +19,22 @@ Options:
                   Example: --providers gemini3,kimi,qwen3,gpt-oss
   --chips N       Chips per player (default: 3)
   --output PATH   Output directory (default: ./data_v2)
-  --delay MS      Delay between API calls in ms (default: 500)
+  --delay MS      Delay between API calls in ms (default: 500, 0 = none)
+  --recovery-delay MS
+                  Pause after a stuck-state auto-recovery (default: 1000)
   --silent        Disable chat - models can only make game moves (control experiment)
   --headless      Run without interactive TUI
+  --prompt-mode M full (default) or compact: summarize older chat and show only
+                  messages and board changes since the player's last prompt
+  --adaptive      Adapt in-flight LLM calls per provider (AIMD on 429/timeouts and
+                  latency); --parallel becomes the ceiling on concurrent games
+  --max-inflight N
+                  Upper bound for --adaptive (default: 4 x --parallel)
+  --stream        Append snapshots to session-*.ndjson as they happen (follow
+                  live with: python analysis/session_tail.py data_v2)
+  --stop-file PATH
+                  Stop starting new games once PATH exists (running games finish);
+                  written by python analysis/sequential_test.py --stop-file PATH
   --help          Show this help
 
 Available providers:
@@ -39,6 +52,9 @@ Available providers:
   Bedrock Claude 4.0/4.1:
     bedrock / bedrock-sonnet4 / bedrock-opus4 / bedrock-opus41
 
+  Local (OpenAI-compatible server at LOCAL_BASE_URL, default http://127.0.0.1:8765/v1):
+    local / local:<model>       e.g. recorded-response replay: analysis/replay_server.py
+
 Examples:
   # Single provider (all 4 players use same model)
   node cli/index.js --games 100 --provider groq
@@ -82,7 +98,10 @@ async function main() {
     'bedrock-sonnet4', 'bedrock-opus4', 'bedrock-opus41',
     // Legacy
     'bedrock-thinking',
+    // Local OpenAI-compatible server (LOCAL_BASE_URL), also 'local:<model>'
+    'local',
   ];
+  const isValidProvider = (p) => validProviders.includes(p) || p.startsWith('local:');
   
   // Parse --providers for mixed-model mode
   let providersList = null;
@@ -94,7 +113,7 @@ async function main() {
       process.exit(1);
     }
     for (const p of providersList) {
-      if (!validProviders.includes(p)) {
+      if (!isValidProvider(p)) {
         console.error(`Invalid provider: ${p}`);
         console.error(`Valid providers: ${validProviders.join(', ')}`);
         process.exit(1);
@@ -102,13 +121,20 @@ async function main() {
     }
   } else {
     // Single provider mode
-    if (!validProviders.includes(args.provider)) {
+    if (!isValidProvider(args.provider)) {
       console.error(`Invalid provider: ${args.provider}`);
       console.error(`Valid providers: ${validProviders.join(', ')}`);
       process.exit(1);
     }
   }
 
+  const promptModes = ['full', 'compact'];
+  if (!promptModes.includes(args.promptMode)) {
+    console.error(`Invalid prompt mode: ${args.promptMode}`);
+    console.error(`Valid prompt modes: ${promptModes.join(', ')}`);
+    process.exit(1);
+  }
+
   // API key mapping
   const apiKeyMap = {
     'groq': ['GROQ_API_KEY', 'VITE_GROQ_API_KEY'],
@@ -173,7 +199,10 @@ Config:
   Parallel: ${args.parallel}
   Chips:    ${args.chips}
   Silent:   ${args.silent ? 'YES (no chat - control experiment)' : 'NO (chat enabled)'}
-  Output:   ${args.output}
+  Output:   ${args.output}${args.stream ? ' (streaming NDJSON)' : ''}
+  Prompts:  ${args.promptMode}
+  Adaptive: ${args.adaptive ? `YES (max ${args.maxInflight || args.parallel * 4} in-flight LLM calls)` : 'NO'}${args.stopFile ? `
+  Stop:     when ${args.stopFile} exists` : ''}
 `);
 
   if (providersList) {
@@ -193,8 +222,14 @@ Config:
     chips: args.chips,
     outputDir: args.output,
     delay: args.delay,
+    recoveryDelay: args.recoveryDelay,
     silent: args.silent, // No chat mode for control experiments
-    headless: args.headless
+    headless: args.headless,
+    stream: args.stream,
+    promptMode: args.promptMode,
+    adaptive: args.adaptive,
+    maxInflight: args.maxInflight,
+    stopFile: args.stopFile
   });
 
   await tui.start();
@@ -19,10 +19,10 @@ class BaseProvider {
 
 // OpenAI Provider
 class OpenAIProvider extends BaseProvider {
-  constructor(apiKey, model = 'gpt-4o-mini') {
+  constructor(apiKey, model = 'gpt-4o-mini', baseUrl = 'https://api.openai.com/v1') {
     super(apiKey);
     this.model = model;
-    this.baseUrl = 'https://api.openai.com/v1';
+    this.baseUrl = baseUrl;
   }
 
   async call(systemPrompt, userPrompt, tools) {
@@ -855,6 +855,16 @@ function getEnv(name) {
  * Create a provider instance based on type
  */
 export function createProvider(type) {
+  // Local OpenAI-compatible endpoint (e.g. analysis/replay_server.py).
+  // 'local:<model>' sets the model name sent, so recorded responses match per seat.
+  if (type === 'local' || type.startsWith('local:')) {
+    return new OpenAIProvider(
+      getEnv('LOCAL_API_KEY') || 'local',
+      type.slice('local:'.length) || getEnv('LOCAL_MODEL') || 'replay',
+      getEnv('LOCAL_BASE_URL') || 'http://127.0.0.1:8765/v1'
+    );
+  }
+
   switch (type) {
     case 'openai':
       return new OpenAIProvider(getEnv('OPENAI_API_KEY'));
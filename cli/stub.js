@@ -0,0 +1,193 @@
+#!/usr/bin/env node
+// Stub LLM endpoint - OpenAI-compatible /chat/completions that plays legal moves
+// Reads the options the game prompt lists (available chips, piles, kill choices)
+// and answers after a sampled latency, so simulator throughput can be measured
+// without a provider. Used by cli/benchmark.js; point the CLI at it with
+// LOCAL_BASE_URL and --provider local.
+//
+// Usage: node cli/stub.js --port 8787 --latency lognormal:300,0.5 --error-rate 0.02
+
+import * as http from 'http';
+
+const COLORS = ['red', 'blue', 'green', 'yellow'];
+
+const HELP = `
+So Long Sucker - Stub LLM Endpoint
+
+Usage: node cli/stub.js [options]
+
+Options:
+  --port N          Port to listen on (default: 8787, 0 = any free port)
+  --latency SPEC    Response latency distribution (default: fixed:0)
+                      fixed:MS
+                      uniform:MIN-MAX
+                      lognormal:MEDIAN,SIGMA
+  --error-rate P    Fraction of requests answered with HTTP 429 (default: 0)
+  --chat-rate P     Chance an answer also sends a chat message when chat is offered (default: 0.3)
+  --seed N          Random seed (default: 1)
+`;
+
+// Small seeded PRNG (mulberry32) so runs are repeatable
+export function createRng(seed) {
+  let a = seed >>> 0;
+  return () => {
+    a = (a + 0x6D2B79F5) >>> 0;
+    let t = a;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+export function parseLatency(spec = 'fixed:0') {
+  const [kind, params = '0'] = spec.split(':');
+  if (kind === 'fixed') {
+    const ms = Number(params);
+    return () => ms;
+  }
+  if (kind === 'uniform') {
+    const [min, max] = params.split('-').map(Number);
+    return (rng) => min + (max - min) * rng();
+  }
+  if (kind === 'lognormal') {
+    const [median, sigma] = params.split(',').map(Number);
+    return (rng) => {
+      // Box-Muller
+      const z = Math.sqrt(-2 * Math.log(1 - rng())) * Math.cos(2 * Math.PI * rng());
+      return median * Math.exp(sigma * z);
+    };
+  }
+  throw new Error(`Unknown latency spec: ${spec}`);
+}
+
+function pick(rng, items) {
+  return items[Math.floor(rng() * items.length)];
+}
+
+function listAfter(prompt, marker) {
+  const match = prompt.match(new RegExp(`${marker}\\s*([^\\n]*)`));
+  if (!match) return [];
+  return match[1].split(',').map(s => s.replace(/["\s]|or use|to start a new pile\.?/g, '').trim()).filter(Boolean);
+}
+
+// One legal game action for the phase the prompt describes
+export function chooseAction(prompt, toolNames, rng) {
+  const has = (name) => toolNames.includes(name);
+  if (has('playChip')) {
+    const chips = listAfter(prompt, 'Available chips:').filter(c => COLORS.includes(c));
+    if (chips.length) return { name: 'playChip', arguments: { color: pick(rng, chips) } };
+  }
+  if (has('selectPile')) {
+    const piles = [...prompt.matchAll(/- Pile (\d+):/g)].map(m => m[1]);
+    return { name: 'selectPile', arguments: { pileId: pick(rng, [...piles, 'new']) } };
+  }
+  if (has('killChip')) {
+    const chips = listAfter(prompt, 'Choose which chip to KILL:').filter(c => COLORS.includes(c));
+    if (chips.length) return { name: 'killChip', arguments: { color: pick(rng, chips) } };
+  }
+  if (has('chooseNextPlayer')) {
+    const others = prompt.split('PILES:')[0];
+    const alive = COLORS.filter(c => !new RegExp(`- ${c}: ELIMINATED`).test(others));
+    return { name: 'chooseNextPlayer', arguments: { playerId: COLORS.indexOf(pick(rng, alive)) } };
+  }
+  if (has('respondToDonation')) {
+    const chips = listAfter(prompt, 'Available to donate:').filter(c => COLORS.includes(c));
+    return rng() < 0.5 && chips.length
+      ? { name: 'respondToDonation', arguments: { accept: true, color: pick(rng, chips) } }
+      : { name: 'respondToDonation', arguments: { accept: false } };
+  }
+  return null;
+}
+
+export function startStub({ port = 8787, latency = 'fixed:0', errorRate = 0, chatRate = 0.3, seed = 1 } = {}) {
+  const rng = createRng(seed);
+  const sampleLatency = parseLatency(latency);
+  const stats = { requests: 0, errors: 0 };
+
+  const server = http.createServer((req, res) => {
+    let body = '';
+    req.on('data', chunk => { body += chunk; });
+    req.on('end', () => {
+      if (req.method === 'GET' && req.url.startsWith('/stats')) {
+        res.writeHead(200, { 'Content-Type': 'application/json' });
+        res.end(JSON.stringify(stats));
+        return;
+      }
+      stats.requests++;
+      if (rng() < errorRate) {
+        stats.errors++;
+        res.writeHead(429, { 'Content-Type': 'application/json' });
+        res.end(JSON.stringify({ error: { message: 'Rate limited (stub)' } }));
+        return;
+      }
+
+      let request = {};
+      try { request = JSON.parse(body || '{}'); } catch { /* empty request */ }
+      const prompt = [...(request.messages || [])].reverse().find(m => m.role === 'user')?.content || '';
+      const toolNames = (request.tools || []).map(t => t.function?.name || t.name);
+
+      const calls = [];
+      if (toolNames.includes('sendChat') && rng() < chatRate) {
+        calls.push({ name: 'sendChat', arguments: { message: `stub message ${stats.requests}` } });
+      }
+      const action = chooseAction(prompt, toolNames, rng);
+      if (action) calls.push(action);
+
+      const payload = {
+        id: `stub-${stats.requests}`,
+        object: 'chat.completion',
+        model: request.model,
+        choices: [{
+          index: 0,
+          message: {
+            role: 'assistant',
+            content: null,
+            tool_calls: calls.map((c, i) => ({
+              id: `call_${stats.requests}_${i}`,
+              type: 'function',
+              function: { name: c.name, arguments: JSON.stringify(c.arguments) }
+            }))
+          },
+          finish_reason: calls.length ? 'tool_calls' : 'stop'
+        }],
+        usage: { prompt_tokens: Math.ceil(prompt.length / 4), completion_tokens: 20 * calls.length }
+      };
+      setTimeout(() => {
+        res.writeHead(200, { 'Content-Type': 'application/json' });
+        res.end(JSON.stringify(payload));
+      }, Math.max(0, sampleLatency(rng)));
+    });
+  });
+
+  return new Promise((resolve) => {
+    server.listen(port, '127.0.0.1', () => resolve({ server, stats, port: server.address().port }));
+  });
+}
+
+function parseStubArgs(argv) {
+  const opts = { port: 8787, latency: 'fixed:0', errorRate: 0, chatRate: 0.3, seed: 1 };
+  for (let i = 0; i < argv.length; i++) {
+    const next = argv[i + 1];
+    switch (argv[i]) {
+      case '--port': opts.port = Number(next); i++; break;
+      case '--latency': opts.latency = next; i++; break;
+      case '--error-rate': opts.errorRate = Number(next); i++; break;
+      case '--chat-rate': opts.chatRate = Number(next); i++; break;
+      case '--seed': opts.seed = Number(next); i++; break;
+      case '--help':
+      case '-h': opts.help = true; break;
+    }
+  }
+  return opts;
+}
+
+if (import.meta.url === `file://${process.argv[1]}`) {
+  const opts = parseStubArgs(process.argv.slice(2));
+  if (opts.help) {
+    console.log(HELP);
+    process.exit(0);
+  }
+  const { port } = await startStub(opts);
+  // benchmark.js waits for this line
+  console.log(`stub listening on http://127.0.0.1:${port}/v1 (latency ${opts.latency}, error rate ${opts.errorRate})`);
+}
@@ -11,8 +11,12 @@ export function parseArgs(argv) {
     chips: 3,
     output: './data_v2',
     delay: 500,
+    recoveryDelay: 1000,
     silent: false,
     headless: false,
+    stream: false,
+    adaptive: false,
+    promptMode: 'full',
     help: false
   };
 
@@ -51,7 +55,12 @@ export function parseArgs(argv) {
         break;
       case '--delay':
       case '-d':
-        args.delay = parseInt(next) || args.delay;
+        // 0 is a valid delay (no rate limiting), so don't fall back on falsy
+        args.delay = Number.isNaN(parseInt(next)) ? args.delay : parseInt(next);
+        i++;
+        break;
+      case '--recovery-delay':
+        args.recoveryDelay = Number.isNaN(parseInt(next)) ? args.recoveryDelay : parseInt(next);
         i++;
         break;
       case '--headless':
@@ -60,6 +69,24 @@ export function parseArgs(argv) {
       case '--silent':
         args.silent = true;
         break;
+      case '--stream':
+        args.stream = true;
+        break;
+      case '--prompt-mode':
+        args.promptMode = next;
+        i++;
+        break;
+      case '--adaptive':
+        args.adaptive = true;
+        break;
+      case '--max-inflight':
+        args.maxInflight = parseInt(next) || null;
+        i++;
+        break;
+      case '--stop-file':
+        args.stopFile = next || null;
+        i++;
+        break;
       case '--help':
       case '-h':
         args.help = true;
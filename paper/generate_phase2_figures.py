@@ -4,9 +4,15 @@ Generate Phase 2 (Human vs AI) figures for the paper.
 Creates clean, publication-ready visualizations.
 """
 
+import sys
+from pathlib import Path
+
 import matplotlib.pyplot as plt
 import numpy as np
 
+# Kill counts from analysis/targeting.py, when its tensor has been built
+TARGETING = Path(__file__).parent.parent / 'analysis' / 'cache' / 'targeting.npz'
+
 # Set style for publication
 plt.style.use('seaborn-v0_8-whitegrid')
 plt.rcParams['font.family'] = 'sans-serif'
@@ -125,8 +131,19 @@ print("Generating Figure 8: AI Targeting Patterns...")
 
 fig, ax = plt.subplots(figsize=(7, 7))
 
-# Pie chart data
+# Pie chart data: AI kills in human-vs-AI games, published counts unless the tensor exists
 sizes = [86, 14]
+ai_kills = 2284
+if TARGETING.exists():
+    sys.path.insert(0, str(TARGETING.parent.parent))
+    from targeting import HUMAN, TargetingTensor
+    tensor = TargetingTensor.load(TARGETING)
+    ai = [m for m in tensor.models if m != HUMAN]
+    if HUMAN in tensor.models and ai:
+        by_victim = dict(zip(tensor.models, tensor.total(['victim'], attacker=ai, mode='vs_human')))
+        ai_kills = int(sum(by_victim.values()))
+        if ai_kills:
+            sizes = [ai_kills - by_victim[HUMAN], by_victim[HUMAN]]
 labels = ['Other AI\nplayers', 'Human\nplayer']
 colors = [AI_COLOR, HUMAN_COLOR]
 explode = (0.05, 0.05)
@@ -142,7 +159,7 @@ for autotext in autotexts:
     autotext.set_fontweight('bold')
     autotext.set_color('white')
 
-ax.set_title('Who Does AI Target When Killing Chips?\n(2,284 AI kill decisions)', 
+ax.set_title(f'Who Does AI Target When Killing Chips?\n({ai_kills:,} AI kill decisions)', 
              fontsize=14, fontweight='bold', pad=20)
 
 # Add annotation